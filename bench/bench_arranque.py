@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de arranque del programa de línea de comandos.
+
+Mide el tiempo total de proceso (arranque, importaciones y tarea) de ejecuciones
+cortas, donde el arranque domina: el mensaje de uso, una tarea pequeña con y sin
+validación XSD y una tarea resuelta desde la caché. Con el intérprete de Python
+se indica además qué módulos pesados carga cada escenario (medido aparte con
+-X importtime, que no cuenta en el tiempo).
+
+--ejecutable permite medir el programa generado con PyInstaller (un archivo o un
+directorio, ver ineoXlsxCmdLine.spec e ineoXlsxCmdLine_onedir.spec) en lugar de
+ineoXlsxCmdLine.py. Cada escenario se ejecuta --repeticiones veces (10 por
+defecto) y se toma la mediana. Con --guardar se guarda la referencia; sin él se
+compara con ella y el proceso termina con código 1 si algún escenario es más
+lento que el umbral.
+
+Uso: python bench/bench_arranque.py [escenario ...] [--ejecutable=dist/ineoXlsxCmdLine/ineoXlsxCmdLine]
+         [--repeticiones=10] [--umbral=0.2] [--referencia=bench/referencia_arranque.json] [--guardar]
+         [--resultado=resultado.json]
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from ineoXlsxCmdLine import parse_command_line
+from generar_tarea import generate_task
+
+SCRIPT = os.path.join(os.path.dirname(BENCH_DIR), 'ineoXlsxCmdLine.py')
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'referencia_arranque.json')
+
+# Escenarios: opciones de la tarea (None = sin tarea, solo el mensaje de uso) y si
+# se ejecuta una vez antes de medir para llenar la caché
+SCENARIOS = {
+    'uso': {'tarea': None},
+    'tarea_pequena': {'tarea': {}},
+    'sin_validacion': {'tarea': {'validate': 'false'}},
+    'xlsxwriter_sin_validacion': {'tarea': {'engine': 'xlsxwriter', 'validate': 'false'}},
+    'acierto_cache': {'tarea': {'cacheDir': 'cache'}, 'preparar': True},
+}
+
+# Módulos cuya carga se indica en el informe
+HEAVY_MODULES = ('openpyxl', 'lxml.etree', 'xlsxwriter', 'urllib.request', 'http.client', 'multiprocessing')
+
+
+def make_task(work_dir, name, params):
+    """Tarea pequeña (2 hojas de 20 filas); retorna la ruta o None para el escenario de uso"""
+    if params['tarea'] is None:
+        return None
+    options = {key: os.path.join(work_dir, value) if key == 'cacheDir' else value
+               for key, value in params['tarea'].items()}
+    task_file = os.path.join(work_dir, f"{name}.xml")
+    generate_task(task_file, os.path.join(work_dir, f"{name}.xlsx"), sheets=2, rows=20, options=options)
+    return task_file
+
+
+def run_once(command, task_file, work_dir, name):
+    """Ejecuta el programa y retorna el tiempo total del proceso en segundos"""
+    output = os.path.join(work_dir, f"{name}.xlsx")
+    if os.path.exists(output):
+        # Siempre un archivo nuevo: sin actualizar el resultado anterior
+        os.remove(output)
+    args = command + ([task_file] if task_file else [])
+    start = time.perf_counter()
+    subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=work_dir)
+    return time.perf_counter() - start
+
+
+def loaded_modules(task_file, work_dir, name):
+    """Módulos pesados que importa el escenario (solo con el intérprete de Python)"""
+    output = os.path.join(work_dir, f"{name}.xlsx")
+    if os.path.exists(output):
+        os.remove(output)
+    args = [sys.executable, '-X', 'importtime', SCRIPT] + ([task_file] if task_file else [])
+    completed = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=work_dir)
+    imported = {line.rsplit('|', 1)[-1].strip() for line in completed.stderr.splitlines()
+                if line.startswith('import time:')}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def run_scenario(name, params, command, repetitions, work_dir, python_script):
+    task_file = make_task(work_dir, name, params)
+    if params.get('preparar'):
+        run_once(command, task_file, work_dir, name)
+    times = [run_once(command, task_file, work_dir, name) for _ in range(repetitions)]
+    result = {'median': round(statistics.median(times), 4), 'min': round(min(times), 4)}
+    if python_script:
+        result['modules'] = loaded_modules(task_file, work_dir, name)
+    return result
+
+
+def print_results(results, baseline):
+    reference = baseline.get('scenarios', {}) if baseline else {}
+    print(f"{'Escenario':<26} {'Mediana':>9} {'Mínimo':>9} {'Referencia':>18}  Módulos cargados")
+    for name, result in results.items():
+        before = reference.get(name, {}).get('median')
+        change = f"{before * 1000:>8.0f} ms ({(result['median'] - before) / before:+.0%})" if before else ''
+        modules = ', '.join(result['modules']) if 'modules' in result else '-'
+        print(f"{name:<26} {result['median'] * 1000:>6.0f} ms {result['min'] * 1000:>6.0f} ms {change:>18}  "
+              f"{modules or 'ninguno'}")
+
+
+def main():
+    names, options = parse_command_line(sys.argv[1:])
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Escenarios no reconocidos: {', '.join(unknown)}. Disponibles: {', '.join(SCENARIOS)}")
+        sys.exit(2)
+    repetitions = max(1, int(options.get('repeticiones', 10)))
+    threshold = float(options.get('umbral', 0.2))
+    baseline_file = options.get('referencia', DEFAULT_BASELINE)
+    executable = options.get('ejecutable')
+    command = [os.path.abspath(executable)] if executable else [sys.executable, SCRIPT]
+
+    work_dir = tempfile.mkdtemp(prefix='bench_arranque_')
+    results = {}
+    try:
+        for name in names or SCENARIOS:
+            results[name] = run_scenario(name, SCENARIOS[name], command, repetitions, work_dir, not executable)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'command': executable or 'ineoXlsxCmdLine.py', 'repetitions': repetitions, 'scenarios': results}
+    if 'resultado' in options:
+        with open(options['resultado'], 'w', encoding='utf-8') as result_file:
+            json.dump(report, result_file, ensure_ascii=False, indent=2)
+
+    if 'guardar' in options:
+        print_results(results, None)
+        with open(baseline_file, 'w', encoding='utf-8') as baseline_handle:
+            json.dump(report, baseline_handle, ensure_ascii=False, indent=2)
+        print(f"Referencia guardada en {baseline_file}")
+        return
+
+    baseline = None
+    if os.path.isfile(baseline_file):
+        with open(baseline_file, encoding='utf-8') as baseline_handle:
+            baseline = json.load(baseline_handle)
+    print_results(results, baseline)
+    if baseline is None:
+        print(f"Sin referencia ({baseline_file}): ejecute con --guardar para crearla")
+        return
+
+    regressions = [(name, baseline['scenarios'][name]['median'], result['median'])
+                   for name, result in results.items()
+                   if name in baseline.get('scenarios', {})
+                   and (result['median'] - baseline['scenarios'][name]['median'])
+                   / baseline['scenarios'][name]['median'] > threshold]
+    for name, before, after in regressions:
+        print(f"REGRESIÓN {name}: {before * 1000:.0f} ms -> {after * 1000:.0f} ms (umbral {threshold:.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"Sin regresiones (umbral {threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
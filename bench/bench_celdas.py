@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de direccionamiento de celdas en el motor openpyxl.
+
+Compara celdas/segundo entre el método anterior (construir f"{columna}{fila}"
+dos veces y asignar y releer la celda con ws[...]) y OpenpyxlWriter actual
+(índice de columna cacheado, una sola llamada ws.cell o filas completas con
+ws.append en hojas nuevas), sobre entradas sintéticas de 10 columnas con
+estilos repartidos. No incluye el guardado del libro.
+
+Uso: python bench/bench_celdas.py [num_celdas ...]   (por defecto 100.000, 1.000.000 y 5.000.000)
+"""
+
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel.excel_escritores import OpenpyxlWriter
+from bench_estilos import STYLES, synthetic_cells
+
+
+def new_writer():
+    """OpenpyxlWriter sobre un libro nuevo (no se guarda) y su hoja Hoja1"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer = OpenpyxlWriter('bench_celdas.xlsx', auto_fit=False)
+        ws, _ = writer.open_sheet('Hoja1')
+    writer.set_styles(STYLES)
+    return writer, ws
+
+
+def write_a1_lookups(num_cells):
+    """Método anterior: dos búsquedas por cadena A1 por celda y estilos cacheados"""
+    writer, ws = new_writer()
+    for row, column, value, format_attr, style_id in synthetic_cells(num_cells):
+        ws[f"{column}{row}"] = value
+        cell = ws[f"{column}{row}"]
+        writer.set_cell_style(cell, format_attr, style_id)
+    return writer.wb
+
+
+def write_cells(num_cells, new_sheet=True):
+    """Método actual: OpenpyxlWriter.write_cell sobre una hoja nueva o ya existente"""
+    writer, ws = new_writer()
+    if not new_sheet:
+        # Como una hoja cargada de un archivo existente: sin agrupación por filas
+        del writer.appended_rows[ws]
+    for row, column, value, format_attr, style_id in synthetic_cells(num_cells):
+        writer.write_cell(ws, row, column, value, format_attr, style_id)
+    writer.flush_row()
+    return writer.wb
+
+
+def measure(label, function, num_cells):
+    gc.collect()
+    start = time.perf_counter()
+    wb = function(num_cells)
+    elapsed = time.perf_counter() - start
+    del wb
+    print(f"  {label:<34} {elapsed:8.2f} s  {num_cells / elapsed:12,.0f} celdas/s")
+    return elapsed
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [100_000, 1_000_000, 5_000_000]
+    for num_cells in sizes:
+        print(f"Celdas: {num_cells:,}")
+        before = measure("Cadena A1 dos veces (antes)", write_a1_lookups, num_cells)
+        existing = measure("ws.cell (hoja existente)", lambda n: write_cells(n, new_sheet=False), num_cells)
+        after = measure("Filas con ws.append (hoja nueva)", write_cells, num_cells)
+        print(f"  Mejora: x{before / existing:.2f} hoja existente, x{before / after:.2f} hoja nueva")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la conversión completa (xml_to_excel) con tareas sintéticas y
+control de regresiones frente a una referencia guardada.
+
+Cada escenario genera sus tareas con generar_tarea.py y las ejecuta con
+ineoXlsxCmdLine.py en un proceso nuevo. El rendimiento (celdas/s), el pico de
+memoria y los tiempos por fase se leen de la respuesta JSON de la tarea
+(<responseOut>); el tamaño es el del xlsx generado. En los escenarios de
+actualización el archivo de partida se genera antes y no cuenta en la medida. Los
+escenarios compresion_* comparan el tiempo de guardado y el tamaño de cada
+compressionLevel.
+
+Cada escenario se ejecuta --repeticiones veces (3 por defecto) y se toma la
+ejecución más rápida. Sin --guardar, el resultado se compara con la referencia y el
+proceso termina con código 1 si algún escenario empeora más del umbral: menos
+celdas/s, más memoria o un archivo más grande. La referencia depende de la
+máquina: debe generarse con --guardar en la misma máquina donde se compara.
+
+Uso: python bench/bench_conversion.py [escenario ...] [--escala=1] [--repeticiones=3] [--umbral=0.2]
+         [--referencia=bench/referencia_conversion.json] [--guardar] [--resultado=resultado.json]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from ineoXlsxCmdLine import parse_command_line
+from generar_tarea import generate_task
+
+SCRIPT = os.path.join(os.path.dirname(BENCH_DIR), 'ineoXlsxCmdLine.py')
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'referencia_conversion.json')
+
+# Escenarios: parámetros del generador (filas por hoja a escala 1), opciones de la
+# tarea y, para las actualizaciones, la tarea que crea el archivo de partida
+SCENARIOS = {
+    'nuevo_openpyxl': {'hojas': 2, 'filas': 5000},
+    'nuevo_streaming': {'hojas': 2, 'filas': 5000, 'opciones': {'streaming': 'true'}},
+    'nuevo_xlsxwriter': {'hojas': 2, 'filas': 5000, 'opciones': {'engine': 'xlsxwriter'}},
+    'nuevo_filas': {'hojas': 2, 'filas': 5000, 'forma': 'row'},
+    'nuevo_texto': {'hojas': 2, 'filas': 5000, 'forma': 'texto', 'opciones': {'streaming': 'true'}},
+    'nuevo_paralelo': {'hojas': 4, 'filas': 2500, 'opciones': {'workers': '2'}},
+    'nuevo_presupuesto': {'hojas': 2, 'filas': 5000, 'opciones': {'memoryBudget': '2'}},
+    'solo_texto_estilos': {'hojas': 1, 'filas': 10000, 'numericos': 0.0, 'estilos': 40},
+    'solo_numeros': {'hojas': 1, 'filas': 10000, 'numericos': 1.0},
+    'actualizar_completo': {'hojas': 1, 'filas': 2000, 'base': {'hojas': 4, 'filas': 5000}},
+    'actualizar_partes': {'hojas': 1, 'filas': 2000, 'base': {'hojas': 4, 'filas': 5000},
+                          'opciones': {'updateMode': 'parts'}},
+    'compresion_0': {'hojas': 2, 'filas': 5000, 'opciones': {'compressionLevel': '0'}},
+    'compresion_1': {'hojas': 2, 'filas': 5000, 'opciones': {'compressionLevel': '1'}},
+    'compresion_9': {'hojas': 2, 'filas': 5000, 'opciones': {'compressionLevel': '9'}},
+}
+
+# Métricas comparadas con la referencia: (nombre, True si mayor es mejor)
+GATED_METRICS = (('cells_per_sec', True), ('peak_rss_mb', False), ('output_bytes', False))
+
+
+def make_task(work_dir, name, params, scale, excel_file, response_file=None):
+    task_file = os.path.join(work_dir, f"{name}.xml")
+    cells = generate_task(
+        task_file,
+        excel_file,
+        response_file,
+        sheets=params.get('hojas', 1),
+        rows=max(2, int(params.get('filas', 1000) * scale)),
+        columns=params.get('columnas', 10),
+        styles=params.get('estilos', 5),
+        numeric_ratio=params.get('numericos', 0.5),
+        form=params.get('forma', 'cell'),
+        options=params.get('opciones'),
+    )
+    return task_file, cells
+
+
+def run_task(task_file):
+    completed = subprocess.run([sys.executable, SCRIPT, task_file], stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or f"código {completed.returncode}")
+
+
+def run_scenario(name, params, scale, work_dir):
+    """Ejecuta una vez el escenario y retorna sus métricas"""
+    excel_file = os.path.join(work_dir, f"{name}.xlsx")
+    response_file = os.path.join(work_dir, f"{name}.json")
+    if os.path.exists(excel_file):
+        os.remove(excel_file)
+    if 'base' in params:
+        base_task, _ = make_task(work_dir, f"{name}_base", params['base'], scale, excel_file)
+        run_task(base_task)
+    task_file, _ = make_task(work_dir, name, params, scale, excel_file, response_file)
+    run_task(task_file)
+
+    with open(response_file, encoding='utf-8') as response_handle:
+        response = json.load(response_handle)
+    if response.get('status') != 'ok':
+        raise RuntimeError(response.get('error', 'la tarea terminó con error'))
+    return {
+        'cells': response['cells'],
+        'elapsed': response['elapsed'],
+        'cells_per_sec': response['cells_per_sec'],
+        'peak_rss_mb': response['peak_rss_mb'],
+        'output_bytes': os.path.getsize(excel_file),
+        'phases': {phase: values['elapsed'] for phase, values in response['phases'].items()},
+    }
+
+
+def compare(results, baseline, threshold):
+    """Retorna la lista de regresiones (escenario, métrica, referencia, actual)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in GATED_METRICS:
+            before, after = reference.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+
+def print_results(results, baseline):
+    reference = baseline.get('scenarios', {}) if baseline else {}
+    print(f"{'Escenario':<22} {'Celdas':>9} {'Tiempo':>8} {'Guardado':>9} {'Celdas/s':>10} {'Pico MB':>8} "
+          f"{'Tamaño KB':>10}  Ref. celdas/s")
+    for name, result in results.items():
+        before = reference.get(name, {}).get('cells_per_sec')
+        change = f"{before:>10,} ({(result['cells_per_sec'] - before) / before:+.0%})" if before else ''
+        print(f"{name:<22} {result['cells']:>9,} {result['elapsed']:>7.2f}s {result['phases'].get('save', 0):>8.2f}s "
+              f"{result['cells_per_sec']:>10,} "
+              f"{result['peak_rss_mb'] or 0:>8.1f} {result['output_bytes'] / 1024:>10,.0f}  {change}")
+
+
+def main():
+    names, options = parse_command_line(sys.argv[1:])
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Escenarios no reconocidos: {', '.join(unknown)}. Disponibles: {', '.join(SCENARIOS)}")
+        sys.exit(2)
+    scale = float(options.get('escala', 1))
+    repetitions = max(1, int(options.get('repeticiones', 3)))
+    threshold = float(options.get('umbral', 0.2))
+    baseline_file = options.get('referencia', DEFAULT_BASELINE)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_conversion_')
+    results = {}
+    try:
+        for name in names or SCENARIOS:
+            runs = [run_scenario(name, SCENARIOS[name], scale, work_dir) for _ in range(repetitions)]
+            results[name] = min(runs, key=lambda run: run['elapsed'])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'scale': scale, 'repetitions': repetitions, 'scenarios': results}
+    if 'resultado' in options:
+        with open(options['resultado'], 'w', encoding='utf-8') as result_file:
+            json.dump(report, result_file, ensure_ascii=False, indent=2)
+
+    if 'guardar' in options:
+        print_results(results, None)
+        with open(baseline_file, 'w', encoding='utf-8') as baseline_handle:
+            json.dump(report, baseline_handle, ensure_ascii=False, indent=2)
+        print(f"Referencia guardada en {baseline_file}")
+        return
+
+    baseline = None
+    if os.path.isfile(baseline_file):
+        with open(baseline_file, encoding='utf-8') as baseline_handle:
+            baseline = json.load(baseline_handle)
+    print_results(results, baseline)
+    if baseline is None:
+        print(f"Sin referencia ({baseline_file}): ejecute con --guardar para crearla")
+        return
+    if baseline.get('scale') != scale:
+        print(f"Aviso: la referencia se midió con escala {baseline.get('scale')} y esta ejecución con {scale}")
+
+    regressions = compare(results, baseline, threshold)
+    for name, metric, before, after in regressions:
+        print(f"REGRESIÓN {name}: {metric} {before:,} -> {after:,} (umbral {threshold:.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"Sin regresiones (umbral {threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
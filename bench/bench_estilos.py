@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de aplicación de estilos en el motor openpyxl.
+
+Compara celdas/segundo entre el método anterior (crear Font, PatternFill y
+Alignment por cada celda) y la caché de estilos de OpenpyxlWriter, sobre una
+hoja sintética donde casi todas las celdas usan uno de cinco estilos.
+
+Uso: python bench/bench_estilos.py [num_celdas]   (por defecto 1.000.000)
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+
+from excel.excel_tarea import create_openpyxl_style
+from excel.excel_escritores import OpenpyxlWriter
+
+COLUMNS = 'ABCDEFGHIJ'
+
+STYLES = {
+    '1': {'font': 'Arial', 'size': 12, 'bold': True, 'color': '000000', 'background': 'E6E6FA'},
+    '2': {'font': 'Arial', 'size': 10, 'bold': False, 'color': '333333'},
+    '3': {'font': 'Arial', 'size': 10, 'bold': False, 'color': '000000', 'alignment': 'center'},
+    '4': {'font': 'Arial', 'size': 10, 'bold': False, 'color': '006400', 'alignment': 'right'},
+    '5': {'font': 'Arial', 'size': 10, 'bold': False, 'color': '8B4513'},
+}
+
+
+def synthetic_cells(num_cells):
+    """Genera (fila, columna, valor, formato, estilo) con cinco estilos repartidos"""
+    for i in range(num_cells):
+        row, col = divmod(i, len(COLUMNS))
+        style_id = str(i % 5 + 1)
+        format_attr = '#,##0.00' if style_id == '4' else 'General'
+        yield row + 1, COLUMNS[col], f"valor {i}", format_attr, style_id
+
+
+def write_per_cell_styles(num_cells):
+    """Método anterior: objetos de estilo nuevos en cada celda"""
+    wb = Workbook()
+    ws = wb.active
+    for row, column, value, format_attr, style_id in synthetic_cells(num_cells):
+        ws[f"{column}{row}"] = value
+        cell = ws[f"{column}{row}"]
+        if format_attr and format_attr != 'General':
+            cell.number_format = format_attr
+        font, fill, alignment = create_openpyxl_style(STYLES[style_id])
+        cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+
+
+def write_cached_styles(num_cells):
+    """Método actual: estilos compilados una vez y aplicados por referencia"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer = OpenpyxlWriter('bench_estilos.xlsx', auto_fit=False)
+    writer.set_styles(STYLES)
+    ws = writer.wb.create_sheet('Hoja1')
+    # Mismo direccionamiento que el método anterior: solo cambia la aplicación del estilo
+    for row, column, value, format_attr, style_id in synthetic_cells(num_cells):
+        ws[f"{column}{row}"] = value
+        writer.set_cell_style(ws[f"{column}{row}"], format_attr, style_id)
+
+
+def measure(label, function, num_cells):
+    start = time.perf_counter()
+    function(num_cells)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s  {num_cells / elapsed:12,.0f} celdas/s")
+    return elapsed
+
+
+def main():
+    num_cells = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Celdas: {num_cells:,}")
+    before = measure("Estilos por celda (antes)", write_per_cell_styles, num_cells)
+    after = measure("Estilos cacheados (ahora)", write_cached_styles, num_cells)
+    print(f"Mejora: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
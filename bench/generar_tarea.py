@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Generador de tareas <ineoDoc> sintéticas para medir la conversión.
+
+La primera fila de cada hoja es una cabecera con el estilo 1; las filas de datos
+reparten los demás estilos por fila. Las columnas numéricas (según la proporción
+indicada) llevan tipo number y formato #,##0.00; el resto son textos. Los valores
+son pseudoaleatorios con semilla fija: la misma configuración genera siempre el
+mismo archivo.
+
+Formas de entrada: cell (una <cell> por valor), row (<row> con hijos <c>) y
+texto (<row> con los valores separados por tabuladores). Las tres generan el mismo xlsx.
+
+Uso: python bench/generar_tarea.py <tarea.xml> --dataOut=<archivo.xlsx> [--responseOut=<respuesta.json>]
+         [--hojas=1] [--filas=1000] [--columnas=10] [--estilos=5] [--numericos=0.5]
+         [--forma=cell|row|texto] [--semilla=1] [--opciones=nombre:valor,nombre:valor]
+"""
+
+import os
+import random
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ineoXlsxCmdLine import parse_command_line
+from excel.excel_escritores import COLUMN_LETTERS
+
+FORMS = ('cell', 'row', 'texto')
+
+NUMBER_FORMAT = '#,##0.00'
+
+WORDS = ('Cliente', 'Pedido', 'Almacén', 'Factura', 'Proveedor', 'Región', 'Artículo', 'Ruta')
+
+STYLE_FONTS = ('Arial', 'Calibri', 'Verdana')
+
+
+def style_xml(style_id):
+    """Estilo sintético: el 1 (cabecera) en negrita con fondo; el resto varía fuente, color y alineación"""
+    font = STYLE_FONTS[style_id % len(STYLE_FONTS)]
+    parts = [f'<style id="{style_id}"><font>{font}</font><size>{10 + style_id % 3}</size>']
+    parts.append(f'<bold>{"true" if style_id == 1 else "false"}</bold><color>#{style_id * 2654435 % 0xFFFFFF:06X}</color>')
+    if style_id == 1:
+        parts.append('<background>#E6E6FA</background>')
+    if style_id % 4 == 0:
+        parts.append('<alignment>right</alignment>')
+    parts.append('</style>')
+    return ''.join(parts)
+
+
+def numeric_columns(columns, numeric_ratio):
+    """Columnas numéricas repartidas entre las de texto según la proporción"""
+    return {col for col in range(1, columns + 1) if int(col * numeric_ratio) > int((col - 1) * numeric_ratio)}
+
+
+def row_style(row, styles):
+    """Estilo de la fila: 1 en la cabecera, el resto repartido; None sin estilos"""
+    if not styles:
+        return None
+    if row == 1 or styles == 1:
+        return '1'
+    return str(2 + row % (styles - 1))
+
+
+def row_values(rng, row, columns, numeric):
+    if row == 1:
+        return [f"Columna {COLUMN_LETTERS[col]}" for col in range(1, columns + 1)]
+    return [f"{rng.uniform(0, 100000):.2f}" if col in numeric else f"{rng.choice(WORDS)} {rng.randrange(100000)}"
+            for col in range(1, columns + 1)]
+
+
+def generate_task(path, data_out, response_out=None, sheets=1, rows=1000, columns=10, styles=5,
+                  numeric_ratio=0.5, form='cell', options=None, seed=1):
+    """Escribe la tarea sintética en path y retorna el número de celdas generadas"""
+    if form not in FORMS:
+        raise ValueError(f"Forma '{form}' no reconocida ({', '.join(FORMS)})")
+    rng = random.Random(seed)
+    numeric = numeric_columns(columns, numeric_ratio)
+    with open(path, 'w', encoding='utf-8') as task:
+        task.write('<?xml version="1.0" encoding="UTF-8"?>\n<ineoDoc task="updateXlsx" task_id="bench">\n')
+        task.write(f'<data><dataOut>{escape("FILE://" + data_out)}</dataOut></data>\n')
+        if response_out:
+            task.write(f'<responseOut>{escape("FILE://" + response_out)}</responseOut>\n')
+        task.write('<log><logLevel>WARNING</logLevel><logConsole>false</logConsole></log>\n')
+        if options:
+            task.write('<options>')
+            for name, value in options.items():
+                task.write(f'<option name={quoteattr(name)} value={quoteattr(value)}/>')
+            task.write('</options>\n')
+        task.write('<workbooks>\n')
+        if styles:
+            task.write('<styles>' + ''.join(style_xml(style_id) for style_id in range(1, styles + 1)) + '</styles>\n')
+
+        for sheet in range(1, sheets + 1):
+            task.write(f'<workbook name="Hoja{sheet}">\n')
+            if form != 'cell':
+                for col in sorted(numeric):
+                    letter = COLUMN_LETTERS[col]
+                    task.write(f'<range ref="{letter}2:{letter}{rows}" format="{NUMBER_FORMAT}" type="number"/>\n')
+            for row in range(1, rows + 1):
+                values = row_values(rng, row, columns, numeric)
+                style_id = row_style(row, styles)
+                if form == 'cell':
+                    style_attr = f' style="{style_id}"' if style_id else ''
+                    for col, value in enumerate(values, start=1):
+                        typed = f' format="{NUMBER_FORMAT}" type="number"' if col in numeric and row > 1 else ''
+                        task.write(f'<cell row="{row}" column="{COLUMN_LETTERS[col]}" value="{escape(value)}"'
+                                   f'{typed}{style_attr}/>\n')
+                else:
+                    style_attr = f' style="{style_id}"' if style_id else ''
+                    if form == 'row':
+                        cells = ''.join(f'<c>{escape(value)}</c>' for value in values)
+                    else:
+                        cells = escape('\t'.join(values))
+                    task.write(f'<row r="{row}"{style_attr}>{cells}</row>\n')
+            task.write('</workbook>\n')
+        task.write('</workbooks>\n</ineoDoc>\n')
+    return sheets * rows * columns
+
+
+def parse_options_spec(spec):
+    """'nombre:valor,nombre:valor' -> diccionario de opciones de la tarea"""
+    options = {}
+    for item in filter(None, (spec or '').split(',')):
+        name, _, value = item.partition(':')
+        options[name] = value
+    return options
+
+
+def main():
+    args, cli = parse_command_line(sys.argv[1:])
+    if len(args) != 1 or 'dataOut' not in cli:
+        print("Uso: python bench/generar_tarea.py <tarea.xml> --dataOut=<archivo.xlsx> [--hojas=N] [--filas=N] "
+              "[--columnas=N] [--estilos=N] [--numericos=0.5] [--forma=cell|row|texto] [--opciones=nombre:valor,...]")
+        sys.exit(1)
+    cells = generate_task(
+        args[0],
+        cli['dataOut'],
+        cli.get('responseOut'),
+        sheets=int(cli.get('hojas', 1)),
+        rows=int(cli.get('filas', 1000)),
+        columns=int(cli.get('columnas', 10)),
+        styles=int(cli.get('estilos', 5)),
+        numeric_ratio=float(cli.get('numericos', 0.5)),
+        form=cli.get('forma', 'cell'),
+        options=parse_options_spec(cli.get('opciones')),
+        seed=int(cli.get('semilla', 1)),
+    )
+    print(f"Tarea generada: {args[0]} ({cells:,} celdas)")
+
+
+if __name__ == "__main__":
+    main()
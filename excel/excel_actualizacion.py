@@ -0,0 +1,583 @@
+"""
+Actualización de un xlsx existente a nivel de partes del paquete zip.
+
+En lugar de cargar el libro completo con openpyxl y volver a guardarlo, solo se
+regeneran las partes afectadas por la tarea:
+
+- las hojas de destino existentes (se combinan las celdas nuevas con las actuales),
+- las hojas nuevas,
+- styles.xml (se añaden las fuentes, rellenos, formatos y xf necesarios),
+- workbook.xml, sus relaciones y [Content_Types].xml si se añaden hojas.
+
+El resto de partes (hojas no tocadas, sharedStrings.xml, imágenes...) se copian
+comprimidas tal cual. El texto nuevo se escribe como cadena en línea, de modo que
+la tabla de cadenas compartidas y las referencias de las demás hojas no cambian.
+
+Si el paquete tiene algo que esta actualización no trata (fórmulas compartidas
+en una hoja de destino, formato Strict, una hoja de gráfico con el mismo nombre...)
+se utiliza la actualización completa con openpyxl.
+"""
+
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from copy import copy, deepcopy
+from datetime import date, datetime
+
+from lxml import etree
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import get_column_letter, range_boundaries
+from openpyxl.utils.datetime import to_excel
+from openpyxl.xml.functions import tostring
+
+from excel.excel_tarea import create_openpyxl_style
+from excel.excel_escritores import COLUMN_INDEXES, BufferedWriter, OpenpyxlWriter, SheetBuffer, auto_width
+from excel.excel_paquete import (
+    DEFAULT_COMPRESSION_LEVEL,
+    ZIP_DATE_TIME,
+    compress_type,
+    deflate_file,
+    new_entry_info,
+    read_file_chunks,
+    read_raw_chunks,
+    write_raw_entry,
+    write_sheet_part,
+)
+from excel.excel_valores import is_formula
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CONTENT_TYPES_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+OFFICE_DOCUMENT_REL = DOC_REL_NS + '/officeDocument'
+WORKSHEET_REL = DOC_REL_NS + '/worksheet'
+STYLES_REL = DOC_REL_NS + '/styles'
+CALC_CHAIN_REL = DOC_REL_NS + '/calcChain'
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+R_ID = f'{{{DOC_REL_NS}}}id'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+
+def _main(tag):
+    return f'{{{MAIN_NS}}}{tag}'
+
+
+ROW, CELL, VALUE, FORMULA, INLINE_STRING, TEXT = (_main(tag) for tag in ('row', 'c', 'v', 'f', 'is', 't'))
+
+# Orden de las secciones de styles.xml que se pueden ampliar
+STYLE_SECTIONS = ('numFmts', 'fonts', 'fills', 'borders', 'cellStyleXfs', 'cellXfs')
+
+# Partes XML grandes (hojas de cientos de miles de filas)
+_PARSER = etree.XMLParser(huge_tree=True, remove_blank_text=False)
+
+
+class UnsupportedPackage(Exception):
+    """El paquete no se puede actualizar por partes; se recurre a la actualización completa"""
+
+
+def canonical(element):
+    """Representación comparable de un elemento (para no duplicar fuentes, rellenos y xf)"""
+    return (
+        element.tag,
+        tuple(sorted(element.attrib.items())),
+        (element.text or '').strip(),
+        tuple(canonical(child) for child in element if isinstance(child.tag, str)),
+    )
+
+
+def to_main_namespace(serialisable):
+    """Convierte un objeto de estilo de openpyxl en elemento lxml del espacio de nombres principal"""
+    element = etree.fromstring(tostring(serialisable.to_tree()))
+    for node in element.iter():
+        if not node.tag.startswith('{'):
+            node.tag = _main(node.tag)
+    return element
+
+
+def resolve_target(source_part, target):
+    """Ruta de la parte destino de una relación, relativa a la parte origen"""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def rels_path(part):
+    return posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+
+
+def serialize(root):
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+class StylesPart:
+    """styles.xml del libro: añade los formatos, fuentes, rellenos y xf que piden las celdas"""
+
+    def __init__(self, xml_bytes, styles_dict):
+        self.root = etree.fromstring(xml_bytes, _PARSER)
+        if self.root.tag != _main('styleSheet'):
+            raise UnsupportedPackage("styles.xml no reconocido")
+        self.styles_dict = styles_dict
+        self.sections = {}
+        for name in STYLE_SECTIONS:
+            section = self.root.find(_main(name))
+            if section is None and name != 'numFmts':
+                raise UnsupportedPackage(f"styles.xml sin sección {name}")
+            self.sections[name] = section
+        # Índice de cada elemento existente por su forma canónica
+        self.indexes = {
+            name: {canonical(element): position for position, element in reversed(list(enumerate(self.sections[name])))}
+            for name in ('fonts', 'fills', 'cellXfs')
+        }
+        self.num_formats = {}
+        if self.sections['numFmts'] is not None:
+            for num_fmt in self.sections['numFmts']:
+                self.num_formats.setdefault(num_fmt.get('formatCode'), int(num_fmt.get('numFmtId')))
+        self.style_elements = {}
+        self.xf_cache = {}
+        self.modified = False
+
+    def add_unique(self, name, element):
+        """Retorna el índice del elemento en la sección, añadiéndolo si no existe"""
+        key = canonical(element)
+        index = self.indexes[name].get(key)
+        if index is None:
+            section = self.sections[name]
+            index = self.indexes[name][key] = len(section)
+            section.append(element)
+            section.set('count', str(len(section)))
+            self.modified = True
+        return index
+
+    def num_format_id(self, format_code):
+        num_fmt_id = BUILTIN_FORMATS_REVERSE.get(format_code)
+        if num_fmt_id is not None:
+            return num_fmt_id
+        num_fmt_id = self.num_formats.get(format_code)
+        if num_fmt_id is not None:
+            return num_fmt_id
+        num_fmts = self.sections['numFmts']
+        if num_fmts is None:
+            num_fmts = self.sections['numFmts'] = etree.Element(_main('numFmts'))
+            self.root.insert(0, num_fmts)
+        num_fmt_id = max([163, *self.num_formats.values()]) + 1
+        etree.SubElement(num_fmts, _main('numFmt'), numFmtId=str(num_fmt_id), formatCode=format_code)
+        num_fmts.set('count', str(len(num_fmts)))
+        self.num_formats[format_code] = num_fmt_id
+        self.modified = True
+        return num_fmt_id
+
+    def style_parts(self, style_id):
+        """(font, fill, alignment) del estilo como elementos de styles.xml (fill y alignment opcionales)"""
+        parts = self.style_elements.get(style_id)
+        if parts is None:
+            font, fill, alignment = create_openpyxl_style(self.styles_dict[style_id])
+            parts = self.style_elements[style_id] = (
+                to_main_namespace(font),
+                to_main_namespace(fill) if fill else None,
+                to_main_namespace(alignment) if alignment else None,
+            )
+        return parts
+
+    def xf_index(self, base_xf, format_attr, style_id):
+        """Índice xf de una celda con el estilo y formato indicados.
+
+        base_xf es el xf actual de la celda o None si no tenía estilo; como en
+        OpenpyxlWriter, se conservan bordes y protección del estilo actual.
+        """
+        key = (base_xf, format_attr, style_id)
+        index = self.xf_cache.get(key)
+        if index is not None:
+            return index
+
+        cell_xfs = self.sections['cellXfs']
+        if base_xf is not None and base_xf < len(cell_xfs):
+            xf = deepcopy(cell_xfs[base_xf])
+        else:
+            xf = etree.Element(_main('xf'), numFmtId='0', fontId='0', fillId='0', borderId='0', xfId='0')
+        if format_attr is not None:
+            xf.set('numFmtId', str(self.num_format_id(format_attr)))
+            xf.set('applyNumberFormat', '1')
+        if style_id is not None:
+            font, fill, alignment = self.style_parts(style_id)
+            xf.set('fontId', str(self.add_unique('fonts', deepcopy(font))))
+            xf.set('applyFont', '1')
+            if fill is not None:
+                xf.set('fillId', str(self.add_unique('fills', deepcopy(fill))))
+                xf.set('applyFill', '1')
+            if alignment is not None:
+                for previous in xf.findall(_main('alignment')):
+                    xf.remove(previous)
+                xf.insert(0, deepcopy(alignment))
+                xf.set('applyAlignment', '1')
+
+        index = self.xf_cache[key] = self.add_unique('cellXfs', xf)
+        return index
+
+    def to_bytes(self):
+        return serialize(self.root)
+
+
+def set_cell_value(cell, value):
+    """Sustituye el contenido (valor, fórmula o cadena) del elemento <c>.
+
+    Un texto vacío deja la celda en blanco: sin contenido ni tipo, solo con su estilo.
+    """
+    for child in list(cell):
+        if child.tag in (VALUE, FORMULA, INLINE_STRING):
+            cell.remove(child)
+    if value == '':
+        cell.attrib.pop('t', None)
+    elif value.__class__ is str and is_formula(value):
+        # Como openpyxl: fórmula sin tipo y valor vacío que Excel recalcula al abrir
+        cell.attrib.pop('t', None)
+        etree.SubElement(cell, FORMULA).text = value[1:]
+        etree.SubElement(cell, VALUE)
+    elif value.__class__ is str:
+        cell.set('t', 'inlineStr')
+        text = etree.SubElement(etree.SubElement(cell, INLINE_STRING), TEXT)
+        text.text = value
+        if value != value.strip():
+            text.set(XML_SPACE, 'preserve')
+    elif isinstance(value, bool):
+        cell.set('t', 'b')
+        etree.SubElement(cell, VALUE).text = '1' if value else '0'
+    else:
+        cell.attrib.pop('t', None)
+        if isinstance(value, (date, datetime)):
+            value = to_excel(value)
+        etree.SubElement(cell, VALUE).text = repr(value)
+
+
+def merge_columns(root, fixed_widths, auto_widths):
+    """Aplica los anchos a <cols> con el criterio de OpenpyxlWriter.fit_columns.
+
+    Los anchos fijos se aplican siempre; los automáticos solo amplían el ancho actual.
+    """
+    if not fixed_widths and not auto_widths:
+        return
+    cols = root.find(_main('cols'))
+    if cols is None:
+        cols = etree.Element(_main('cols'))
+        root.find(_main('sheetData')).addprevious(cols)
+
+    def column_element(col):
+        """Elemento <col> de la columna, separándolo de su grupo min..max si es necesario"""
+        for element in cols:
+            first, last = int(element.get('min')), int(element.get('max'))
+            if not first <= col <= last:
+                continue
+            if first == last:
+                return element
+            for part_first, part_last in ((first, col - 1), (col, col), (col + 1, last)):
+                if part_first > part_last:
+                    continue
+                part = deepcopy(element)
+                part.set('min', str(part_first))
+                part.set('max', str(part_last))
+                element.addprevious(part)
+                if part_first == col:
+                    selected = part
+            cols.remove(element)
+            return selected
+        return None
+
+    def set_width(col, width):
+        element = column_element(col)
+        if element is None:
+            element = etree.SubElement(cols, _main('col'), min=str(col), max=str(col))
+        element.set('width', str(width))
+        element.set('customWidth', '1')
+
+    for col, width in fixed_widths.items():
+        set_width(col, width)
+    for col, width in auto_widths.items():
+        element = column_element(col)
+        if element is not None and float(element.get('width') or 0) >= width:
+            continue
+        set_width(col, width)
+    cols[:] = sorted(cols, key=lambda element: int(element.get('min')))
+
+
+class PackageUpdateWriter(BufferedWriter):
+    """Actualiza un xlsx existente regenerando solo las partes que cambian (ver módulo)"""
+
+    name = 'actualizacion'
+
+    def __init__(self, excel_file, auto_fit=True, compression_level=None, compression_threads=1,
+                 memory_budget=None):
+        super().__init__(auto_fit, memory_budget)
+        self.excel_file = excel_file
+        # Solo se aplica a las partes regeneradas: las demás se copian tal como están
+        self.compression_level = DEFAULT_COMPRESSION_LEVEL if compression_level is None else compression_level
+        self.compression_threads = compression_threads
+        self.column_config = None
+        with zipfile.ZipFile(excel_file) as package:
+            try:
+                self.existing_sheets = set(self.read_sheet_names(package))
+            except (KeyError, etree.XMLSyntaxError, UnsupportedPackage):
+                self.existing_sheets = set()
+        print(f"Actualizando archivo Excel existente por partes: {excel_file}")
+
+    @staticmethod
+    def office_document(package):
+        """Ruta de workbook.xml según las relaciones del paquete"""
+        relations = etree.fromstring(package.read('_rels/.rels'))
+        for relation in relations:
+            if relation.get('Type') == OFFICE_DOCUMENT_REL:
+                return resolve_target('', relation.get('Target'))
+        raise UnsupportedPackage("el paquete no tiene libro")
+
+    def read_sheet_names(self, package):
+        workbook = etree.fromstring(package.read(self.office_document(package)))
+        return [sheet.get('name') for sheet in workbook.iter(_main('sheet'))]
+
+    def set_columns(self, column_widths):
+        super().set_columns(column_widths)
+        # Se conserva la configuración original por si hay que recurrir a openpyxl
+        self.column_config = column_widths
+
+    def open_sheet(self, sheet_name):
+        if sheet_name in self.sheets:
+            print(f"  Utilizando hoja existente: {sheet_name}")
+            return self.sheets[sheet_name], False
+        sheet = self.sheets[sheet_name] = SheetBuffer(sheet_name)
+        if sheet_name in self.existing_sheets:
+            print(f"  Utilizando hoja existente: {sheet_name}")
+            return sheet, False
+        print(f"  Creando nueva hoja: {sheet_name}")
+        return sheet, True
+
+    def save(self):
+        try:
+            self.update_package()
+        except UnsupportedPackage as e:
+            print(f"Actualización por partes no aplicable ({e}): se carga el libro completo")
+            self.save_full()
+
+    def save_full(self):
+        """Actualización completa con openpyxl a partir de las celdas del buffer"""
+        writer = OpenpyxlWriter(self.excel_file, self.auto_fit, self.compression_level, self.compression_threads,
+                                self.memory_budget)
+        writer.set_styles(self.styles_dict)
+        writer.set_columns(self.column_config)
+        for sheet_name, sheet in self.sheets.items():
+            ws, _ = writer.open_sheet(sheet_name)
+            for row, cells in sheet.sorted_rows():
+                for col in sorted(cells):
+                    value, format_attr, style_id = cells[col]
+                    writer.write_cell(ws, row, get_column_letter(col), value, format_attr, style_id)
+        writer.fit_columns()
+        writer.save()
+
+    def merge_sheet(self, xml_bytes, sheet, auto_widths, styles):
+        """Combina las celdas del buffer con la parte XML de una hoja existente y retorna la nueva parte"""
+        root = etree.fromstring(xml_bytes, _PARSER)
+        if root.tag != _main('worksheet'):
+            raise UnsupportedPackage(f"la hoja '{sheet.name}' no es una hoja de cálculo")
+        for formula in root.iter(FORMULA):
+            if formula.get('t') == 'shared':
+                raise UnsupportedPackage(f"la hoja '{sheet.name}' contiene fórmulas compartidas")
+        sheet_data = root.find(_main('sheetData'))
+
+        rows = {}
+        last_row = 0
+        for row_element in sheet_data:
+            row = int(row_element.get('r') or last_row + 1)
+            row_element.set('r', str(row))
+            rows[row] = row_element
+            last_row = row
+
+        rows_added = False
+        for row, cells in sheet.sorted_rows():
+            row_element = rows.get(row)
+            if row_element is None:
+                row_element = rows[row] = etree.Element(ROW, r=str(row))
+                rows_added = True
+            self.merge_row(row_element, row, cells, styles)
+        if rows_added:
+            sheet_data[:] = [rows[row] for row in sorted(rows)]
+
+        # Dimensión: unión de la actual y las celdas escritas
+        bounds = sheet.bounds()
+        if bounds is not None:
+            min_col, min_row, max_col, max_row = bounds
+            dimension = root.find(_main('dimension'))
+            if dimension is None:
+                dimension = etree.Element(_main('dimension'))
+                sheet_properties = root.find(_main('sheetPr'))
+                if sheet_properties is not None:
+                    sheet_properties.addnext(dimension)
+                else:
+                    root.insert(0, dimension)
+            elif dimension.get('ref'):
+                ref_min_col, ref_min_row, ref_max_col, ref_max_row = range_boundaries(dimension.get('ref'))
+                min_col, min_row = min(min_col, ref_min_col or min_col), min(min_row, ref_min_row or min_row)
+                max_col, max_row = max(max_col, ref_max_col or max_col), max(max_row, ref_max_row or max_row)
+            dimension.set('ref', f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}")
+
+        merge_columns(root, self.fixed_widths, auto_widths)
+        return serialize(root)
+
+
+    def merge_row(self, row_element, row, new_cells, styles):
+        """Escribe las celdas nuevas de la fila, sustituyendo las existentes en las mismas columnas"""
+        cells = {}
+        others = []
+        last_col = 0
+        for element in row_element:
+            if element.tag != CELL:
+                others.append(element)
+                continue
+            reference = element.get('r')
+            col = COLUMN_INDEXES[reference.rstrip('0123456789')] if reference else last_col + 1
+            if not reference:
+                element.set('r', f"{get_column_letter(col)}{row}")
+            cells[col] = element
+            last_col = col
+
+        cells_added = False
+        for col in sorted(new_cells):
+            value, format_attr, style_id = new_cells[col]
+            element = cells.get(col)
+            if element is None:
+                element = cells[col] = etree.Element(CELL, r=f"{get_column_letter(col)}{row}")
+                cells_added = True
+                base_xf = None
+            else:
+                current = element.get('s')
+                base_xf = int(current) if current and current != '0' else None
+            style_id, format_attr = self.style_key(format_attr, style_id)
+            if style_id is not None or format_attr is not None:
+                element.set('s', str(styles.xf_index(base_xf, format_attr, style_id)))
+            set_cell_value(element, value)
+
+        if cells_added:
+            row_element[:] = [cells[col] for col in sorted(cells)] + others
+        row_element.attrib.pop('spans', None)
+
+    def update_package(self):
+        level = self.compression_level
+        work_dir = tempfile.mkdtemp(prefix='ineoXlsx_', dir=os.path.dirname(os.path.abspath(self.excel_file)))
+        try:
+            with zipfile.ZipFile(self.excel_file) as package:
+                replaced, dropped, new_parts = self.build_parts(package, work_dir)
+                output_file = os.path.join(work_dir, 'salida.xlsx')
+                with open(self.excel_file, 'rb') as source, zipfile.ZipFile(output_file, 'w') as target:
+                    for info in package.infolist():
+                        if info.filename in dropped:
+                            continue
+                        data = replaced.get(info.filename)
+                        if data is None:
+                            write_raw_entry(target, copy(info), read_raw_chunks(source, info))
+                        else:
+                            part = zipfile.ZipInfo(info.filename, date_time=ZIP_DATE_TIME)
+                            part.compress_type = compress_type(level)
+                            target.writestr(part, data, compresslevel=level or None)
+                    for part_name, path in new_parts:
+                        deflated_path = path + '.deflate'
+                        crc, file_size, compress_size = deflate_file(path, deflated_path, level,
+                                                                     threads=self.compression_threads)
+                        write_raw_entry(target, new_entry_info(part_name, crc, file_size, compress_size, level),
+                                        read_file_chunks(deflated_path))
+            # Sustitución atómica: si algo falla antes, el archivo original queda intacto
+            os.replace(output_file, self.excel_file)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def build_parts(self, package, work_dir):
+        """Calcula las partes regeneradas, las eliminadas y las hojas nuevas del paquete"""
+        try:
+            workbook_path = self.office_document(package)
+            workbook = etree.fromstring(package.read(workbook_path), _PARSER)
+            workbook_rels_path = rels_path(workbook_path)
+            relations = etree.fromstring(package.read(workbook_rels_path), _PARSER)
+        except (KeyError, etree.XMLSyntaxError) as e:
+            raise UnsupportedPackage(f"estructura no reconocida: {e}") from None
+        if workbook.tag != _main('workbook'):
+            raise UnsupportedPackage("formato de libro no reconocido")
+
+        targets = {relation.get('Id'): (relation.get('Type'), resolve_target(workbook_path, relation.get('Target')))
+                   for relation in relations}
+        sheets_element = workbook.find(_main('sheets'))
+        existing = {sheet.get('name'): targets.get(sheet.get(R_ID)) for sheet in sheets_element}
+        styles_path = next((path for rel_type, path in targets.values() if rel_type == STYLES_REL), None)
+        if styles_path is None:
+            raise UnsupportedPackage("el libro no tiene styles.xml")
+        styles = StylesPart(package.read(styles_path), self.styles_dict)
+
+        replaced = {}
+        dropped = set()
+        new_sheets = []
+        for sheet_name, sheet in self.sheets.items():
+            auto_widths = {col: auto_width(length) for col, length in sheet.column_lengths.items()}
+            if sheet_name not in existing:
+                new_sheets.append((sheet, auto_widths))
+                continue
+            target = existing[sheet_name]
+            if target is None or target[0] != WORKSHEET_REL:
+                raise UnsupportedPackage(f"la hoja '{sheet_name}' no es una hoja de cálculo")
+            replaced[target[1]] = self.merge_sheet(package.read(target[1]), sheet, auto_widths, styles)
+
+        content_types = None
+        if replaced:
+            # Las celdas sustituidas pueden haber sido fórmulas: Excel reconstruye la cadena de cálculo
+            for relation in list(relations):
+                if relation.get('Type') == CALC_CHAIN_REL:
+                    dropped.add(resolve_target(workbook_path, relation.get('Target')))
+                    relations.remove(relation)
+
+        new_parts = []
+        if new_sheets:
+            names = set(package.namelist())
+            sheet_ids = [int(sheet.get('sheetId')) for sheet in sheets_element]
+            relation_ids = {relation.get('Id') for relation in relations}
+            content_types = etree.fromstring(package.read('[Content_Types].xml'), _PARSER)
+
+            def style_attr(format_attr, style_id):
+                style_id, format_attr = self.style_key(format_attr, style_id)
+                if style_id is None and format_attr is None:
+                    return ''
+                return f' s="{styles.xf_index(None, format_attr, style_id)}"'
+
+            number = 0
+            for sheet, auto_widths in new_sheets:
+                number += 1
+                while f"xl/worksheets/sheet{number}.xml" in names:
+                    number += 1
+                part_name = f"xl/worksheets/sheet{number}.xml"
+                names.add(part_name)
+                relation_id = next(f"rId{n}" for n in range(1, len(relation_ids) + 2) if f"rId{n}" not in relation_ids)
+                relation_ids.add(relation_id)
+                sheet_id = max(sheet_ids, default=0) + 1
+                sheet_ids.append(sheet_id)
+
+                etree.SubElement(sheets_element, _main('sheet'),
+                                 {'name': sheet.name, 'sheetId': str(sheet_id), R_ID: relation_id})
+                etree.SubElement(relations, f'{{{PKG_REL_NS}}}Relationship', Id=relation_id, Type=WORKSHEET_REL,
+                                 Target=posixpath.relpath(part_name, posixpath.dirname(workbook_path)))
+                etree.SubElement(content_types, f'{{{CONTENT_TYPES_NS}}}Override',
+                                 PartName='/' + part_name, ContentType=WORKSHEET_CONTENT_TYPE)
+
+                widths = dict(auto_widths)
+                widths.update(self.fixed_widths)
+                path = os.path.join(work_dir, f"sheet{number}.xml")
+                write_sheet_part(path, sheet, widths, style_attr)
+                new_parts.append((part_name, path))
+            replaced[workbook_path] = serialize(workbook)
+
+        if content_types is not None or dropped:
+            if content_types is None:
+                content_types = etree.fromstring(package.read('[Content_Types].xml'), _PARSER)
+            for override in list(content_types):
+                if override.get('PartName', '').lstrip('/') in dropped:
+                    content_types.remove(override)
+            replaced['[Content_Types].xml'] = serialize(content_types)
+        if new_sheets or dropped:
+            replaced[workbook_rels_path] = serialize(relations)
+        if styles.modified:
+            replaced[styles_path] = styles.to_bytes()
+        return replaced, dropped, new_parts
@@ -0,0 +1,161 @@
+"""
+Caché local de resultados: evita repetir la conversión de tareas idénticas.
+
+La clave es un SHA-256 de:
+
+- los datos del XML, decodificados si dataIn es BASE64 (desde el primer <workbooks>/<styles>/<columns>/<workbook>,
+  sin la cabecera de la tarea: task_id, log, dataOut y responseOut no cuentan),
+  que incluyen estilos, anchos de columna y celdas;
+- las opciones efectivas de la tarea (salvo las de la caché, workers y
+  compressionThreads, que no cambian el contenido del resultado);
+- el contenido del dataOut previo, o su ausencia (archivo nuevo).
+
+Cada resultado se guarda como <clave>.xlsx en el directorio de la caché. En un
+acierto se copia al dataOut sin convertir nada. No se usan enlaces duros: los
+motores que sobrescriben el archivo en su sitio (openpyxl, xlsxwriter)
+modificarían también la entrada de la caché.
+
+El tamaño total está acotado: al guardar se eliminan las entradas usadas hace
+más tiempo (LRU según la fecha de modificación, que se renueva en cada acierto).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+
+from excel.excel_transporte import open_data
+
+# Cambiar al modificar el contenido que genera la conversión: invalida las entradas anteriores
+CACHE_FORMAT = 1
+
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# Opciones que no afectan al resultado
+IGNORED_OPTIONS = ('cacheDir', 'cacheSize', 'workers', 'compressionThreads')
+
+_DATA_START = re.compile(rb'<(?:workbooks|styles|columns|workbook)[\s/>]')
+
+# Bloque de lectura para el hash (sin importar excel_paquete: un acierto no carga openpyxl)
+CHUNK_SIZE = 1 << 20
+
+# Contadores del proceso (se mantienen entre tareas en los modos lote y servicio)
+CACHE_COUNTERS = {'hits': 0, 'misses': 0}
+
+
+def data_digest(xml_file, digest):
+    """Añade al hash los bytes del XML a partir del primer elemento de datos (ruta o Base64Source)"""
+    with open_data(xml_file) as xml_handle:
+        head = b''
+        # Buscar el inicio de los datos; la cabecera de la tarea no forma parte de la clave
+        while True:
+            chunk = xml_handle.read(CHUNK_SIZE)
+            head += chunk
+            match = _DATA_START.search(head)
+            if match or not chunk:
+                break
+        digest.update(head[match.start():] if match else head)
+        for chunk in iter(lambda: xml_handle.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+
+def file_digest(path, digest):
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+
+class ResultCache:
+    """Directorio de resultados direccionados por contenido con tamaño máximo"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def task_key(self, xml_file, options, excel_file):
+        digest = hashlib.sha256(f"ineoXlsx-cache-{CACHE_FORMAT}\n".encode())
+        relevant = {name: value for name, value in options.items() if name not in IGNORED_OPTIONS}
+        digest.update(json.dumps(relevant, sort_keys=True).encode('utf-8'))
+        digest.update(b'\ndata\n')
+        data_digest(xml_file, digest)
+        if os.path.isfile(excel_file):
+            digest.update(b'\nprevious\n')
+            file_digest(excel_file, digest)
+        else:
+            digest.update(b'\nnew\n')
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.xlsx")
+
+    def fetch(self, key, excel_file):
+        """Copia el resultado guardado al dataOut; retorna False si no existe (fallo de caché)"""
+        entry = self.entry_path(key)
+        try:
+            self.copy_into_place(entry, excel_file)
+            # La fecha de modificación marca el último uso para el LRU
+            os.utime(entry)
+        except OSError:
+            # Entrada inexistente o recién eliminada por otro proceso
+            CACHE_COUNTERS['misses'] += 1
+            return False
+        CACHE_COUNTERS['hits'] += 1
+        return True
+
+    def store(self, key, excel_file):
+        """Guarda el resultado de la conversión y aplica el límite de tamaño"""
+        self.copy_into_place(excel_file, self.entry_path(key))
+        self.evict()
+
+    @staticmethod
+    def copy_into_place(source, target):
+        """Copia a un temporal junto al destino y lo sustituye: nunca queda un archivo a medias"""
+        # Nombre único sin mkstemp: el archivo se crea con los permisos habituales (umask)
+        temp_path = os.path.join(os.path.dirname(os.path.abspath(target)), f".ineoXlsx_{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar dentro del tamaño máximo"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.xlsx') and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def open_cache(options, logger):
+    """Caché configurada en las opciones (cacheDir, cacheSize en MB) o None si no se usa"""
+    directory = options.get('cacheDir')
+    if not directory:
+        return None
+    try:
+        size_mb = float(options.get('cacheSize', DEFAULT_CACHE_SIZE_MB))
+    except ValueError:
+        logger.warning(f"Tamaño de caché '{options.get('cacheSize')}' no válido, usando {DEFAULT_CACHE_SIZE_MB} MB")
+        size_mb = DEFAULT_CACHE_SIZE_MB
+    try:
+        return ResultCache(directory, int(size_mb * 1024 * 1024))
+    except OSError as e:
+        logger.warning(f"No se pudo usar el directorio de caché {directory}: {e}")
+        return None
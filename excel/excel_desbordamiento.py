@@ -0,0 +1,158 @@
+"""
+Presupuesto de memoria de una tarea con volcado a disco de las celdas que lo superan.
+
+Los motores que agrupan las celdas por hoja antes de escribirlas (SheetBuffer)
+cuentan las celdas que tienen en memoria. Cuando la tarea supera el presupuesto,
+las filas de cada hoja se ordenan y se vuelcan a disco como un tramo y el buffer
+queda vacío. Al escribir la hoja, sus tramos y las filas que siguen en memoria
+se mezclan por número de fila (heapq.merge) leyendo de cada tramo solo la fila
+en curso, de modo que la memoria queda acotada aunque las celdas lleguen
+desordenadas.
+
+Una celda escrita varias veces conserva el último valor: en la mezcla, los
+tramos más recientes (y por último la memoria) sustituyen a los anteriores.
+
+Los tramos son archivos secuenciales de filas serializadas con pickle, en un
+directorio temporal junto al archivo de salida que se elimina al terminar la tarea.
+"""
+
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from operator import itemgetter
+
+# Memoria estimada de una celda en el buffer: tupla (valor, formato, estilo),
+# entrada en el diccionario de su fila y el propio valor
+CELL_BYTES = 200
+
+# Tramos por hoja a partir de los cuales se combinan en uno (cada tramo es un archivo abierto en la mezcla)
+MAX_RUNS = 32
+
+# Búfer de lectura y escritura de los tramos
+RUN_BUFFER_SIZE = 1 << 20
+
+_ROW_NUMBER = itemgetter(0)
+
+
+def write_run(path, rows):
+    """Escribe en un tramo las filas (número, celdas) en el orden recibido; retorna el número de celdas"""
+    cells = 0
+    with open(path, 'wb', buffering=RUN_BUFFER_SIZE) as run:
+        for row in rows:
+            run.write(pickle.dumps(row, pickle.HIGHEST_PROTOCOL))
+            cells += len(row[1])
+    return cells
+
+
+def read_run(path):
+    """Genera las filas (número, celdas) de un tramo"""
+    with open(path, 'rb', buffering=RUN_BUFFER_SIZE) as run:
+        while True:
+            try:
+                yield pickle.load(run)
+            except EOFError:
+                return
+
+
+def merge_rows(runs, rows):
+    """Genera las filas (número, celdas) ordenadas de los tramos y de las filas en memoria.
+
+    Las celdas de una misma fila en varios orígenes se combinan: las de los
+    tramos posteriores sustituyen a las anteriores y las de memoria a todas.
+    """
+    sources = [read_run(path) for path in runs]
+    sources.append((row, rows[row]) for row in sorted(rows))
+    current = None
+    merged = None
+    # En caso de empate heapq.merge respeta el orden de los orígenes
+    for row, cells in heapq.merge(*sources, key=_ROW_NUMBER):
+        if row == current:
+            merged = {**merged, **cells}
+            continue
+        if current is not None:
+            yield current, merged
+        current, merged = row, cells
+    if current is not None:
+        yield current, merged
+
+
+class MemoryBudget:
+    """Presupuesto de celdas en memoria de una tarea; al superarlo vuelca las hojas a disco"""
+
+    def __init__(self, budget_mb, output_file):
+        self.budget_mb = budget_mb
+        self.max_cells = max(1, int(budget_mb * 1024 * 1024 / CELL_BYTES))
+        # Los tramos pueden ocupar tanto como los datos: se guardan junto a la salida
+        self.base_dir = os.path.dirname(os.path.abspath(output_file))
+        self.directory = None
+        self.cells = 0
+        self.runs = 0
+        self.spills = 0
+        self.spilled_cells = 0
+        self.spilled_bytes = 0
+
+    def add_cell(self, sheets):
+        """Cuenta una celda más en memoria; si se supera el presupuesto vuelca las hojas indicadas"""
+        self.cells += 1
+        if self.cells > self.max_cells:
+            self.spill(sheets)
+
+    def run_path(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='ineoXlsx_', dir=self.base_dir)
+        self.runs += 1
+        return os.path.join(self.directory, f"tramo_{self.runs}.bin")
+
+    def spill(self, sheets):
+        """Vuelca a disco las filas en memoria de las hojas"""
+        for sheet in sheets:
+            if not sheet.rows:
+                continue
+            path = self.run_path()
+            self.spilled_cells += sheet.spill(path)
+            self.spilled_bytes += os.path.getsize(path)
+            if len(sheet.runs) >= MAX_RUNS:
+                # Los tramos se combinan en uno: la mezcla final no abre más de MAX_RUNS archivos
+                sheet.compact(self.run_path())
+        self.cells = 0
+        self.spills += 1
+
+    def merge_stats(self, stats):
+        """Suma los volcados de otro presupuesto (procesos de trabajo del modo paralelo)"""
+        self.spills += stats['spills']
+        self.spilled_cells += stats['spilled_cells']
+        self.spilled_bytes += stats['spilled_bytes']
+
+    def stats(self):
+        return {'spills': self.spills, 'spilled_cells': self.spilled_cells, 'spilled_bytes': self.spilled_bytes}
+
+    def to_response(self):
+        return {
+            'budget_mb': self.budget_mb,
+            'spills': self.spills,
+            'spilled_cells': self.spilled_cells,
+            'spilled_mb': round(self.spilled_bytes / (1024 * 1024), 1),
+        }
+
+    def close(self):
+        """Elimina los tramos de la tarea"""
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+def open_memory_budget(options, output_file, logger):
+    """Presupuesto configurado en la opción memoryBudget (MB) o None si no se usa"""
+    value = options.get('memoryBudget')
+    if not value:
+        return None
+    try:
+        budget_mb = float(value)
+    except ValueError:
+        budget_mb = 0
+    if budget_mb <= 0:
+        logger.warning(f"Presupuesto de memoria '{value}' no válido, se convierte sin presupuesto")
+        return None
+    return MemoryBudget(budget_mb, output_file)
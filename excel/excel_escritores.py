@@ -0,0 +1,625 @@
+"""
+Motores de salida para la conversión XML a Excel.
+
+- OpenpyxlWriter: construye el libro completo en memoria con openpyxl (permite
+  actualizar archivos existentes).
+- XlsxWriterWriter: escribe directamente a disco con xlsxwriter en modo
+  constant_memory (solo para archivos nuevos).
+- SheetPartWriter: genera partes XML de hoja sueltas para el modo paralelo.
+- PackageUpdateWriter (excel_actualizacion): actualiza un archivo existente por
+  partes del zip.
+
+Todos exponen la misma interfaz: set_styles, set_columns, open_sheet, write_cell,
+fit_columns y save. Con un presupuesto de memoria (excel_desbordamiento) las
+celdas en buffer que lo superan se vuelcan a disco.
+"""
+
+import os
+import shutil
+import zlib
+from copy import copy
+
+from excel.excel_tarea import create_openpyxl_style
+from excel.excel_desbordamiento import merge_rows, write_run
+from excel.excel_valores import display_length, is_formula
+
+# openpyxl (y con él lxml) se importa solo al crear un OpenpyxlWriter: el motor
+# xlsxwriter no lo necesita
+
+ENGINES = ('openpyxl', 'xlsxwriter')
+
+# Ancho máximo de columna en el ajuste automático
+MAX_COLUMN_WIDTH = 50
+
+# Índice de columna máximo que admite openpyxl (ZZZ)
+MAX_COLUMN_INDEX = 18278
+
+
+def _column_index(column):
+    """Letra de columna -> índice (1 = A), como openpyxl.utils.column_index_from_string"""
+    if 1 <= len(column) <= 3 and column.isascii() and column.isalpha():
+        index = 0
+        for char in column.upper():
+            index = index * 26 + ord(char) - 64
+        return index
+    raise ValueError(f"{column} is not a valid column name")
+
+
+def _column_letter(col):
+    """Índice de columna (1 = A) -> letra, como openpyxl.utils.get_column_letter"""
+    if not 1 <= col <= MAX_COLUMN_INDEX:
+        raise ValueError(f"Invalid column index {col}")
+    letters = ''
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class _ColumnIndexes(dict):
+    """Letra de columna -> índice (1 = A), calculado la primera vez que se pide cada letra"""
+
+    def __missing__(self, column):
+        index = self[column] = _column_index(column)
+        return index
+
+
+COLUMN_INDEXES = _ColumnIndexes()
+
+
+class _ColumnLetters(dict):
+    """Índice de columna -> letra, calculada la primera vez que se pide cada índice"""
+
+    def __missing__(self, col):
+        letter = self[col] = _column_letter(col)
+        return letter
+
+
+COLUMN_LETTERS = _ColumnLetters()
+
+
+def auto_width(max_length):
+    """Calcula el ancho de columna a partir de la longitud máxima de su contenido"""
+    return min(max_length + 2, MAX_COLUMN_WIDTH)
+
+
+def split_column_group(ws, col_idx):
+    """Separa la columna indicada si pertenece a un grupo <col min..max> de un archivo cargado"""
+    for dimension in list(ws.column_dimensions.values()):
+        if dimension.min and dimension.max and dimension.min < dimension.max and dimension.min <= col_idx <= dimension.max:
+            for first, last in ((dimension.min, col_idx - 1), (col_idx, col_idx), (col_idx + 1, dimension.max)):
+                if first > last:
+                    continue
+                part = copy(dimension)
+                part.index = COLUMN_LETTERS[first]
+                part.min = first
+                part.max = last
+                ws.column_dimensions[part.index] = part
+            return
+
+
+class SheetBuffer:
+    """Filas pendientes de escribir de una hoja: {fila: {columna: (valor, formato, estilo)}}.
+
+    Con presupuesto de memoria, las filas pueden estar además en tramos volcados
+    a disco: para escribir la hoja se recorren con sorted_rows y bounds.
+    """
+
+    __slots__ = ('name', 'rows', 'column_lengths', 'runs', 'spilled_bounds')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+        # Longitud máxima del contenido por índice de columna
+        self.column_lengths = {}
+        # Tramos volcados a disco, del más antiguo al más reciente, y su rango de celdas
+        self.runs = []
+        self.spilled_bounds = None
+
+    def spill(self, path):
+        """Vuelca las filas en memoria, ordenadas, a un tramo en path; retorna el número de celdas"""
+        self.spilled_bounds = self.bounds()
+        rows = self.rows
+        cells = write_run(path, ((row, rows[row]) for row in sorted(rows)))
+        self.runs.append(path)
+        self.rows = {}
+        return cells
+
+    def compact(self, path):
+        """Combina todos los tramos en uno solo en path (las filas en memoria ya están volcadas)"""
+        write_run(path, merge_rows(self.runs, {}))
+        for run in self.runs:
+            os.remove(run)
+        self.runs = [path]
+
+    def sorted_rows(self, release=False):
+        """Genera las filas (número, celdas) en orden, incluidas las volcadas a disco.
+
+        Con release las filas en memoria se liberan a medida que se recorren.
+        """
+        rows = self.rows
+        if self.runs:
+            yield from merge_rows(self.runs, rows)
+            if release:
+                rows.clear()
+            return
+        for row in sorted(rows):
+            yield row, rows.pop(row) if release else rows[row]
+
+    def bounds(self):
+        """(columna mínima, fila mínima, columna máxima, fila máxima) de las celdas, o None si no hay"""
+        bounds = self.spilled_bounds
+        rows = self.rows
+        if rows:
+            memory = (min(min(cells) for cells in rows.values()), min(rows),
+                      max(max(cells) for cells in rows.values()), max(rows))
+            if bounds is None:
+                return memory
+            bounds = (min(bounds[0], memory[0]), min(bounds[1], memory[1]),
+                      max(bounds[2], memory[2]), max(bounds[3], memory[3]))
+        return bounds
+
+
+class OpenpyxlWriter:
+    """Escribe las celdas sobre un Workbook de openpyxl en memoria.
+
+    Con memory_budget las celdas de las hojas nuevas se agrupan en un SheetBuffer
+    y se añaden al libro al guardar. Las hojas que se han volcado a disco no pasan
+    por openpyxl: se escriben como partes XML (como en el modo paralelo) que
+    sustituyen a la hoja vacía del libro guardado.
+    """
+
+    name = 'openpyxl'
+
+    def __init__(self, excel_file, auto_fit=True, compression_level=None, compression_threads=1,
+                 memory_budget=None):
+        from openpyxl import Workbook, load_workbook
+
+        self.excel_file = excel_file
+        # Nivel de compresión del zip (None = el de openpyxl) e hilos para las hojas grandes
+        self.compression_level = compression_level
+        self.compression_threads = compression_threads
+        self.memory_budget = memory_budget
+        # Hojas nuevas con presupuesto de memoria -> SheetBuffer con sus celdas
+        self.buffered_sheets = {}
+        # Verificar si el archivo Excel ya existe
+        if os.path.isfile(excel_file):
+            self.wb = load_workbook(excel_file)
+            print(f"Cargando archivo Excel existente: {excel_file}")
+        else:
+            self.wb = Workbook()
+            self.wb.remove(self.wb.active)
+            print(f"Creando nuevo archivo Excel: {excel_file}")
+
+        self.set_styles({})
+        self.auto_fit = auto_fit
+        self.set_columns(None)
+        # Si se cargó un archivo existente, indexar las hojas ya presentes
+        self.created_sheets = {sheet.title: sheet for sheet in self.wb.worksheets}
+        # Longitud máxima por columna de las hojas tocadas en esta tarea
+        self.column_lengths = {}
+        # Hojas creadas en esta tarea -> última fila escrita. Sus filas nuevas se
+        # acumulan en pending_cells y se añaden de una vez con ws.append
+        self.appended_rows = {}
+        self.pending_ws = None
+        self.pending_row = None
+        self.pending_cells = {}
+
+    def set_styles(self, styles_dict):
+        self.styles_dict = styles_dict
+        # Cada estilo se compila una sola vez: (font, fill, alignment) por id y
+        # StyleArray por combinación (estilo, formato numérico)
+        self.style_objects = {}
+        self.style_arrays = {}
+
+    def set_columns(self, column_widths):
+        """Configura los anchos de <columns>: fijos (se aplican sin medir) o None (automático).
+
+        Sin sección <columns> se miden todas las columnas escritas; con ella solo
+        las marcadas como automáticas (-1). Con auto_fit desactivado no se mide ninguna.
+        """
+        column_widths = column_widths or {}
+        self.fixed_widths = {column: width for column, width in column_widths.items() if width is not None}
+        if not self.auto_fit:
+            self.measured_columns = set()
+        elif column_widths:
+            self.measured_columns = {column for column, width in column_widths.items() if width is None}
+        else:
+            self.measured_columns = None
+
+    def open_sheet(self, sheet_name):
+        """Retorna (hoja, creada) para el nombre indicado, creándola si no existe"""
+        if sheet_name in self.created_sheets:
+            print(f"  Utilizando hoja existente: {sheet_name}")
+            ws = self.created_sheets[sheet_name]
+            self.column_lengths.setdefault(ws, {})
+            return ws, False
+        ws = self.wb.create_sheet(title=sheet_name)
+        self.created_sheets[sheet_name] = ws
+        self.column_lengths[ws] = {}
+        self.appended_rows[ws] = 0
+        if self.memory_budget is not None:
+            self.buffered_sheets[ws] = SheetBuffer(sheet_name)
+        print(f"  Creando nueva hoja: {sheet_name}")
+        return ws, True
+
+    def write_cell(self, ws, row, column, value, format_attr, style_id):
+        if self.measured_columns is None or column in self.measured_columns:
+            lengths = self.column_lengths[ws]
+            length = display_length(value)
+            if length > lengths.get(column, 0):
+                lengths[column] = length
+
+        col = COLUMN_INDEXES[column]
+        if self.buffered_sheets and ws in self.buffered_sheets:
+            self.buffered_sheets[ws].rows.setdefault(row, {})[col] = (value, format_attr, style_id)
+            self.memory_budget.add_cell(self.buffered_sheets.values())
+            return
+        if ws in self.appended_rows:
+            # Hoja nueva: las celdas consecutivas de una misma fila se agrupan
+            # (una celda repetida cierra el grupo para conservar el estilo ya aplicado)
+            if row != self.pending_row or ws is not self.pending_ws or col in self.pending_cells:
+                self.flush_row()
+                self.pending_ws = ws
+                self.pending_row = row
+            self.pending_cells[col] = (value, format_attr, style_id)
+            return
+        self.set_cell_style(ws.cell(row=row, column=col, value=value), format_attr, style_id)
+
+    def flush_row(self):
+        """Escribe la fila pendiente de una hoja nueva.
+
+        Si es la siguiente fila de la hoja y ocupa las columnas desde la A sin
+        huecos se añade entera con ws.append; si no, celda a celda.
+        """
+        if not self.pending_cells:
+            return
+        ws, row, cells = self.pending_ws, self.pending_row, self.pending_cells
+        if row == self.appended_rows[ws] + 1 and len(cells) == max(cells):
+            from openpyxl.cell.cell import Cell
+            new_cells = [None] * len(cells)
+            for col, (value, format_attr, style_id) in cells.items():
+                cell = new_cells[col - 1] = Cell(ws, value=value)
+                self.set_cell_style(cell, format_attr, style_id)
+            ws.append(new_cells)
+        else:
+            for col, (value, format_attr, style_id) in cells.items():
+                self.set_cell_style(ws.cell(row=row, column=col, value=value), format_attr, style_id)
+        self.appended_rows[ws] = max(self.appended_rows[ws], row)
+        self.pending_cells = {}
+
+    def set_cell_style(self, cell, format_attr, style_id):
+        """Aplica el formato numérico y el estilo indicados a la celda"""
+        if not format_attr or format_attr == 'General':
+            format_attr = None
+        if style_id not in self.styles_dict:
+            style_id = None
+        if format_attr is None and style_id is None:
+            return
+
+        # Celda sin estilo previo: reutilizar el StyleArray compilado para esta combinación
+        if not cell.has_style:
+            key = (style_id, format_attr)
+            style_array = self.style_arrays.get(key)
+            if style_array is not None:
+                cell._style = copy(style_array)
+                return
+            self.apply_style(cell, format_attr, style_id)
+            self.style_arrays[key] = copy(cell._style)
+            return
+
+        # Celda con estilo previo (archivo existente): se conservan bordes, protección, etc.
+        self.apply_style(cell, format_attr, style_id)
+
+    def register_style(self, ws, row, format_attr, style_id):
+        """Da de alta la combinación (estilo, formato) en el libro y retorna su índice de estilo (xf).
+
+        Usa la celda A{row} de la hoja como celda auxiliar.
+        """
+        cell = ws.cell(row=row, column=1, value='')
+        self.set_cell_style(cell, format_attr, style_id)
+        return self.wb._cell_styles.add(cell._style)
+
+    def apply_style(self, cell, format_attr, style_id):
+        """Aplica formato numérico y estilo a la celda usando los objetos cacheados por estilo"""
+        # Aplicar formato de número si está especificado
+        if format_attr is not None:
+            cell.number_format = format_attr
+
+        # Aplicar estilos si están especificados
+        if style_id is not None:
+            style_objects = self.style_objects.get(style_id)
+            if style_objects is None:
+                style_objects = self.style_objects[style_id] = create_openpyxl_style(self.styles_dict[style_id])
+            font, fill, alignment = style_objects
+            cell.font = font
+            if fill:
+                cell.fill = fill
+            if alignment:
+                cell.alignment = alignment
+
+    def fit_columns(self):
+        """Ajusta solo las columnas escritas en esta tarea; los anchos previos solo se amplían"""
+        for ws, lengths in self.column_lengths.items():
+            for column_letter, width in self.fixed_widths.items():
+                split_column_group(ws, COLUMN_INDEXES[column_letter])
+                ws.column_dimensions[column_letter].width = width
+            for column_letter, max_length in lengths.items():
+                width = auto_width(max_length)
+                split_column_group(ws, COLUMN_INDEXES[column_letter])
+                dimension = ws.column_dimensions.get(column_letter)
+                if dimension is not None and dimension.customWidth and dimension.width >= width:
+                    continue
+                ws.column_dimensions[column_letter].width = width
+
+    def save(self):
+        """Guarda el libro; los anchos se ajustan antes con fit_columns"""
+        from excel.excel_paquete import DEFAULT_COMPRESSION_LEVEL, save_workbook
+
+        self.flush_row()
+        spilled = {}
+        for ws, sheet in self.buffered_sheets.items():
+            if sheet.runs:
+                spilled[ws] = sheet
+                continue
+            # La hoja cabe en el presupuesto: se añade al libro fila a fila
+            for row, cells in sheet.sorted_rows(release=True):
+                self.pending_ws, self.pending_row, self.pending_cells = ws, row, cells
+                self.flush_row()
+        level = DEFAULT_COMPRESSION_LEVEL if self.compression_level is None else self.compression_level
+        if spilled:
+            self.save_with_sheet_parts(spilled, level)
+        else:
+            save_workbook(self.wb, self.excel_file, level, self.compression_threads)
+
+    def save_with_sheet_parts(self, spilled, level):
+        """Guarda el libro con las hojas volcadas a disco escritas directamente como partes XML"""
+        import tempfile
+        from excel.excel_paquete import save_workbook, write_sheet_part
+        from excel.excel_paralelo import assemble_package, deflate_sheet_part
+
+        work_dir = tempfile.mkdtemp(prefix='ineoXlsx_', dir=os.path.dirname(os.path.abspath(self.excel_file)))
+        try:
+            sheet_parts = {}
+            for ws, sheet in spilled.items():
+                local_styles = {}
+
+                def style_attr(format_attr, style_id):
+                    if not format_attr or format_attr == 'General':
+                        format_attr = None
+                    if style_id not in self.styles_dict:
+                        style_id = None
+                    if format_attr is None and style_id is None:
+                        return ''
+                    index = local_styles.get((style_id, format_attr))
+                    if index is None:
+                        index = local_styles[(style_id, format_attr)] = len(local_styles)
+                    return f' s="@{index}"'
+
+                widths = {COLUMN_INDEXES[column]: auto_width(length)
+                          for column, length in self.column_lengths[ws].items()}
+                widths.update((COLUMN_INDEXES[column], width) for column, width in self.fixed_widths.items())
+                # openpyxl nombra las hojas por posición: xl/worksheets/sheet1.xml, sheet2.xml...
+                position = self.wb.worksheets.index(ws) + 1
+                path = os.path.join(work_dir, f"hoja_{position}.xml")
+                write_sheet_part(path, sheet, widths, style_attr, tab_selected=bool(ws.sheet_view.tabSelected))
+                # La hoja vacía del libro se sustituye por la parte: sirve de celda auxiliar para los estilos
+                style_indexes = [self.register_style(ws, number, format_attr, style_id)
+                                 for number, (style_id, format_attr) in enumerate(local_styles, start=1)]
+                sheet_parts[f"xl/worksheets/sheet{position}.xml"] = deflate_sheet_part(path, style_indexes, level)
+
+            base_file = os.path.join(work_dir, 'base.xlsx')
+            save_workbook(self.wb, base_file, level, self.compression_threads)
+            assemble_package(self.excel_file, base_file, sheet_parts, level)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class BufferedWriter:
+    """Base de los motores que agrupan las celdas por hoja y fila antes de escribirlas"""
+
+    def __init__(self, auto_fit=True, memory_budget=None):
+        self.styles_dict = {}
+        self.auto_fit = auto_fit
+        self.memory_budget = memory_budget
+        self.set_columns(None)
+        # Nombre de hoja -> SheetBuffer
+        self.sheets = {}
+
+    def set_styles(self, styles_dict):
+        self.styles_dict = styles_dict
+
+    def set_columns(self, column_widths):
+        """Configura los anchos de <columns> con el mismo criterio que OpenpyxlWriter"""
+        column_widths = {COLUMN_INDEXES[column]: width for column, width in (column_widths or {}).items()}
+        self.fixed_widths = {col: width for col, width in column_widths.items() if width is not None}
+        if not self.auto_fit:
+            self.measured_columns = set()
+        elif column_widths:
+            self.measured_columns = {col for col, width in column_widths.items() if width is None}
+        else:
+            self.measured_columns = None
+
+    def open_sheet(self, sheet_name):
+        """Retorna (buffer de la hoja, creada) para el nombre indicado"""
+        if sheet_name in self.sheets:
+            print(f"  Utilizando hoja existente: {sheet_name}")
+            return self.sheets[sheet_name], False
+        sheet = self.sheets[sheet_name] = SheetBuffer(sheet_name)
+        print(f"  Creando nueva hoja: {sheet_name}")
+        return sheet, True
+
+    def write_cell(self, sheet, row, column, value, format_attr, style_id):
+        col = COLUMN_INDEXES[column]
+        sheet.rows.setdefault(row, {})[col] = (value, format_attr, style_id)
+        if self.memory_budget is not None:
+            self.memory_budget.add_cell(self.sheets.values())
+        if self.measured_columns is None or col in self.measured_columns:
+            length = display_length(value)
+            if length > sheet.column_lengths.get(col, 0):
+                sheet.column_lengths[col] = length
+
+    def style_key(self, format_attr, style_id):
+        """Normaliza (estilo, formato): None para estilos no definidos y para el formato General"""
+        if style_id not in self.styles_dict:
+            style_id = None
+        if not format_attr or format_attr == 'General':
+            format_attr = None
+        return style_id, format_attr
+
+    def fit_columns(self):
+        """Sin paso propio: las longitudes se miden al escribir y los anchos se aplican al guardar cada hoja"""
+
+    def column_widths(self, sheet):
+        """Anchos finales de la hoja: automáticos según contenido y los fijos de <columns>"""
+        widths = {col: auto_width(max_length) for col, max_length in sheet.column_lengths.items()}
+        widths.update(self.fixed_widths)
+        return widths
+
+
+class XlsxWriterWriter(BufferedWriter):
+    """Escribe el libro directamente a disco con xlsxwriter en modo constant_memory.
+
+    El modo constant_memory exige escribir las filas en orden, por lo que las
+    celdas se agrupan por fila en un buffer compacto (tuplas, no objetos Cell)
+    y se vuelcan ordenadas al guardar.
+    """
+
+    name = 'xlsxwriter'
+
+    def __init__(self, excel_file, auto_fit=True, memory_budget=None):
+        import xlsxwriter
+
+        super().__init__(auto_fit, memory_budget)
+        self.excel_file = excel_file
+        self.workbook = xlsxwriter.Workbook(excel_file, {'constant_memory': True})
+        print(f"Creando nuevo archivo Excel (xlsxwriter): {excel_file}")
+        self.formats = {}
+
+    def get_format(self, format_attr, style_id):
+        """Retorna el formato de xlsxwriter equivalente al estilo y formato numérico (cacheado)"""
+        key = self.style_key(format_attr, style_id)
+        if key in self.formats:
+            return self.formats[key]
+        style_id, format_attr = key
+
+        properties = {}
+        if style_id is not None:
+            style_data = self.styles_dict[style_id]
+            properties['font_name'] = style_data.get('font', 'Arial')
+            properties['font_size'] = style_data.get('size', 10)
+            properties['bold'] = style_data.get('bold', False)
+            properties['font_color'] = '#' + style_data.get('color', '000000')
+            if 'background' in style_data:
+                properties['pattern'] = 1
+                properties['bg_color'] = '#' + style_data['background']
+            if 'alignment' in style_data:
+                properties['align'] = style_data['alignment']
+        if format_attr is not None:
+            properties['num_format'] = format_attr
+
+        cell_format = self.workbook.add_format(properties) if properties else None
+        self.formats[key] = cell_format
+        return cell_format
+
+    @staticmethod
+    def write_value(ws, row, col, value, cell_format):
+        """Escribe el valor con el método de su tipo (write() convertiría textos en URLs).
+
+        Los textos que empiezan por = son fórmulas y un texto vacío deja la celda
+        en blanco (solo con su formato, si lo tiene), igual que con openpyxl.
+        """
+        if value.__class__ is str:
+            if not value:
+                ws.write_blank(row, col, None, cell_format)
+            elif is_formula(value):
+                ws.write_formula(row, col, value, cell_format)
+            else:
+                ws.write_string(row, col, value, cell_format)
+        elif isinstance(value, bool):
+            ws.write_boolean(row, col, value, cell_format)
+        elif isinstance(value, (int, float)):
+            ws.write_number(row, col, value, cell_format)
+        else:
+            ws.write_datetime(row, col, value, cell_format)
+
+    def save(self):
+        for sheet_name, sheet in self.sheets.items():
+            ws = self.workbook.add_worksheet(sheet_name)
+            for col, width in self.column_widths(sheet).items():
+                # xlsxwriter ajusta el ancho indicado en caracteres; en píxeles se conserva exacto
+                ws.set_column_pixels(col - 1, col - 1, round(width * 7))
+
+            # Cada fila se libera del buffer en cuanto está en disco
+            for row, cells in sheet.sorted_rows(release=True):
+                for col in sorted(cells):
+                    value, format_attr, style_id = cells[col]
+                    self.write_value(ws, row - 1, col - 1, value, self.get_format(format_attr, style_id))
+        self.workbook.close()
+
+
+class SheetPartWriter(BufferedWriter):
+    """Construye solo las hojas asignadas a un proceso de trabajo (modo paralelo).
+
+    Cada hoja se asigna por su nombre a uno de num_workers procesos, de forma que
+    todos los <workbook> de una misma hoja los procesa el mismo. Al guardar, cada
+    hoja se serializa como parte XML independiente con índices de estilo locales
+    (s="@n") que el proceso principal traduce a los índices globales del libro.
+    """
+
+    name = 'partes'
+
+    def __init__(self, work_dir, worker_index, num_workers, auto_fit=True, memory_budget=None):
+        super().__init__(auto_fit, memory_budget)
+        self.work_dir = work_dir
+        self.worker_index = worker_index
+        self.num_workers = num_workers
+        # Número de <workbook> vistos y posición de la primera aparición de cada hoja propia
+        self.workbook_count = 0
+        self.sheet_order = {}
+
+    def accepts_sheet(self, sheet_name):
+        """Indica si la hoja corresponde a este proceso; se llama para cada <workbook> en orden"""
+        ordinal = self.workbook_count
+        self.workbook_count += 1
+        if zlib.crc32(sheet_name.encode('utf-8')) % self.num_workers != self.worker_index:
+            return False
+        self.sheet_order.setdefault(sheet_name, ordinal)
+        return True
+
+    def open_sheet(self, sheet_name):
+        # Sin mensajes por consola: la salida del proceso principal no debe mezclarse
+        if sheet_name in self.sheets:
+            return self.sheets[sheet_name], False
+        sheet = self.sheets[sheet_name] = SheetBuffer(sheet_name)
+        return sheet, True
+
+    def save(self):
+        """Escribe cada hoja en work_dir y retorna su descripción para el ensamblado"""
+        from excel.excel_paquete import write_sheet_part
+
+        parts = []
+        for sheet_name, sheet in self.sheets.items():
+            order = self.sheet_order[sheet_name]
+            local_styles = {}
+
+            def style_attr(format_attr, style_id):
+                key = self.style_key(format_attr, style_id)
+                if key == (None, None):
+                    return ''
+                index = local_styles.get(key)
+                if index is None:
+                    index = local_styles[key] = len(local_styles)
+                return f' s="@{index}"'
+
+            path = os.path.join(self.work_dir, f"hoja_{order}.xml")
+            cell_count = write_sheet_part(path, sheet, self.column_widths(sheet), style_attr, tab_selected=order == 0)
+            sheet.rows.clear()
+            parts.append({
+                'name': sheet_name,
+                'order': order,
+                'path': path,
+                'style_keys': list(local_styles),
+                'cells': cell_count,
+            })
+        return parts
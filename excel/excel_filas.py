@@ -0,0 +1,141 @@
+"""
+Escritura de las celdas de un <workbook> en sus dos formas de entrada.
+
+- <cell row="2" column="B" value="..." format="..." style="..." type="..."/>: una
+  celda por elemento.
+- <row r="2" start="A" style="2" format="..." type="..." sep="...">: forma compacta,
+  una fila por elemento. Los valores son posicionales desde la columna start
+  (A por defecto) y se indican con hijos <c> (con atributos s, f y t opcionales
+  para estilo, formato y tipo) o como texto separado por sep (tabulador por
+  defecto). Un <c/> o un campo vacío deja la columna sin escribir. Sin r, la
+  fila es la siguiente a la última fila compacta.
+
+Los elementos <range ref="A2:G5000" style="2" format="..." type="..."/> fijan el
+estilo, formato y tipo por defecto de las celdas del bloque (también columnas
+"B:D" o filas "2:10") que se escriban después en el mismo <workbook>. Prioridad:
+celda, fila, el último <range> que lo indique y, para el tipo, el del <workbook>.
+"""
+
+import re
+
+from excel.excel_escritores import COLUMN_INDEXES, COLUMN_LETTERS
+from excel.excel_valores import convert_value, default_format
+
+DEFAULT_SEPARATOR = '\t'
+
+# Referencia de <range>: celda o bloque (A2, A2:G5000), columnas (B:D) o filas (2:10)
+_RANGE_REF = re.compile(r'\$?([A-Za-z]{1,3})?\$?([0-9]+)?(?::\$?([A-Za-z]{1,3})?\$?([0-9]+)?)?')
+
+
+def range_boundaries(ref):
+    """(col mín, fila mín, col máx, fila máx) de una referencia; None = sin límite.
+
+    Mismo resultado que openpyxl.utils.cell.range_boundaries, sin importar openpyxl
+    (el motor xlsxwriter no lo carga).
+    """
+    match = _RANGE_REF.fullmatch(ref or '')
+    if match is None or not any(match.groups()):
+        raise ValueError(f"{ref} is not a valid coordinate or range")
+    min_col, min_row, max_col, max_row = match.groups()
+    if ':' not in ref:
+        max_col, max_row = min_col, min_row
+    if (min_col is None) != (max_col is None) or (min_row is None) != (max_row is None):
+        raise ValueError(f"{ref} is not a valid coordinate or range")
+    return (COLUMN_INDEXES[min_col.upper()] if min_col else None, int(min_row) if min_row else None,
+            COLUMN_INDEXES[max_col.upper()] if max_col else None, int(max_row) if max_row else None)
+
+
+class CellDefaults:
+    """Estilo, formato y tipo por defecto de las celdas de un <workbook> según sus <range>"""
+
+    __slots__ = ('value_type', 'ranges', 'last_row')
+
+    def __init__(self, value_type='string'):
+        self.value_type = value_type
+        # (col mín, fila mín, col máx, fila máx, estilo, formato, tipo); None = sin límite
+        self.ranges = []
+        # Última fila escrita en forma compacta (para <row> sin r)
+        self.last_row = 0
+
+    def add_range(self, range_elem):
+        min_col, min_row, max_col, max_row = range_boundaries(range_elem.get('ref'))
+        self.ranges.append((min_col, min_row, max_col, max_row,
+                            range_elem.get('style'), range_elem.get('format'), range_elem.get('type')))
+
+    def resolve(self, row, col, style_id, format_attr, value_type):
+        """Completa los atributos no indicados (None) con los de los <range> que contienen la celda"""
+        if self.ranges and (style_id is None or format_attr is None or value_type is None):
+            for min_col, min_row, max_col, max_row, range_style, range_format, range_type in reversed(self.ranges):
+                if ((min_col is not None and col < min_col) or (max_col is not None and col > max_col)
+                        or (min_row is not None and row < min_row) or (max_row is not None and row > max_row)):
+                    continue
+                if style_id is None:
+                    style_id = range_style
+                if format_attr is None:
+                    format_attr = range_format
+                if value_type is None:
+                    value_type = range_type
+                if style_id is not None and format_attr is not None and value_type is not None:
+                    break
+        return style_id, format_attr, value_type or self.value_type
+
+
+def write_value(writer, ws, row, column, value, format_attr, style_id, value_type):
+    """Convierte el texto al tipo indicado y lo escribe con el motor de salida"""
+    if format_attr is None:
+        format_attr = 'General'
+    if value_type != 'string':
+        value = convert_value(value, value_type)
+        if format_attr == 'General' and value.__class__ is not str:
+            format_attr = default_format(value) or format_attr
+    writer.write_cell(ws, row, column, value, format_attr, style_id)
+
+
+def write_cell(writer, ws, cell_elem, defaults):
+    """Escribe un elemento <cell> en la hoja mediante el motor de salida.
+
+    El valor se convierte al tipo indicado en la celda o, si no lo indica, al
+    de los <range> que la contienen o al tipo por defecto de su <workbook>; las
+    celdas de texto no se convierten.
+    """
+    row = int(cell_elem.get('row'))
+    column = cell_elem.get('column')
+    style_id = cell_elem.get('style')
+    format_attr = cell_elem.get('format')
+    value_type = cell_elem.get('type')
+    if defaults.ranges:
+        style_id, format_attr, value_type = defaults.resolve(
+            row, COLUMN_INDEXES[column], style_id, format_attr, value_type)
+    write_value(writer, ws, row, column, cell_elem.get('value', ''), format_attr, style_id,
+                value_type or defaults.value_type)
+
+
+def write_row(writer, ws, row_elem, defaults):
+    """Escribe un elemento <row> (forma compacta) y retorna el número de celdas escritas"""
+    r = row_elem.get('r')
+    row = int(r) if r is not None else defaults.last_row + 1
+    defaults.last_row = row
+    start = row_elem.get('start')
+    col = COLUMN_INDEXES[start] if start else 1
+    row_style = row_elem.get('style')
+    row_format = row_elem.get('format')
+    row_type = row_elem.get('type')
+
+    if len(row_elem):
+        cells = [(c.text, c.get('s', row_style), c.get('f', row_format), c.get('t', row_type)) for c in row_elem]
+    elif row_elem.text:
+        cells = [(value, row_style, row_format, row_type)
+                 for value in row_elem.text.split(row_elem.get('sep', DEFAULT_SEPARATOR))]
+    else:
+        return 0
+
+    count = 0
+    for value, style_id, format_attr, value_type in cells:
+        if value:
+            if defaults.ranges:
+                style_id, format_attr, value_type = defaults.resolve(row, col, style_id, format_attr, value_type)
+            write_value(writer, ws, row, COLUMN_LETTERS[col], value, format_attr, style_id,
+                        value_type or defaults.value_type)
+            count += 1
+        col += 1
+    return count
@@ -1,21 +1,268 @@
+import json
+import os
+import shutil
+import time
+import xml.etree.ElementTree as ET
 
-def xml_to_excel(config_file, output_file=None):
-    """Convierte el XML a Excel usando configuración del archivo"""
+from excel.excel_tarea import (
+    parse_xml,
+    iterparse_xml,
+    parse_styles,
+    parse_columns,
+    parse_options,
+    option_enabled,
+    option_workers,
+    setup_logging,
+    close_logging,
+    validate_and_get_data_source,
+    extract_uri_content,
+)
+from excel.excel_cache import CACHE_COUNTERS, open_cache
+from excel.excel_desbordamiento import open_memory_budget
+from excel.excel_metricas import TaskMetrics, measure
+from excel.excel_transporte import (
+    UPLOAD_COUNTERS,
+    UPLOAD_METHODS,
+    Base64Source,
+    UploadError,
+    open_data,
+    parser_input,
+    upload_file,
+)
+from excel.excel_valores import VALUE_TYPES
+
+# Modos de actualización de un archivo existente: libro completo o por partes del zip
+UPDATE_MODES = ('full', 'parts')
+
+# Nivel de compresión del xlsx: 0 = sin comprimir ... 9 = máxima (6 = por defecto de zlib).
+# Mismo valor que excel_paquete.DEFAULT_COMPRESSION_LEVEL, que no se importa aquí para no cargar openpyxl
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Elementos que marcan el final de la cabecera de configuración
+DATA_TAGS = ('workbooks', 'styles', 'columns', 'workbook')
+
+
+def read_config_header(config_file):
+    """Lee la cabecera (data, responseOut, log, options) sin cargar estilos ni celdas"""
+    root = None
+    with open(config_file, 'rb') as config_handle:
+        for event, elem in ET.iterparse(config_handle, events=('start',)):
+            if root is None:
+                root = elem
+            elif elem.tag in DATA_TAGS:
+                break
+    return root
+
+
+def create_writer(engine, excel_file, logger, auto_fit=True, update_mode='full',
+                  compression_level=DEFAULT_COMPRESSION_LEVEL, compression_threads=1, memory_budget=None):
+    """Crea el motor de salida solicitado.
+
+    xlsxwriter solo es posible para archivos nuevos. Un archivo existente se
+    actualiza con openpyxl (update_mode 'full') o por partes del zip ('parts').
+    compression_level y compression_threads se aplican al guardar (salvo con
+    xlsxwriter, que usa siempre su compresión por defecto). memory_budget
+    (MemoryBudget o None) acota las celdas en memoria de los buffers de hoja.
+    """
+    # Importación diferida: openpyxl solo se carga si hay que convertir (no en un acierto de caché)
+    from excel.excel_escritores import ENGINES, OpenpyxlWriter, XlsxWriterWriter
+    if engine not in ENGINES:
+        logger.warning(f"Motor de salida '{engine}' no reconocido, usando openpyxl")
+        engine = 'openpyxl'
+    if update_mode not in UPDATE_MODES:
+        logger.warning(f"Modo de actualización '{update_mode}' no reconocido, usando full")
+        update_mode = 'full'
+    exists = os.path.isfile(excel_file)
+    if engine == 'xlsxwriter' and exists:
+        logger.info("El motor xlsxwriter solo crea archivos nuevos; el archivo existe, usando openpyxl")
+        engine = 'openpyxl'
+    if not auto_fit:
+        logger.info("Ajuste automático de columnas desactivado")
+    if exists and update_mode == 'parts':
+        logger.info("Motor de salida: actualización por partes del archivo existente")
+        # Importación diferida: solo se usa al actualizar archivos existentes
+        from excel.excel_actualizacion import PackageUpdateWriter
+        return PackageUpdateWriter(excel_file, auto_fit, compression_level, compression_threads, memory_budget)
+    logger.info(f"Motor de salida: {engine}")
+    if engine == 'xlsxwriter':
+        if compression_level != DEFAULT_COMPRESSION_LEVEL:
+            logger.info("El motor xlsxwriter no permite elegir el nivel de compresión: se usa el nivel por defecto")
+        return XlsxWriterWriter(excel_file, auto_fit, memory_budget)
+    return OpenpyxlWriter(excel_file, auto_fit, compression_level, compression_threads, memory_budget)
+
+
+def write_workbooks_from_tree(data_root, writer, logger, value_type='string', metrics=None):
+    """Procesa estilos y celdas a partir del árbol XML completo en memoria.
+
+    value_type es el tipo de valor de las celdas de los <workbook> sin atributo type.
+    Con metrics se miden la fase styles y la escritura de cada hoja.
+    """
+    from excel.excel_filas import CellDefaults, write_cell, write_row
+    # Buscar estilos, columnas y workbooks en el archivo de datos
+    styles_element = data_root.find('styles')
+    columns_element = data_root.find('columns')
+    workbooks_element = data_root.find('workbooks')
+    if workbooks_element is not None:
+        # Si no hay estilos o columnas en datos, buscar en workbooks
+        if styles_element is None:
+            styles_element = workbooks_element.find('styles')
+        if columns_element is None:
+            columns_element = workbooks_element.find('columns')
+
+    with measure(metrics, 'styles'):
+        writer.set_styles(parse_styles(styles_element) if styles_element is not None else {})
+        if columns_element is not None:
+            writer.set_columns(parse_columns(columns_element))
+
+    # Buscar workbooks en el lugar correcto
+    workbook_elements = data_root.findall('workbook')
+    if not workbook_elements:
+        # Si no hay workbooks directos, buscar en sección workbooks
+        workbooks_element = data_root.find('workbooks')
+        if workbooks_element is not None:
+            workbook_elements = workbooks_element.findall('workbook')
+
+    for workbook_elem in workbook_elements:
+        sheet_name = workbook_elem.get('name', 'Hoja1')
+
+        # Verificar si la hoja ya existe (en archivo cargado o ya procesada)
+        ws, created = writer.open_sheet(sheet_name)
+        if created:
+            logger.info(f"Workbook '{sheet_name}': Hoja creada, procesando celdas")
+        else:
+            logger.info(f"Workbook '{sheet_name}': Utilizando hoja existente, procesando celdas")
+
+        start_time = time.perf_counter()
+        defaults = CellDefaults(workbook_elem.get('type', value_type))
+        cell_count = 0
+        for child in workbook_elem:
+            tag = child.tag
+            if tag == 'cell':
+                write_cell(writer, ws, child, defaults)
+                cell_count += 1
+            elif tag == 'row':
+                cell_count += write_row(writer, ws, child, defaults)
+            elif tag == 'range':
+                defaults.add_range(child)
+        logger.info(f"Workbook '{sheet_name}': {cell_count} celdas procesadas")
+        if metrics is not None:
+            metrics.sheet_done(sheet_name, cell_count, time.perf_counter() - start_time)
+
+
+def write_workbooks_streaming(xml_file, writer, logger, validate=True, sheet_filter=None, value_type='string',
+                              metrics=None):
+    """Procesa estilos y celdas elemento a elemento con iterparse, liberando cada uno tras usarlo.
+
+    xml_file es una ruta o un Base64Source. Con validate se valida contra el XSD
+    durante la misma lectura. value_type es el tipo de valor de las celdas de
+    los <workbook> sin atributo type. sheet_filter, si se indica, recibe el
+    nombre de cada <workbook> y decide si sus celdas se escriben (modo paralelo:
+    cada proceso escribe solo sus hojas). Con metrics se miden la fase styles y
+    cada hoja (incluida su lectura y validación).
+    """
+    from excel.excel_filas import CellDefaults, write_cell, write_row
+    ws = None
+    sheet_name = None
+    defaults = None
+    cell_count = 0
+    sheet_start = 0.0
+    # Pila de elementos abiertos: permite desligar cada elemento de su padre al terminar
+    open_elements = []
+    # Profundidad dentro de <styles>/<columns>, cuyos hijos se conservan hasta cerrar la sección
+    section_depth = 0
+
+    with open_data(xml_file) as xml_handle:
+        for event, elem in iterparse_xml(xml_handle, validate=validate):
+            if event == 'start':
+                open_elements.append(elem)
+                if elem.tag in ('styles', 'columns'):
+                    section_depth += 1
+                elif elem.tag == 'workbook':
+                    sheet_name = elem.get('name', 'Hoja1')
+                    if sheet_filter is not None and not sheet_filter(sheet_name):
+                        continue
+                    sheet_start = time.perf_counter()
+                    ws, created = writer.open_sheet(sheet_name)
+                    defaults = CellDefaults(elem.get('type', value_type))
+                    cell_count = 0
+                    if created:
+                        logger.info(f"Workbook '{sheet_name}': Hoja creada, procesando celdas en streaming")
+                    else:
+                        logger.info(f"Workbook '{sheet_name}': Utilizando hoja existente, procesando celdas en streaming")
+                continue
+
+            open_elements.pop()
+            tag = elem.tag
+            if tag == 'cell':
+                if ws is not None:
+                    write_cell(writer, ws, elem, defaults)
+                    cell_count += 1
+            elif tag == 'c':
+                # Los <c> se procesan al cerrar su <row>
+                continue
+            elif tag == 'row':
+                if ws is not None:
+                    cell_count += write_row(writer, ws, elem, defaults)
+            elif tag == 'range':
+                if ws is not None:
+                    defaults.add_range(elem)
+            elif tag == 'styles':
+                with measure(metrics, 'styles'):
+                    writer.set_styles(parse_styles(elem))
+                section_depth -= 1
+            elif tag == 'columns':
+                with measure(metrics, 'styles'):
+                    writer.set_columns(parse_columns(elem))
+                section_depth -= 1
+            elif tag == 'workbook':
+                if ws is not None:
+                    logger.info(f"Workbook '{sheet_name}': {cell_count} celdas procesadas")
+                    if metrics is not None:
+                        metrics.sheet_done(sheet_name, cell_count, time.perf_counter() - sheet_start)
+                ws = None
+            elif section_depth:
+                continue
+
+            # Liberar el elemento ya procesado para mantener la memoria constante.
+            # Se desligan solo los hermanos anteriores: el parser aún puede añadir
+            # texto (tail) al último elemento cerrado
+            elem.clear()
+            if open_elements:
+                del open_elements[-1][:-1]
+
+
+def xml_to_excel(config_file, output_file=None, cli_options=None, response=None):
+    """Convierte el XML a Excel usando configuración del archivo.
+
+    cli_options contiene las opciones indicadas en línea de comandos, que tienen
+    prioridad sobre las de la sección <options>. Si se indica el diccionario
+    response, se completa con los datos de la tarea (task_id, dataOut, status y
+    métricas por fase); la respuesta se escribe también en <responseOut> si existe.
+    """
     logger = None
-    
+    response_out = None
+    upload_url = None
+    excel_file = None
+    memory_budget = None
+    metrics = TaskMetrics()
+    # Motivos de los errores detectados por las funciones auxiliares (se copian a response['error'])
+    errors = []
+    if response is None:
+        response = {}
+
     try:
-        # Validar XML contra XSD antes de procesarlo
-        if not validate_xml_against_xsd(config_file):
-            return False
-        
-        tree = ET.parse(config_file)
-        root = tree.getroot()
-        
+        # Solo se lee la cabecera: la validación y los datos se procesan después
+        # con una única lectura de cada documento
+        root = read_config_header(config_file)
+        response['task_id'] = root.get('task_id')
+        response['task'] = root.get('task')
+        response_out = root.findtext('responseOut')
+
         # Configurar logging primero
         log_element = root.find('log')
         logger = setup_logging(log_element)
         logger.info("Iniciando conversión XML a Excel")
-        
+
         # Log de la configuración de logging
         if log_element is not None:
             log_config = {}
@@ -24,149 +271,181 @@ def xml_to_excel(config_file, output_file=None):
             logger.info(f"Configuración de logging aplicada: {log_config}")
         else:
             logger.info("No se especificó configuración de logging, usando configuración por defecto")
-        
+
+        options = parse_options(root.find('options'))
+        if cli_options:
+            options.update(cli_options)
+        streaming = option_enabled(options, 'streaming')
+        validate = option_enabled(options, 'validate', default=True)
+        if not validate:
+            logger.info("Validación XSD desactivada: entrada de confianza")
+
         # Extraer configuración de datos
         data_element = root.find('data')
         if data_element is not None:
             data_in_element = data_element.find('dataIn')
             data_out_element = data_element.find('dataOut')
-            
+
             if data_in_element is not None:
-                logger.info(f"dataIn especificado: {data_in_element.text}")
-                xml_file = validate_and_get_data_source(data_in_element.text, logger, is_data_in=True)
+                data_in = data_in_element.text or ''
+                # Un dataIn BASE64 puede ocupar megas: solo se registra el principio
+                logger.info(f"dataIn especificado: {data_in if len(data_in) <= 200 else data_in[:60] + '...'}")
+                xml_file = validate_and_get_data_source(data_in, logger, is_data_in=True, errors=errors)
                 if xml_file is None:
+                    response['error'] = f"dataIn no válido: {'; '.join(errors)}"
                     return False
                 logger.info(f"Archivo XML de datos procesado: {xml_file}")
             else:
                 # Si no hay dataIn, usar el archivo de configuración como datos
                 xml_file = config_file
                 logger.info("No se especificó dataIn, usando archivo de configuración como datos")
-                
+
             if data_out_element is not None:
-                excel_file = validate_and_get_data_source(data_out_element.text, logger, is_data_in=False)
+                out_type, out_target = extract_uri_content(data_out_element.text)
+                excel_file = validate_and_get_data_source(data_out_element.text, logger, is_data_in=False,
+                                                          errors=errors)
                 if excel_file is None:
+                    response['error'] = f"dataOut no válido: {'; '.join(errors)}"
                     return False
+                if out_type == 'url':
+                    upload_url = out_target
                 logger.info(f"Archivo Excel de salida: {excel_file}")
             elif output_file:
                 excel_file = output_file
                 logger.info(f"Usando archivo de salida del parámetro: {excel_file}")
             else:
-                logger.error("No se encontró dataOut en la configuración ni se especificó archivo de salida")
+                error_msg = "No se encontró dataOut en la configuración ni se especificó archivo de salida"
+                response['error'] = error_msg
+                logger.error(error_msg)
                 return False
         else:
             # Fallback: usar el archivo de configuración como XML de datos
             xml_file = config_file
             excel_file = output_file if output_file else "salida.xlsx"
-            if logger:
-                logger.warning("No se encontró sección <data>, usando modo compatibilidad")
-            else:
-                print("Advertencia: No se encontró sección <data>, usando modo compatibilidad")
-        
-        # Si xml_file es diferente al config_file, cargar el archivo de datos
-        if xml_file != config_file:
-            if not os.path.exists(xml_file):
-                print(f"Error: El archivo de datos {xml_file} no existe")
+            logger.warning("No se encontró sección <data>, usando modo compatibilidad")
+
+        response['dataOut'] = upload_url or excel_file
+
+        if not isinstance(xml_file, Base64Source) and not os.path.exists(xml_file):
+            error_msg = f"El archivo de datos {xml_file} no existe"
+            response['error'] = error_msg
+            logger.error(error_msg)
+            return False
+
+        # La configuración se valida aparte solo si no es también el XML de datos
+        if validate and xml_file != config_file:
+            if parse_xml(config_file, metrics=metrics, errors=errors) is None:
+                response['error'] = f"La configuración no es válida según el esquema XSD: {'; '.join(errors)}"
                 return False
-            data_tree = ET.parse(xml_file)
-            data_root = data_tree.getroot()
-        else:
-            data_root = root
-        
-        # Buscar estilos y workbooks en el archivo de datos
-        styles_element = data_root.find('styles')
-        if styles_element is None:
-            # Si no hay estilos en datos, buscar en workbooks
-            workbooks_element = data_root.find('workbooks')
-            if workbooks_element is not None:
-                styles_element = workbooks_element.find('styles')
-        
-        styles_dict = parse_styles(styles_element) if styles_element is not None else {}
-        # Verificar si el archivo Excel ya existe
-        if os.path.isfile(excel_file):
-            wb = load_workbook(excel_file)
-            print(f"Cargando archivo Excel existente: {excel_file}")
+
+        engine = options.get('engine', 'openpyxl')
+        update_mode = options.get('updateMode', 'full')
+        auto_fit = option_enabled(options, 'autoFit', default=True)
+        value_type = options.get('valueType', 'string')
+        if value_type not in VALUE_TYPES:
+            logger.warning(f"Tipo de valor '{value_type}' no reconocido, usando string")
+            value_type = 'string'
+        elif value_type != 'string':
+            logger.info(f"Tipo de valor por defecto de las celdas: {value_type}")
+        compression_level = options.get('compressionLevel', str(DEFAULT_COMPRESSION_LEVEL)).strip()
+        if compression_level not in [str(level) for level in range(10)]:
+            logger.warning(f"Nivel de compresión '{compression_level}' no válido (0-9), usando {DEFAULT_COMPRESSION_LEVEL}")
+            compression_level = DEFAULT_COMPRESSION_LEVEL
+        compression_level = int(compression_level)
+        # Hilos para comprimir las hojas grandes; por defecto, uno por núcleo
+        compression_threads = option_workers(options, 'compressionThreads', default='auto')
+        response['compression'] = {'level': compression_level, 'threads': compression_threads}
+        upload_method = options.get('uploadMethod', 'POST').upper()
+        if upload_method not in UPLOAD_METHODS:
+            logger.warning(f"Método de envío '{upload_method}' no reconocido, usando POST")
+            upload_method = 'POST'
+        cache = open_cache(options, logger)
+        if cache is not None:
+            with metrics.phase('cache'):
+                cache_key = cache.task_key(xml_file, options, excel_file)
+                hit = cache.fetch(cache_key, excel_file)
+            response['cache'] = dict(CACHE_COUNTERS, hit=hit)
+            if hit:
+                logger.info(f"Resultado obtenido de la caché ({cache_key[:12]}): {excel_file}")
+                response['output_bytes'] = os.path.getsize(excel_file)
+                if upload_url:
+                    send_output(excel_file, upload_url, upload_method, metrics, response, logger)
+                response['status'] = 'ok'
+                return True
+
+        memory_budget = open_memory_budget(options, excel_file, logger)
+        if memory_budget is not None:
+            logger.info(f"Presupuesto de memoria: {memory_budget.budget_mb:g} MB de celdas en buffer")
+            if 'streaming' not in options:
+                # El árbol XML completo no cabría en el presupuesto: se lee en streaming
+                streaming = True
+            elif not streaming:
+                logger.info("Sin streaming el árbol XML de datos se carga completo y no cuenta en el presupuesto")
+
+        workers = option_workers(options)
+        if workers > 1 and os.path.isfile(excel_file):
+            logger.info("El modo paralelo solo crea archivos nuevos; el archivo existe, procesando en secuencia")
+            workers = 1
+        elif workers > 1 and isinstance(xml_file, Base64Source):
+            # Cada proceso del pool lee el XML desde disco
+            logger.info("El modo paralelo requiere un dataIn en archivo; dataIn BASE64, procesando en secuencia")
+            workers = 1
+
+        if workers > 1:
+            # Importación diferida: el pool de procesos solo se usa en este modo
+            from excel.excel_paralelo import write_workbook_parallel
+            write_workbook_parallel(xml_file, excel_file, logger, workers, validate, auto_fit, value_type,
+                                    metrics, compression_level, memory_budget)
+        elif streaming:
+            logger.info("Modo streaming activado: procesando el XML de datos con iterparse")
+            writer = create_writer(engine, excel_file, logger, auto_fit, update_mode, compression_level,
+                                   compression_threads, memory_budget)
+            write_workbooks_streaming(xml_file, writer, logger, validate, value_type=value_type, metrics=metrics)
         else:
-            wb = Workbook()
-            wb.remove(wb.active)
-            print(f"Creando nuevo archivo Excel: {excel_file}")
-        
-        created_sheets = {}  # Diccionario para rastrear hojas creadas
-        
-        # Si se cargó un archivo existente, indexar las hojas ya presentes
-        for existing_sheet in wb.worksheets:
-            created_sheets[existing_sheet.title] = existing_sheet
-        
-        # Buscar workbooks en el lugar correcto
-        workbook_elements = data_root.findall('workbook')
-        if not workbook_elements:
-            # Si no hay workbooks directos, buscar en sección workbooks
-            workbooks_element = data_root.find('workbooks')
-            if workbooks_element is not None:
-                workbook_elements = workbooks_element.findall('workbook')
-        
-        for workbook_elem in workbook_elements:
-            sheet_name = workbook_elem.get('name', 'Hoja1')
-            
-            # Contar las celdas en este workbook
-            cell_elements = workbook_elem.findall('cell')
-            cell_count = len(cell_elements)
-            
-            # Verificar si la hoja ya existe (en archivo cargado o ya procesada)
-            if sheet_name in created_sheets:
-                ws = created_sheets[sheet_name]
-                print(f"  Utilizando hoja existente: {sheet_name}")
-                if logger:
-                    logger.info(f"Workbook '{sheet_name}': Utilizando hoja existente, procesando {cell_count} celdas")
-            else:
-                ws = wb.create_sheet(title=sheet_name)
-                created_sheets[sheet_name] = ws
-                print(f"  Creando nueva hoja: {sheet_name}")
-                if logger:
-                    logger.info(f"Workbook '{sheet_name}': Hoja creada, procesando {cell_count} celdas")
-            
-            for cell_elem in cell_elements:
-                row = int(cell_elem.get('row'))
-                column = cell_elem.get('column')
-                value = cell_elem.get('value', '')
-                format_attr = cell_elem.get('format', 'General')
-                style_id = cell_elem.get('style')
-                ws[f"{column}{row}"] = value
-                cell = ws[f"{column}{row}"]
-                
-                # Aplicar formato de número si está especificado
-                if format_attr and format_attr != 'General':
-                    cell.number_format = format_attr
-                
-                # Aplicar estilos si están especificados
-                if style_id and style_id in styles_dict:
-                    style_data = styles_dict[style_id]
-                    font, fill, alignment = create_openpyxl_style(style_data)
-                    cell.font = font
-                    if fill:
-                        cell.fill = fill
-                    if alignment:
-                        cell.alignment = alignment
-        for sheet in wb.worksheets:
-            for column in sheet.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                sheet.column_dimensions[column_letter].width = adjusted_width
-        wb.save(excel_file)
+            # Un único parseo sirve para validar y para convertir
+            with parser_input(xml_file) as data_input:
+                data_root = parse_xml(data_input, validate, metrics=metrics, errors=errors)
+            if data_root is None:
+                response['error'] = f"El XML de datos no es válido según el esquema XSD: {'; '.join(errors)}"
+                return False
+            writer = create_writer(engine, excel_file, logger, auto_fit, update_mode, compression_level,
+                                   compression_threads, memory_budget)
+            write_workbooks_from_tree(data_root, writer, logger, value_type, metrics)
+            del data_root
+
+        if workers == 1:
+            with metrics.phase('autofit'):
+                writer.fit_columns()
+            with metrics.phase('save'):
+                writer.save()
+        if cache is not None:
+            try:
+                with metrics.phase('cache'):
+                    cache.store(cache_key, excel_file)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar el resultado en la caché: {e}")
+        response['output_bytes'] = os.path.getsize(excel_file)
+        if memory_budget is not None and memory_budget.spills:
+            logger.info(f"Volcados a disco por el presupuesto de memoria: {memory_budget.spills} "
+                        f"({memory_budget.spilled_cells:,} celdas)")
+        if upload_url:
+            send_output(excel_file, upload_url, upload_method, metrics, response, logger)
         if logger:
             logger.info(f"Archivo Excel creado exitosamente: {excel_file}")
         else:
             print(f"Archivo Excel creado exitosamente: {excel_file}")
+        response['status'] = 'ok'
         return True
-        
-    except ET.ParseError as e:
+
+    except UploadError as e:
+        error_msg = f"Error enviando el Excel: {e}"
+        response['error'] = error_msg
+        logger.error(error_msg)
+        return False
+    except SyntaxError as e:
+        # ET.ParseError y lxml XMLSyntaxError (incluida la validación en streaming)
         error_msg = f"Error parsing XML: {e}"
+        response['error'] = error_msg
         if logger:
             logger.error(error_msg)
         else:
@@ -174,8 +453,59 @@ def xml_to_excel(config_file, output_file=None):
         return False
     except Exception as e:
         error_msg = f"Error creando Excel: {e}"
+        response['error'] = error_msg
         if logger:
             logger.error(error_msg)
         else:
             print(error_msg)
-        return False
\ No newline at end of file
+        return False
+    finally:
+        if memory_budget is not None:
+            response['memory'] = memory_budget.to_response()
+            # Los tramos en disco ya no se necesitan (o la tarea ha fallado)
+            memory_budget.close()
+        response.setdefault('status', 'error')
+        metrics.to_response(response)
+        if logger:
+            logger.info(f"Métricas: {response['cells']} celdas en {response['elapsed']:.2f} s "
+                        f"({response['cells_per_sec']} celdas/s), pico de memoria {response['peak_rss_mb']} MB")
+        if response_out:
+            write_response_out(response_out, response, logger)
+        if upload_url:
+            # El archivo de trabajo ya se ha enviado (o la tarea ha fallado)
+            shutil.rmtree(os.path.dirname(excel_file), ignore_errors=True)
+        close_logging(logger)
+
+
+def send_output(excel_file, url, method, metrics, response, logger):
+    """Envía el xlsx generado a la URL de dataOut y añade el resultado a la respuesta"""
+    size = os.path.getsize(excel_file)
+    with metrics.phase('upload'):
+        status = upload_file(excel_file, url, method)
+    response['upload'] = dict(UPLOAD_COUNTERS, status=status, bytes=size)
+    logger.info(f"Archivo Excel enviado a {url} ({method}, HTTP {status}, {size:,} bytes)")
+
+
+def write_response_out(uri_string, response, logger=None):
+    """Escribe la respuesta de la tarea en formato JSON en el destino de <responseOut>"""
+    uri_type, path = extract_uri_content(uri_string.strip())
+    if uri_type != 'file':
+        message = f"Tipo de destino '{uri_type}' no soportado para responseOut"
+        if logger:
+            logger.warning(message)
+        else:
+            print(message)
+        return
+    try:
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as response_file:
+            json.dump(response, response_file, ensure_ascii=False, indent=2)
+            response_file.write('\n')
+    except OSError as e:
+        message = f"No se pudo escribir la respuesta en {path}: {e}"
+        if logger:
+            logger.warning(message)
+        else:
+            print(message)
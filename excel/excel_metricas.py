@@ -0,0 +1,179 @@
+"""
+Métricas de una tarea para la respuesta (<responseOut> y respuestas del modo lote).
+
+Por fase se mide el tiempo y el pico de memoria (RSS) del proceso al terminar la fase:
+
+- validation: validación XSD (incluye la compilación del esquema).
+- parse: lectura del XML de datos.
+- styles: lectura de <styles>/<columns> y configuración del motor.
+- cells: escritura de las celdas; se desglosa por hoja con su número de celdas.
+- autofit: ajuste de los anchos de columna.
+- save: generación del archivo xlsx.
+
+En modo streaming la lectura y la validación se hacen a la vez que la escritura,
+por lo que su tiempo va incluido en el de cada hoja. En modo paralelo cada hoja
+se mide en su proceso de trabajo y las fases del proceso principal son tiempos
+de reloj de cada etapa.
+
+El pico de memoria es el de la tarea: en Linux se reinicia al empezarla
+(/proc/self/clear_refs), de modo que en modo lote o servicio una tarea no
+hereda el pico de las anteriores. Donde no se puede reiniciar es el pico del
+proceso desde que arrancó; la respuesta lo indica en peak_rss_scope
+('task' o 'process').
+"""
+
+import contextlib
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss():
+    """Reinicia el pico de memoria residente del proceso a la memoria actual; retorna si se ha podido"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _linux_peak_rss_mb():
+    """Pico de memoria residente desde el último reinicio (VmHWM) o None fuera de Linux"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede obtener).
+
+    En Linux es el pico desde el último reset_peak_rss(); en el resto de sistemas,
+    el del proceso desde que arrancó.
+    """
+    peak = _linux_peak_rss_mb()
+    if peak is not None:
+        return peak
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo indica en KB y macOS en bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+    except (AttributeError, OSError):
+        return None
+
+
+def measure(metrics, name):
+    """Contexto que mide la fase si se reciben métricas (las funciones pueden usarse sin ellas)"""
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.phase(name)
+
+
+class TaskMetrics:
+    """Tiempos, pico de memoria y celdas de las fases y hojas de una tarea"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        # Alcance del pico de memoria medido: la tarea si se ha podido reiniciar o todo el proceso
+        self.peak_scope = 'task' if reset_peak_rss() else 'process'
+        # Fase -> {'elapsed', 'peak_rss_mb'}, en orden de primera aparición
+        self.phases = {}
+        # Nombre de hoja -> {'name', 'cells', 'elapsed', 'peak_rss_mb'}
+        self.sheets = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, elapsed):
+        """Acumula el tiempo de la fase (una fase puede repetirse, p. ej. validar configuración y datos)"""
+        phase = self.phases.setdefault(name, {'elapsed': 0.0, 'peak_rss_mb': None})
+        phase['elapsed'] += elapsed
+        phase['peak_rss_mb'] = peak_rss_mb()
+
+    def sheet_done(self, name, cells, elapsed):
+        """Registra un <workbook> escrito; su tiempo cuenta en la fase cells"""
+        self.add_phase('cells', elapsed)
+        self.add_sheet({'name': name, 'cells': cells, 'elapsed': elapsed,
+                        'peak_rss_mb': self.phases['cells']['peak_rss_mb']})
+
+    def add_sheet(self, sheet):
+        """Añade las métricas de una hoja (también las medidas en otro proceso); un nombre repetido se acumula"""
+        current = self.sheets.get(sheet['name'])
+        if current is None:
+            self.sheets[sheet['name']] = dict(sheet)
+            return
+        current['cells'] += sheet['cells']
+        current['elapsed'] += sheet['elapsed']
+        current['peak_rss_mb'] = _max_peak(current['peak_rss_mb'], sheet['peak_rss_mb'])
+
+    def to_response(self, response):
+        """Completa la respuesta de la tarea con las métricas"""
+        elapsed = time.perf_counter() - self.start_time
+        cells = sum(sheet['cells'] for sheet in self.sheets.values())
+        peak = peak_rss_mb()
+        for item in list(self.phases.values()) + list(self.sheets.values()):
+            peak = _max_peak(peak, item['peak_rss_mb'])
+
+        response['elapsed'] = round(elapsed, 4)
+        response['cells'] = cells
+        response['cells_per_sec'] = round(cells / elapsed) if elapsed > 0 else 0
+        response['peak_rss_mb'] = _round_mb(peak)
+        response['peak_rss_scope'] = self.peak_scope
+        response['phases'] = {
+            name: {'elapsed': round(phase['elapsed'], 4), 'peak_rss_mb': _round_mb(phase['peak_rss_mb'])}
+            for name, phase in self.phases.items()
+        }
+        response['sheets'] = [
+            {
+                'name': sheet['name'],
+                'cells': sheet['cells'],
+                'elapsed': round(sheet['elapsed'], 4),
+                'cells_per_sec': round(sheet['cells'] / sheet['elapsed']) if sheet['elapsed'] > 0 else 0,
+                'peak_rss_mb': _round_mb(sheet['peak_rss_mb']),
+            }
+            for sheet in self.sheets.values()
+        ]
+
+
+def _max_peak(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def _round_mb(value):
+    return None if value is None else round(value, 1)
@@ -0,0 +1,315 @@
+"""
+Utilidades de bajo nivel sobre el paquete xlsx (zip con partes XML).
+
+- write_sheet_part: serializa una hoja (SheetBuffer) como parte XML de hoja de
+  cálculo, con cadenas en línea, fórmulas o valores nativos y referencias de
+  estilo indicadas por el llamador.
+- deflate_file / read_raw_chunks / write_raw_entry: permiten ensamblar un xlsx
+  copiando entradas ya comprimidas sin descomprimirlas ni recomprimirlas.
+- save_workbook: guarda un libro de openpyxl con el nivel de compresión elegido,
+  comprimiendo las partes grandes por bloques en varios hilos.
+
+Niveles de compresión: 0 guarda las partes sin comprimir (STORED), 1 es el más
+rápido y 9 el de máxima compresión (deflate). 6 es el nivel por defecto de zlib.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+from excel.excel_valores import is_formula
+
+# Fecha fija de las entradas generadas: el contenido del zip no depende del momento de ejecución
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Tamaño de bloque para leer, comprimir y copiar partes
+CHUNK_SIZE = 1 << 20
+
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Las partes menores se comprimen en un solo bloque: repartirlas no compensa
+PARALLEL_DEFLATE_MIN_BYTES = 4 * CHUNK_SIZE
+
+# Ventana de deflate: cada bloque se comprime con los últimos 32 KB del anterior como diccionario
+_DEFLATE_WINDOW = 32 * 1024
+
+# Cabecera local de una entrada zip: firma + campos fijos (30 bytes)
+_LOCAL_HEADER_SIZE = 30
+
+SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+SHEET_FOOTER = '</sheetData><pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/></worksheet>\n'
+
+
+def escape_text(value):
+    """Escapa el texto de una celda: &, < y > y también las comillas, para que el
+    texto nunca pueda confundirse con un atributo de estilo generado.
+
+    Equivale a xml.sax.saxutils.escape, que importa urllib.request al cargarse.
+    """
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def inline_string_cell(reference, value, style_attr):
+    """Retorna el XML de una celda de texto con cadena en línea"""
+    space = ' xml:space="preserve"' if value != value.strip() else ''
+    return f'<c r="{reference}"{style_attr} t="inlineStr"><is><t{space}>{escape_text(value)}</t></is></c>'
+
+
+def formula_cell(reference, value, style_attr):
+    """Retorna el XML de una celda con fórmula (value empieza por =) tal como la escribe openpyxl"""
+    return f'<c r="{reference}"{style_attr}><f>{escape_text(value[1:])}</f><v></v></c>'
+
+
+def cell_xml(reference, value, style_attr):
+    """Retorna el XML de una celda según el tipo del valor (texto, fórmula, booleano, número o fecha).
+
+    Un texto vacío es una celda en blanco: solo se escribe si lleva estilo, sin valor ni tipo.
+    """
+    if value.__class__ is str:
+        if not value:
+            return f'<c r="{reference}"{style_attr}/>' if style_attr else ''
+        if is_formula(value):
+            return formula_cell(reference, value, style_attr)
+        return inline_string_cell(reference, value, style_attr)
+    if isinstance(value, bool):
+        return f'<c r="{reference}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (date, datetime)):
+        value = to_excel(value)
+    return f'<c r="{reference}"{style_attr}><v>{value!r}</v></c>'
+
+
+def write_sheet_part(path, sheet, column_widths, style_attr, tab_selected=False):
+    """Escribe la parte XML de la hoja en path, una fila por línea; retorna el número de celdas.
+
+    column_widths: {índice de columna: ancho}; style_attr(formato, estilo) retorna
+    el atributo ' s="..."' de la celda o '' si no lleva estilo. Las filas volcadas
+    a disco por el presupuesto de memoria se leen por orden mezcladas con las de memoria.
+    """
+    cell_count = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as part:
+        part.write(SHEET_HEADER)
+        part.write('<sheetPr><outlinePr summaryBelow="1" summaryRight="1"/><pageSetUpPr/></sheetPr>')
+        bounds = sheet.bounds()
+        if bounds is not None:
+            min_col, min_row, max_col, max_row = bounds
+            dimension = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+        else:
+            dimension = 'A1:A1'
+        part.write(f'<dimension ref="{dimension}"/>')
+        selected = ' tabSelected="1"' if tab_selected else ''
+        part.write(f'<sheetViews><sheetView{selected} workbookViewId="0">'
+                   '<selection activeCell="A1" sqref="A1"/></sheetView></sheetViews>')
+        part.write('<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>')
+        if column_widths:
+            part.write('<cols>')
+            for col in sorted(column_widths):
+                part.write(f'<col min="{col}" max="{col}" width="{column_widths[col]}" customWidth="1"/>')
+            part.write('</cols>')
+        part.write('<sheetData>\n')
+
+        letters = {}
+        for row, cells in sheet.sorted_rows():
+            cell_count += len(cells)
+            xml = [f'<row r="{row}">']
+            for col in sorted(cells):
+                letter = letters.get(col)
+                if letter is None:
+                    letter = letters[col] = get_column_letter(col)
+                value, format_attr, style_id = cells[col]
+                xml.append(cell_xml(f"{letter}{row}", value, style_attr(format_attr, style_id)))
+            xml.append('</row>\n')
+            part.write(''.join(xml))
+        part.write(SHEET_FOOTER)
+    return cell_count
+
+
+def compress_type(level):
+    """Método de compresión de las entradas zip para el nivel indicado"""
+    return zipfile.ZIP_STORED if level == 0 else zipfile.ZIP_DEFLATED
+
+
+def deflate_file(source_path, target_path, level=zlib.Z_DEFAULT_COMPRESSION, transform=None, threads=1):
+    """Comprime source_path en formato deflate crudo (el de las entradas zip).
+
+    transform, si se indica, se aplica a cada línea antes de comprimirla. Con
+    level 0 el contenido se copia sin comprimir (entrada STORED). Con threads > 1
+    y sin transform, los archivos grandes se comprimen por bloques en paralelo.
+    Retorna (crc, tamaño original, tamaño comprimido).
+    """
+    if (threads > 1 and transform is None and level != 0
+            and os.path.getsize(source_path) >= PARALLEL_DEFLATE_MIN_BYTES):
+        return deflate_file_parallel(source_path, target_path, level, threads)
+    compressor = None if level == 0 else zlib.compressobj(level, zlib.DEFLATED, -15)
+    crc = 0
+    file_size = 0
+    compress_size = 0
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        if transform is None:
+            chunks = iter(lambda: source.read(CHUNK_SIZE), b'')
+        else:
+            chunks = (transform(line) for line in source)
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data = chunk if compressor is None else compressor.compress(chunk)
+            compress_size += len(data)
+            target.write(data)
+        if compressor is not None:
+            data = compressor.flush()
+            compress_size += len(data)
+            target.write(data)
+    return crc, file_size, compress_size
+
+
+def _deflate_block(data, level, dictionary, final):
+    """Comprime un bloque como continuación del flujo deflate (zlib libera el GIL mientras comprime)"""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    # Los bloques intermedios terminan alineados a byte (Z_SYNC_FLUSH) y sin marca de
+    # bloque final: concatenados forman un único flujo deflate válido
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def deflate_file_parallel(source_path, target_path, level, threads):
+    """deflate_file repartiendo los bloques de CHUNK_SIZE entre hilos.
+
+    Cada bloque usa como diccionario el final del anterior, por lo que la
+    compresión apenas empeora. Como mucho hay 2 bloques por hilo en memoria.
+    """
+    crc = 0
+    file_size = 0
+    compress_size = 0
+    pending = deque()
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target, \
+            ThreadPoolExecutor(max_workers=threads) as pool:
+
+        def write_next():
+            nonlocal compress_size
+            data = pending.popleft().result()
+            compress_size += len(data)
+            target.write(data)
+
+        previous = b''
+        chunk = source.read(CHUNK_SIZE)
+        while True:
+            next_chunk = source.read(CHUNK_SIZE)
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            pending.append(pool.submit(_deflate_block, chunk, level, previous[-_DEFLATE_WINDOW:], not next_chunk))
+            if len(pending) >= 2 * threads:
+                write_next()
+            if not next_chunk:
+                break
+            previous, chunk = chunk, next_chunk
+        while pending:
+            write_next()
+    return crc, file_size, compress_size
+
+
+class DeflatingZipFile(zipfile.ZipFile):
+    """ZipFile de escritura con el nivel de compresión indicado.
+
+    Las partes grandes añadidas con write() (openpyxl escribe así las hojas) se
+    comprimen por bloques en varios hilos y se añaden ya comprimidas.
+    """
+
+    def __init__(self, path, level=DEFAULT_COMPRESSION_LEVEL, threads=1):
+        super().__init__(path, 'w', compress_type(level), allowZip64=True,
+                         compresslevel=None if level == 0 else level)
+        self.level = level
+        self.threads = threads
+        self.work_dir = None
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        if (self.threads > 1 and self.level != 0 and compress_type is None
+                and os.path.getsize(filename) >= PARALLEL_DEFLATE_MIN_BYTES):
+            if self.work_dir is None:
+                self.work_dir = tempfile.mkdtemp(prefix='ineoXlsx_', dir=os.path.dirname(os.path.abspath(self.filename)))
+            deflated_path = os.path.join(self.work_dir, 'parte.deflate')
+            crc, file_size, compress_size = deflate_file_parallel(filename, deflated_path, self.level, self.threads)
+            write_raw_entry(self, new_entry_info(arcname or os.path.basename(filename), crc, file_size, compress_size),
+                            read_file_chunks(deflated_path))
+            return
+        super().write(filename, arcname, compress_type, compresslevel)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.work_dir is not None:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def save_workbook(wb, excel_file, level=DEFAULT_COMPRESSION_LEVEL, threads=1):
+    """Equivalente a wb.save(excel_file) con el nivel de compresión y los hilos indicados"""
+    from openpyxl.writer.excel import ExcelWriter
+
+    wb.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+    archive = DeflatingZipFile(excel_file, level, threads)
+    try:
+        # ExcelWriter.save cierra el archivo al terminar
+        ExcelWriter(wb, archive).save()
+    except BaseException:
+        archive.close()
+        raise
+
+
+def new_entry_info(name, crc, file_size, compress_size, level=DEFAULT_COMPRESSION_LEVEL):
+    """ZipInfo de una entrada generada (deflate, o STORED con level 0), con fecha fija"""
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = compress_type(level)
+    info.external_attr = 0o600 << 16
+    info.CRC = crc
+    info.file_size = file_size
+    info.compress_size = compress_size
+    return info
+
+
+def write_raw_entry(target_zip, info, chunks):
+    """Añade al zip una entrada cuyo contenido ya está comprimido (info con CRC y tamaños)"""
+    info.flag_bits &= ~0x08
+    info.extra = zipfile._strip_extra(info.extra, (1,))
+    zip64 = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+    target_zip.fp.seek(target_zip.start_dir)
+    info.header_offset = target_zip.fp.tell()
+    target_zip.fp.write(info.FileHeader(zip64))
+    for chunk in chunks:
+        target_zip.fp.write(chunk)
+    target_zip.start_dir = target_zip.fp.tell()
+    target_zip.filelist.append(info)
+    target_zip.NameToInfo[info.filename] = info
+    target_zip._didModify = True
+
+
+def read_raw_chunks(source_file, info):
+    """Genera el contenido comprimido de una entrada de un zip abierto en modo binario"""
+    source_file.seek(info.header_offset)
+    header = source_file.read(_LOCAL_HEADER_SIZE)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    source_file.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    remaining = info.compress_size
+    while remaining:
+        chunk = source_file.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Entrada truncada: {info.filename}")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def read_file_chunks(path):
+    with open(path, 'rb') as source:
+        yield from iter(lambda: source.read(CHUNK_SIZE), b'')
@@ -0,0 +1,192 @@
+"""
+Conversión en paralelo de una tarea con varias hojas sobre un pool de procesos.
+
+1. Cada proceso lee el XML de datos en streaming y construye solo las hojas que
+   le corresponden (asignadas por nombre), serializándolas como partes XML con
+   índices de estilo locales.
+2. El proceso principal reúne los estilos de todas las hojas en un orden fijo
+   (orden de aparición de las hojas) y genera con openpyxl el paquete base:
+   libro, hojas vacías, estilos, tema y propiedades.
+3. Los procesos traducen los índices locales a los globales y comprimen su parte.
+4. El xlsx final se ensambla copiando las entradas ya comprimidas.
+
+El resultado no depende del número de procesos: mismo orden de hojas, mismos
+índices de estilo y entradas zip con fecha fija (salvo las fechas de docProps/core.xml).
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+
+from excel.excel_desbordamiento import MemoryBudget
+from excel.excel_escritores import OpenpyxlWriter, SheetPartWriter
+from excel.excel_metricas import TaskMetrics, measure
+from excel.excel_paquete import (
+    DEFAULT_COMPRESSION_LEVEL,
+    ZIP_DATE_TIME,
+    deflate_file,
+    new_entry_info,
+    read_file_chunks,
+    read_raw_chunks,
+    save_workbook,
+    write_raw_entry,
+)
+
+# Referencia de estilo local escrita por SheetPartWriter
+_LOCAL_STYLE = re.compile(rb' s="@(\d+)"')
+
+
+def build_sheet_parts(xml_file, worker_index, num_workers, work_dir, validate=True, auto_fit=True,
+                      value_type='string', memory_budget_mb=None):
+    """Proceso de trabajo: construye las hojas asignadas y retorna estilos, partes generadas y métricas.
+
+    Con memory_budget_mb el proceso tiene su propio presupuesto de memoria para las celdas.
+    """
+    # Importación diferida: evita la importación circular al cargar este módulo
+    from excel.excel_funciones_exportacion import write_workbooks_streaming
+
+    memory_budget = MemoryBudget(memory_budget_mb, os.path.join(work_dir, 'tramos')) if memory_budget_mb else None
+    writer = SheetPartWriter(work_dir, worker_index, num_workers, auto_fit, memory_budget)
+    metrics = TaskMetrics()
+    try:
+        write_workbooks_streaming(xml_file, writer, logging.getLogger(__name__), validate, writer.accepts_sheet,
+                                  value_type, metrics)
+        sheets = writer.save()
+    except SyntaxError as e:
+        # Los errores de lxml no se pueden enviar al proceso principal: se convierten conservando el mensaje
+        raise SyntaxError(str(e)) from None
+    finally:
+        if memory_budget is not None:
+            memory_budget.close()
+    return {'styles': writer.styles_dict, 'sheets': sheets, 'metrics': metrics.sheets,
+            'spill': memory_budget.stats() if memory_budget is not None else None}
+
+
+def deflate_sheet_part(path, style_indexes, level=DEFAULT_COMPRESSION_LEVEL):
+    """Proceso de trabajo: sustituye los estilos locales por los globales y comprime la parte"""
+    replacements = {str(local).encode(): f' s="{xf}"'.encode() for local, xf in enumerate(style_indexes)}
+
+    def transform(line):
+        return _LOCAL_STYLE.sub(lambda match: replacements[match.group(1)], line)
+
+    target_path = path + '.deflate'
+    return target_path, deflate_file(path, target_path, level, transform)
+
+
+def build_base_package(base_file, sheets, styles_dict, level=DEFAULT_COMPRESSION_LEVEL):
+    """Genera con openpyxl el libro con las hojas vacías y todos los estilos usados.
+
+    Retorna, por hoja, la lista de índices de estilo globales de sus estilos locales.
+    """
+    writer = OpenpyxlWriter(base_file, auto_fit=False)
+    writer.set_styles(styles_dict)
+    for sheet in sheets:
+        writer.open_sheet(sheet['name'])
+    scratch = writer.wb.worksheets[0]
+
+    global_styles = {}
+    sheet_styles = []
+    for sheet in sheets:
+        indexes = []
+        for style_id, format_attr in sheet['style_keys']:
+            xf = global_styles.get((style_id, format_attr))
+            if xf is None:
+                xf = global_styles[(style_id, format_attr)] = writer.register_style(
+                    scratch, len(global_styles) + 1, format_attr, style_id)
+            indexes.append(xf)
+        sheet_styles.append(indexes)
+    # Sus entradas se copian tal cual al xlsx final: se comprimen ya con el nivel de la tarea
+    save_workbook(writer.wb, base_file, level)
+    return sheet_styles
+
+
+def assemble_package(excel_file, base_file, sheet_parts, level=DEFAULT_COMPRESSION_LEVEL):
+    """Escribe el xlsx final: entradas del paquete base con las hojas sustituidas.
+
+    sheet_parts: {nombre de la parte: (ruta comprimida, (crc, tamaño, tamaño comprimido))}
+    """
+    with zipfile.ZipFile(base_file) as base, open(base_file, 'rb') as base_handle, \
+            zipfile.ZipFile(excel_file, 'w') as target:
+        for info in base.infolist():
+            part = sheet_parts.get(info.filename)
+            if part is not None:
+                deflated_path, (crc, file_size, compress_size) = part
+                write_raw_entry(target, new_entry_info(info.filename, crc, file_size, compress_size, level),
+                                read_file_chunks(deflated_path))
+            else:
+                entry = copy(info)
+                entry.date_time = ZIP_DATE_TIME
+                write_raw_entry(target, entry, read_raw_chunks(base_handle, info))
+
+
+def write_workbook_serial(xml_file, excel_file, logger, validate, auto_fit, value_type, metrics, compression_level):
+    """Conversión en secuencia con openpyxl, la misma que sin modo paralelo"""
+    from excel.excel_funciones_exportacion import write_workbooks_streaming
+
+    writer = OpenpyxlWriter(excel_file, auto_fit, compression_level)
+    write_workbooks_streaming(xml_file, writer, logger, validate, value_type=value_type, metrics=metrics)
+    with measure(metrics, 'autofit'):
+        writer.fit_columns()
+    with measure(metrics, 'save'):
+        writer.save()
+
+
+def write_workbook_parallel(xml_file, excel_file, logger, workers, validate=True, auto_fit=True,
+                            value_type='string', metrics=None, compression_level=DEFAULT_COMPRESSION_LEVEL,
+                            memory_budget=None):
+    """Convierte el XML de datos en un xlsx nuevo construyendo las hojas en paralelo.
+
+    Las hojas se comprimen en los procesos de trabajo con compression_level (0 =
+    sin comprimir). Con metrics se miden las etapas (cells: construcción de las hojas; styles:
+    paquete base; save: compresión y ensamblado) y se añaden las hojas medidas
+    en cada proceso. Con memory_budget cada proceso aplica ese presupuesto a sus
+    hojas y sus volcados se suman al de la tarea.
+    """
+    logger.info(f"Modo paralelo: {workers} procesos")
+    # Directorio de trabajo junto a la salida: las partes pueden ocupar tanto como el xlsx
+    work_dir = tempfile.mkdtemp(prefix='ineoXlsx_', dir=os.path.dirname(os.path.abspath(excel_file)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            with measure(metrics, 'cells'):
+                futures = [pool.submit(build_sheet_parts, xml_file, worker_index, workers, work_dir, validate,
+                                       auto_fit, value_type, memory_budget and memory_budget.budget_mb)
+                           for worker_index in range(workers)]
+                results = [future.result() for future in futures]
+            if memory_budget is not None:
+                for result in results:
+                    memory_budget.merge_stats(result['spill'])
+
+            sheets = sorted((sheet for result in results for sheet in result['sheets']),
+                            key=lambda sheet: sheet['order'])
+            if not sheets:
+                # Sin hojas no hay partes que ensamblar: el resultado es el de la conversión en secuencia
+                logger.info("El XML de datos no tiene hojas, procesando en secuencia")
+                write_workbook_serial(xml_file, excel_file, logger, validate, auto_fit, value_type, metrics,
+                                      compression_level)
+                return
+            sheet_metrics = {name: sheet for result in results for name, sheet in result['metrics'].items()}
+            for sheet in sheets:
+                logger.info(f"Workbook '{sheet['name']}': {sheet['cells']} celdas procesadas")
+                if metrics is not None:
+                    metrics.add_sheet(sheet_metrics[sheet['name']])
+
+            base_file = os.path.join(work_dir, 'base.xlsx')
+            with measure(metrics, 'styles'):
+                sheet_styles = build_base_package(base_file, sheets, results[0]['styles'], compression_level)
+
+            with measure(metrics, 'save'):
+                futures = [pool.submit(deflate_sheet_part, sheet['path'], indexes, compression_level)
+                           for sheet, indexes in zip(sheets, sheet_styles)]
+                # openpyxl nombra las hojas por posición: xl/worksheets/sheet1.xml, sheet2.xml...
+                sheet_parts = {f"xl/worksheets/sheet{position}.xml": future.result()
+                               for position, future in enumerate(futures, start=1)}
+
+        with measure(metrics, 'save'):
+            assemble_package(excel_file, base_file, sheet_parts, compression_level)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,336 @@
+"""
+Lectura de la tarea: validación XSD, estilos, columnas y opciones, logging y
+orígenes y destinos de datos (dataIn/dataOut).
+
+Lo usan el programa de línea de comandos y los módulos de exportación; vive
+en el paquete para que estos no dependan del script principal.
+"""
+
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+from excel.excel_metricas import measure
+
+# Logger de las tareas: uno solo por proceso, sus handlers se sustituyen en cada tarea
+TASK_LOGGER = 'ineoXlsx.tarea'
+
+# Arranque rápido: openpyxl, lxml, tempfile y el transporte HTTP se importan solo
+# en las funciones que los usan. El mensaje de uso, las tareas sin validación XSD
+# (sin lxml) y los aciertos de caché (sin openpyxl) no pagan esas importaciones.
+
+
+# Esquemas XSD compilados por ruta: se compilan una sola vez por proceso
+_xsd_schemas = {}
+
+
+def get_xsd_schema(xsd_file="schema.xsd"):
+    """Retorna el esquema XSD compilado (cacheado) o None si no existe el archivo"""
+    # El esquema está en el directorio del programa, el padre de este paquete
+    program_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    xsd_path = os.path.join(program_dir, xsd_file)
+
+    if xsd_path not in _xsd_schemas:
+        from lxml import etree
+        if not os.path.exists(xsd_path):
+            print(f"Advertencia: No se encontró el archivo XSD en {xsd_path}")
+            _xsd_schemas[xsd_path] = None
+        else:
+            with open(xsd_path, 'rb') as schema_file:
+                _xsd_schemas[xsd_path] = etree.XMLSchema(etree.parse(schema_file))
+    return _xsd_schemas[xsd_path]
+
+
+def parse_xml(xml_file, validate=True, xsd_file="schema.xsd", metrics=None, errors=None):
+    """Parsea el XML una sola vez y lo valida contra el XSD sobre el mismo árbol.
+
+    Retorna el elemento raíz (lxml si se valida, ElementTree si no) o None si el
+    XML no es válido según el esquema; en ese caso los errores del esquema se
+    añaden a la lista errors si se indica. Con metrics se miden las fases parse y validation.
+    """
+    if not validate:
+        with measure(metrics, 'parse'):
+            return ET.parse(xml_file).getroot()
+
+    from lxml import etree
+    with measure(metrics, 'parse'):
+        xml_doc = etree.parse(xml_file)
+    with measure(metrics, 'validation'):
+        schema = get_xsd_schema(xsd_file)
+        valid = schema is None or schema.validate(xml_doc)
+    if schema is None:
+        return xml_doc.getroot()  # Continuar sin validación
+    if valid:
+        print(f"XML válido según el esquema XSD")
+        return xml_doc.getroot()
+    print("Error: El archivo XML no es válido según el esquema XSD:")
+    for error in schema.error_log:
+        print(f"  Línea {error.line}: {error.message}")
+        if errors is not None:
+            errors.append(f"Línea {error.line}: {error.message}")
+    return None
+
+
+def iterparse_xml(xml_handle, events=('start', 'end'), validate=True, xsd_file="schema.xsd"):
+    """iterparse que valida contra el XSD mientras lee (lxml) o sin validar (ElementTree).
+
+    Un documento inválido lanza XMLSyntaxError (subclase de SyntaxError) en el
+    punto donde se detecta el error.
+    """
+    schema = get_xsd_schema(xsd_file) if validate else None
+    if schema is None:
+        return ET.iterparse(xml_handle, events=events)
+    from lxml import etree
+    return etree.iterparse(xml_handle, events=events, schema=schema)
+
+
+def validate_xml_against_xsd(xml_file, xsd_file="schema.xsd"):
+    """Valida el archivo XML contra el esquema XSD"""
+    from lxml import etree
+    try:
+        return parse_xml(xml_file, True, xsd_file) is not None
+    except etree.XMLSyntaxError as e:
+        print(f"Error de sintaxis XML: {e}")
+        return False
+    except Exception as e:
+        print(f"Error durante la validación XSD: {e}")
+        return False
+
+def parse_styles(styles_element):
+    """Parsea los estilos del XML y retorna un diccionario"""
+    styles_dict = {}
+    for style in styles_element.findall('style'):
+        style_id = style.get('id')
+        style_data = {}
+        font_elem = style.find('font')
+        if font_elem is not None:
+            style_data['font'] = font_elem.text
+        size_elem = style.find('size')
+        if size_elem is not None:
+            style_data['size'] = int(size_elem.text)
+        bold_elem = style.find('bold')
+        if bold_elem is not None:
+            style_data['bold'] = bold_elem.text.lower() == 'true'
+        color_elem = style.find('color')
+        if color_elem is not None:
+            style_data['color'] = color_elem.text.replace('#', '')
+        background_elem = style.find('background')
+        if background_elem is not None:
+            style_data['background'] = background_elem.text.replace('#', '')
+        alignment_elem = style.find('alignment')
+        if alignment_elem is not None:
+            style_data['alignment'] = alignment_elem.text
+        styles_dict[style_id] = style_data
+    return styles_dict
+
+def parse_columns(columns_element):
+    """Parsea la sección <columns> y retorna un diccionario columna -> ancho (None = automático)"""
+    columns = {}
+    for column in columns_element.findall('column'):
+        width = float(column.get('width'))
+        columns[column.get('name')] = None if width < 0 else width
+    return columns
+
+def parse_options(options_element):
+    """Parsea la sección <options> y retorna un diccionario nombre -> valor"""
+    options = {}
+    if options_element is None:
+        return options
+    for option in options_element.findall('option'):
+        options[option.get('name')] = option.get('value')
+    return options
+
+def option_enabled(options, name, default=False):
+    """Indica si una opción booleana está activada (true, 1, yes, on)"""
+    value = options.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ['true', '1', 'yes', 'on']
+
+def option_workers(options, name='workers', default='1'):
+    """Número de procesos (o hilos) de trabajo de una opción: entero, o 'auto' para usar todos los núcleos"""
+    value = (options.get(name) or default).strip().lower()
+    if value in ('auto', '0'):
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 1
+
+def create_openpyxl_style(style_data):
+    """Convierte los datos de estilo a objetos openpyxl"""
+    from openpyxl.styles import Font, PatternFill, Alignment
+    font = Font(
+        name=style_data.get('font', 'Arial'),
+        size=style_data.get('size', 10),
+        bold=style_data.get('bold', False),
+        color=style_data.get('color', '000000')
+    )
+    fill = None
+    if 'background' in style_data:
+        fill = PatternFill(
+            start_color=style_data['background'],
+            end_color=style_data['background'],
+            fill_type='solid'
+        )
+    alignment = None
+    if 'alignment' in style_data:
+        horizontal = style_data['alignment']
+        alignment = Alignment(horizontal=horizontal)
+    return font, fill, alignment
+
+def setup_logging(log_element):
+    """Configura el sistema de logging según la configuración XML"""
+    if log_element is None:
+        # Configuración por defecto
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        return logging.getLogger(__name__)
+    
+    # Obtener configuraciones
+    log_level_elem = log_element.find('logLevel')
+    log_file_elem = log_element.find('logFile')
+    log_format_elem = log_element.find('logFormat')
+    log_date_format_elem = log_element.find('logDateFormat')
+    log_console_elem = log_element.find('logConsole')
+    
+    # Configurar nivel de log con validación
+    log_level_text = log_level_elem.text.upper() if log_level_elem is not None else 'INFO'
+    try:
+        level = getattr(logging, log_level_text)
+    except AttributeError:
+        level = logging.INFO
+        print(f"Advertencia: Nivel de log '{log_level_text}' no válido, usando INFO")
+    
+    # Configurar formato
+    log_format = log_format_elem.text if log_format_elem is not None else '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    date_format = log_date_format_elem.text if log_date_format_elem is not None else '%Y-%m-%d %H:%M:%S'
+    
+    # Configurar handlers
+    handlers = []
+    
+    # Handler para archivo si está especificado
+    if log_file_elem is not None:
+        try:
+            # Extraer ruta del archivo (manejar prefijo FILE://)
+            log_file_text = log_file_elem.text
+            if log_file_text.startswith('FILE://'):
+                log_file_path = log_file_text[7:]
+            else:
+                log_file_path = log_file_text
+            
+            # Crear directorio si no existe
+            log_dir = os.path.dirname(log_file_path)
+            if log_dir and not os.path.exists(log_dir):
+                os.makedirs(log_dir, exist_ok=True)
+            
+            file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+            file_handler.setFormatter(logging.Formatter(log_format, date_format))
+            handlers.append(file_handler)
+        except Exception as e:
+            print(f"Advertencia: No se pudo configurar el archivo de log: {e}")
+    
+    # Handler para consola si está habilitado
+    log_console_text = log_console_elem.text.lower() if log_console_elem is not None else 'true'
+    log_console = log_console_text in ['true', '1', 'yes', 'on']
+    
+    if log_console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(log_format, date_format))
+        handlers.append(console_handler)
+    
+    # Si no hay handlers, agregar uno por defecto
+    if not handlers:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(log_format, date_format))
+        handlers.append(console_handler)
+    
+    # Logger fijo de las tareas: en modo lote o servicio se reutiliza y sus handlers
+    # se sustituyen en cada tarea (close_logging los cierra al terminarla)
+    logger = logging.getLogger(TASK_LOGGER)
+    logger.setLevel(level)
+    
+    # Cerrar handlers de una tarea anterior que no se hayan cerrado
+    close_logging(logger)
+    
+    # Agregar nuevos handlers
+    for handler in handlers:
+        logger.addHandler(handler)
+    
+    # Evitar propagación para evitar logs duplicados
+    logger.propagate = False
+    
+    return logger
+
+def close_logging(logger):
+    """Cierra los handlers propios del logger de una tarea (evita fugas en procesos de larga duración)"""
+    if logger is None:
+        return
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+
+def extract_uri_content(uri_string):
+    """Extrae el tipo y contenido de una URI con prefijos FILE://, BASE64://, URL://"""
+    if not uri_string:
+        return 'file', uri_string
+    
+    if uri_string.startswith('FILE://'):
+        return 'file', uri_string[7:]
+    elif uri_string.startswith('BASE64://'):
+        return 'base64', uri_string[9:]
+    elif uri_string.startswith('URL://'):
+        return 'url', uri_string[6:]
+    else:
+        # Por defecto es archivo
+        return 'file', uri_string
+
+def validate_and_get_data_source(uri_string, logger, is_data_in=True, errors=None):
+    """Valida la URI de dataIn/dataOut y retorna el origen o destino local a utilizar (None si no es válida).
+
+    - dataIn BASE64://: retorna un Base64Source que se decodifica al leerlo.
+    - dataOut URL://: retorna la ruta de un archivo de trabajo en un directorio
+      temporal; el xlsx se envía a la URL al terminar la conversión.
+
+    Si la URI no es válida el motivo se registra y se añade a la lista errors si se indica.
+    """
+    # Importación diferida: solo las tareas con BASE64 o URL usan el transporte
+    from excel.excel_transporte import Base64Source, UploadError, check_upload_url, upload_name
+
+    def invalid(message):
+        logger.error(message)
+        if errors is not None:
+            errors.append(message)
+        return None
+
+    source_type, content = extract_uri_content(uri_string)
+    if source_type == 'base64' and is_data_in:
+        # Se conserva el texto original: quitar el prefijo copiaría todo el contenido
+        return Base64Source(uri_string, len('BASE64://'))
+    if source_type == 'url' and not is_data_in:
+        try:
+            check_upload_url(content)
+        except UploadError as e:
+            return invalid(str(e))
+        import tempfile
+        staging_dir = tempfile.mkdtemp(prefix='ineoXlsx_')
+        logger.info(f"Destino URL configurado: {content} (archivo de trabajo en {staging_dir})")
+        return os.path.join(staging_dir, upload_name(content))
+    if source_type != 'file':
+        return invalid(f"Tipo de origen '{source_type}' no soportado para {'dataIn' if is_data_in else 'dataOut'}")
+
+    if is_data_in:
+        if not os.path.isfile(content):
+            return invalid(f"El archivo {content} no existe")
+        logger.info(f"Archivo encontrado: {content}")
+        return content
+
+    # dataOut: crear el directorio padre si no existe
+    out_dir = os.path.dirname(content)
+    if out_dir and not os.path.exists(out_dir):
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            logger.info(f"Directorio creado: {out_dir}")
+        except OSError as e:
+            return invalid(f"No se pudo crear el directorio {out_dir}: {e}")
+    logger.info(f"Archivo de salida configurado: {content}")
+    return content
@@ -0,0 +1,199 @@
+"""
+Orígenes y destinos remotos de una tarea.
+
+- BASE64:// en dataIn: el contenido se decodifica por bloques a medida que el
+  parser lo lee (Base64Source.open), sin archivo temporal ni copia decodificada
+  completa en memoria.
+- URL:// en dataOut: el xlsx se genera en un archivo local de trabajo y se envía
+  por HTTP(S) leyéndolo por bloques. Las conexiones se mantienen abiertas por
+  servidor (keep-alive) y se reutilizan en las tareas siguientes del mismo
+  proceso (modos lote y servicio).
+"""
+
+import binascii
+import io
+import os
+import re
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Caracteres BASE64 por bloque decodificado (múltiplo de 4)
+BASE64_CHUNK = 256 * 1024
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+UPLOAD_METHODS = ('POST', 'PUT')
+
+DEFAULT_UPLOAD_TIMEOUT = 300
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Texto BASE64 válido de un bloque: grupos de 4 caracteres y, al final, un grupo con relleno
+_BASE64_GROUPS = re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?')
+
+# Conexiones abiertas por (esquema, servidor, puerto)
+_connections = {}
+
+# Contadores del proceso (se mantienen entre tareas en los modos lote y servicio)
+UPLOAD_COUNTERS = {'uploads': 0, 'connections': 0}
+
+
+
+class UploadError(Exception):
+    """No se pudo enviar el archivo a la URL de dataOut"""
+
+
+class Base64Reader(io.RawIOBase):
+    """Flujo binario de lectura que decodifica el texto BASE64 bloque a bloque.
+
+    Se ignoran los espacios y saltos de línea del texto; solo se mantiene en
+    memoria el bloque en curso. start permite saltar el prefijo BASE64:// sin
+    copiar el texto. Cualquier otro carácter, un relleno (=) que no esté al
+    final o un número de caracteres incompleto es un error.
+    """
+
+    def __init__(self, text, start=0):
+        self.text = text
+        self.position = start
+        self.carry = ''
+        self.decoded = b''
+        # Ya se ha leído el grupo final con relleno: no puede haber más datos
+        self.padded = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.decoded and (self.position < len(self.text) or self.carry):
+            self.decoded = self.decode_next()
+        size = min(len(buffer), len(self.decoded))
+        buffer[:size] = self.decoded[:size]
+        self.decoded = self.decoded[size:]
+        return size
+
+    def decode_next(self):
+        chunk = self.text[self.position:self.position + BASE64_CHUNK]
+        self.position += len(chunk)
+        data = self.carry + _WHITESPACE.sub('', chunk)
+        if self.position < len(self.text):
+            # Solo grupos completos de 4 caracteres; el resto pasa al bloque siguiente
+            cut = len(data) - len(data) % 4
+            data, self.carry = data[:cut], data[cut:]
+        else:
+            self.carry = ''
+        if not data:
+            return b''
+        if self.padded or not _BASE64_GROUPS.fullmatch(data):
+            raise ValueError("Error decodificando BASE64 de dataIn: caracteres no válidos, relleno (=) "
+                             "fuera del final o número de caracteres incompleto")
+        self.padded = data[-1] == '='
+        return binascii.a2b_base64(data)
+
+
+class Base64Source:
+    """Origen de datos BASE64: cada open() retorna un flujo nuevo que se decodifica al leerlo"""
+
+    def __init__(self, text, start=0):
+        self.text = text
+        self.start = start
+
+    def open(self):
+        return io.BufferedReader(Base64Reader(self.text, self.start), BASE64_CHUNK)
+
+    def __str__(self):
+        return f"BASE64 ({len(self.text) - self.start:,} caracteres)"
+
+
+def open_data(source):
+    """Abre en binario un origen de datos: ruta local o Base64Source"""
+    if isinstance(source, Base64Source):
+        return source.open()
+    return open(source, 'rb')
+
+
+@contextmanager
+def parser_input(source):
+    """Entrada para los parsers XML: la ruta tal cual (lectura nativa) o el flujo decodificado"""
+    if isinstance(source, Base64Source):
+        with source.open() as stream:
+            yield stream
+    else:
+        yield source
+
+
+def upload_name(url):
+    """Nombre del archivo que se envía: el último segmento de la URL o salida.xlsx"""
+    name = os.path.basename(urlsplit(url).path)
+    return name if name.lower().endswith('.xlsx') else 'salida.xlsx'
+
+
+def check_upload_url(url):
+    """Comprueba que la URL de dataOut es http(s) con servidor; lanza UploadError si no"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UploadError(f"URL no válida para dataOut (se requiere http:// o https://): {url}")
+    return parts
+
+
+def get_connection(scheme, host, port, timeout):
+    import http.client
+    key = (scheme, host, port)
+    connection = _connections.get(key)
+    if connection is None:
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        connection = _connections[key] = connection_class(host, port, timeout=timeout)
+    return connection, key
+
+
+def close_connections():
+    """Cierra todas las conexiones del proceso"""
+    for connection in _connections.values():
+        connection.close()
+    _connections.clear()
+
+
+def upload_file(path, url, method='POST', timeout=DEFAULT_UPLOAD_TIMEOUT):
+    """Envía el archivo a la URL leyéndolo por bloques; retorna el código de estado HTTP"""
+    # Importación diferida: solo las tareas con dataOut URL:// cargan el cliente HTTP
+    import http.client
+    # Errores de una conexión reutilizada que el servidor ya ha cerrado: se reintenta con una nueva
+    stale_connection_errors = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                               ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+    parts = check_upload_url(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    headers = {
+        'Content-Type': XLSX_CONTENT_TYPE,
+        'Content-Length': str(os.path.getsize(path)),
+        'Content-Disposition': f'attachment; filename="{os.path.basename(path)}"',
+    }
+
+    # Un intento con la conexión abierta; si el servidor ya la había cerrado, otro con una nueva
+    for attempt in range(2):
+        connection, key = get_connection(parts.scheme, parts.hostname, parts.port, timeout)
+        reused = connection.sock is not None
+        if not reused:
+            UPLOAD_COUNTERS['connections'] += 1
+        try:
+            with open(path, 'rb') as body:
+                connection.request(method, target, body=body, headers=headers)
+                response = connection.getresponse()
+                # Leer la respuesta completa deja la conexión lista para la siguiente petición
+                response_body = response.read()
+        except stale_connection_errors as e:
+            connection.close()
+            del _connections[key]
+            if reused and attempt == 0:
+                continue
+            raise UploadError(f"Conexión cerrada por el servidor enviando a {url}: {e}") from e
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            del _connections[key]
+            raise UploadError(f"Error de conexión enviando a {url}: {e}") from e
+        if not 200 <= response.status < 300:
+            detail = response_body[:200].decode('utf-8', 'replace').strip()
+            raise UploadError(f"El servidor respondió {response.status} {response.reason} a {url}"
+                              + (f": {detail}" if detail else ''))
+        UPLOAD_COUNTERS['uploads'] += 1
+        return response.status
@@ -0,0 +1,136 @@
+"""
+Conversión de los valores de celda (texto del atributo value) a tipos nativos de Excel.
+
+Tipos admitidos en el atributo type de <cell> y <workbook> y en la opción valueType:
+
+- string (por defecto): el valor se escribe como texto, sin ninguna conversión.
+- number: entero o decimal con punto ("45000", "-12.5", "1e6").
+- boolean: true/false (también 1/0).
+- date: fecha u hora ISO 8601 ("2024-03-31", "2024-03-31T08:30:00").
+- auto: detecta número, booleano o fecha; el resto queda como texto. Los valores
+  que perderían información como número (ceros a la izquierda, más de 15 dígitos)
+  se mantienen como texto.
+
+Si el valor no corresponde al tipo indicado se escribe como texto. Un texto que
+empieza por = se escribe como fórmula en todos los motores (is_formula).
+"""
+
+import math
+import re
+from datetime import date, datetime
+
+VALUE_TYPES = ('string', 'number', 'boolean', 'date', 'auto')
+
+# Formatos numéricos por defecto de las fechas sin atributo format
+DATE_FORMAT = 'yyyy-mm-dd'
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+# Precisión de un número de Excel (doble precisión): más dígitos se pierden
+MAX_NUMBER_DIGITS = 15
+
+_INTEGER = re.compile(r'[+-]?\d+\Z')
+_DECIMAL = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\Z')
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?\Z')
+
+_BOOLEANS = {'true': True, 'false': False, '1': True, '0': False}
+
+# Primeros caracteres posibles de un número o una fecha en modo auto
+_NUMERIC_START = frozenset('0123456789+-.')
+
+
+def to_number(value):
+    """Retorna el int o float del texto, o None si no es un número"""
+    if _INTEGER.match(value):
+        return int(value)
+    if _DECIMAL.match(value):
+        number = float(value)
+        if math.isfinite(number):
+            return number
+    return None
+
+
+def to_boolean(value):
+    return _BOOLEANS.get(value.strip().lower())
+
+
+def to_date(value):
+    """Retorna date o datetime (sin zona horaria) del texto ISO 8601, o None"""
+    if not _ISO_DATE.match(value):
+        return None
+    try:
+        if len(value) == 10:
+            return date.fromisoformat(value)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def keeps_as_number(value):
+    """En modo auto: descarta códigos con ceros a la izquierda y números sin precisión suficiente"""
+    digits = value.lstrip('+-')
+    if len(digits) > 1 and digits[0] == '0' and digits[1] != '.':
+        return False
+    mantissa = digits.split('e')[0].split('E')[0]
+    return sum(c.isdigit() for c in mantissa) <= MAX_NUMBER_DIGITS
+
+
+def detect_value(value):
+    """Modo auto: número, booleano o fecha si el texto lo es sin ambigüedad; si no, el propio texto"""
+    if not value:
+        return value
+    if value[0] in _NUMERIC_START:
+        if value[0].isdigit() and len(value) >= 10 and value[4:5] == '-':
+            converted = to_date(value)
+            return value if converted is None else converted
+        converted = to_number(value)
+        if converted is None or not keeps_as_number(value):
+            return value
+        return converted
+    lowered = value.lower()
+    if lowered == 'true':
+        return True
+    if lowered == 'false':
+        return False
+    return value
+
+
+def convert_value(value, value_type):
+    """Convierte el texto del atributo value al tipo indicado; si no corresponde, retorna el texto"""
+    if value_type == 'auto':
+        return detect_value(value)
+    if value_type == 'number':
+        converted = to_number(value.strip())
+    elif value_type == 'boolean':
+        converted = to_boolean(value)
+    elif value_type == 'date':
+        converted = to_date(value.strip())
+    else:
+        return value
+    return value if converted is None else converted
+
+
+def default_format(value):
+    """Formato numérico por defecto para las fechas (None para el resto de valores)"""
+    if isinstance(value, datetime):
+        return DATETIME_FORMAT
+    if isinstance(value, date):
+        return DATE_FORMAT
+    return None
+
+
+def is_formula(value):
+    """Indica si un texto se escribe como fórmula: como en openpyxl, empieza por = y tiene algo más"""
+    return len(value) > 1 and value[0] == '='
+
+
+def display_length(value):
+    """Longitud aproximada del valor mostrado, para el ajuste automático de columnas"""
+    if value.__class__ is str:
+        return len(value)
+    if isinstance(value, bool):
+        return 4 if value else 5
+    if isinstance(value, datetime):
+        return len(DATETIME_FORMAT)
+    if isinstance(value, date):
+        return len(DATE_FORMAT)
+    return len(str(value))
@@ -5,7 +5,7 @@ a = Analysis(
     ['ineoXlsxCmdLine.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('schema.xsd', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
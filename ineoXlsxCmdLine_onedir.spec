@@ -0,0 +1,54 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Variante en directorio (onedir) para arranques rápidos: a diferencia de
+# ineoXlsxCmdLine.spec (un solo archivo), el ejecutable no se descomprime en un
+# directorio temporal en cada ejecución. El bytecode va precompilado en el
+# archivo PYZ y las bibliotecas sin UPX (no hay que descomprimirlas al cargarlas).
+#
+#   pyinstaller ineoXlsxCmdLine_onedir.spec
+#   -> dist/ineoXlsxCmdLine/ineoXlsxCmdLine(.exe)
+#
+# Medición: python bench/bench_arranque.py --ejecutable=dist/ineoXlsxCmdLine/ineoXlsxCmdLine
+
+
+a = Analysis(
+    ['ineoXlsxCmdLine.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('schema.xsd', '.')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='ineoXlsxCmdLine',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['ineosolutions.ico'],
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='ineoXlsxCmdLine',
+)
@@ -0,0 +1,205 @@
+"""
+Ejecución de muchas tareas <ineoDoc> en un único proceso.
+
+- Modo lote (--batch): directorio, patrón glob o manifiesto (un archivo por línea).
+- Modo servicio (--daemon): lee rutas de tareas por stdin o por un socket TCP local.
+
+El proceso se mantiene caliente entre tareas: los módulos (openpyxl, lxml) se
+importan una vez y el XSD se compila una sola vez. Por cada tarea se escribe una
+línea JSON de respuesta con su task_id.
+
+Con --workers=N el lote se reparte en un pool de N procesos. Las tareas que
+escriben el mismo dataOut forman un grupo que se ejecuta en orden en un mismo
+proceso; las respuestas se emiten siempre en el orden del lote.
+"""
+
+import contextlib
+import glob
+import json
+import os
+import socketserver
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel.excel_funciones_exportacion import read_config_header, xml_to_excel
+from excel.excel_tarea import extract_uri_content
+
+# Dirección por defecto del modo servicio por socket
+DEFAULT_DAEMON_HOST = '127.0.0.1'
+
+
+def collect_task_files(spec):
+    """Retorna la lista ordenada de tareas de un directorio, un manifiesto o un patrón glob"""
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, '*.xml')))
+    if os.path.isfile(spec) and not spec.lower().endswith('.xml'):
+        # Manifiesto: una ruta por línea, relativa al propio manifiesto; '#' para comentarios
+        base_dir = os.path.dirname(os.path.abspath(spec))
+        task_files = []
+        with open(spec, 'r', encoding='utf-8') as manifest:
+            for line in manifest:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    task_files.append(os.path.join(base_dir, line))
+        return task_files
+    return sorted(glob.glob(spec))
+
+
+def run_task(config_file, cli_options=None):
+    """Ejecuta una tarea y retorna su respuesta (task_id, status, tiempo, métricas por fase...)"""
+    response = {'config': config_file}
+    if not os.path.isfile(config_file):
+        response['status'] = 'error'
+        response['error'] = f"El archivo {config_file} no existe"
+        response['elapsed'] = 0.0
+    else:
+        xml_to_excel(config_file, None, dict(cli_options or {}), response)
+    return response
+
+
+def output_key(config_file):
+    """Identifica el archivo de salida de una tarea para agrupar las que escriben el mismo"""
+    try:
+        root = read_config_header(config_file)
+    except (OSError, SyntaxError):
+        return config_file
+    data_out = root.find('data/dataOut')
+    if data_out is None or not data_out.text:
+        return config_file
+    uri_type, path = extract_uri_content(data_out.text.strip())
+    if uri_type != 'file':
+        return config_file
+    return os.path.normcase(os.path.abspath(path))
+
+
+def group_tasks_by_output(task_files):
+    """Agrupa (posición, tarea) por archivo de salida, conservando el orden dentro de cada grupo"""
+    groups = {}
+    for index, config_file in enumerate(task_files):
+        groups.setdefault(output_key(config_file), []).append((index, config_file))
+    return list(groups.values())
+
+
+def run_task_group(tasks, cli_options=None):
+    """Proceso de trabajo: ejecuta en orden las tareas de un grupo y retorna (posición, respuesta)"""
+    results = []
+    for index, config_file in tasks:
+        with contextlib.redirect_stdout(sys.stderr):
+            results.append((index, run_task(config_file, cli_options)))
+    return results
+
+
+def write_response(response, out):
+    out.write(json.dumps(response, ensure_ascii=False) + '\n')
+    out.flush()
+
+
+def run_batch(spec, cli_options=None, out=None, workers=1):
+    """Convierte todas las tareas del lote; retorna True si todas fueron correctas"""
+    out = out or sys.stdout
+    task_files = collect_task_files(spec)
+    if not task_files:
+        print(f"No se encontraron tareas en {spec}", file=sys.stderr)
+        return False
+
+    start_time = time.perf_counter()
+    failed = 0
+    if workers > 1:
+        responses = run_batch_parallel(task_files, cli_options, workers)
+    else:
+        responses = run_tasks(task_files, cli_options)
+    for response in responses:
+        if response['status'] != 'ok':
+            failed += 1
+        write_response(response, out)
+
+    elapsed_time = time.perf_counter() - start_time
+    print(f"Lote completado: {len(task_files)} tareas, {failed} con error, "
+          f"{elapsed_time:.2f} segundos ({elapsed_time / len(task_files) * 1000:.1f} ms/tarea)",
+          file=sys.stderr)
+    return failed == 0
+
+
+def run_tasks(task_files, cli_options):
+    """Ejecuta las tareas en secuencia en este proceso, generando cada respuesta al terminar"""
+    for config_file in task_files:
+        # Los mensajes de la conversión van a stderr: stdout queda para las respuestas
+        with contextlib.redirect_stdout(sys.stderr):
+            yield run_task(config_file, cli_options)
+
+
+def run_batch_parallel(task_files, cli_options, workers):
+    """Ejecuta los grupos de tareas en un pool de procesos y genera las respuestas en orden"""
+    groups = group_tasks_by_output(task_files)
+    # El paralelismo es entre tareas: cada tarea se convierte en secuencia dentro de su proceso
+    task_options = dict(cli_options or {}, workers='1')
+    print(f"Lote en paralelo: {len(task_files)} tareas en {len(groups)} grupos, {workers} procesos",
+          file=sys.stderr)
+    pending = {}
+    next_index = 0
+    with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+        futures = [pool.submit(run_task_group, group, task_options) for group in groups]
+        for future in as_completed(futures):
+            pending.update(future.result())
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+
+def serve_lines(lines, out, cli_options=None):
+    """Procesa una ruta de tarea por línea hasta agotar la entrada"""
+    for line in lines:
+        config_file = line.strip()
+        if not config_file or config_file.startswith('#'):
+            continue
+        with contextlib.redirect_stdout(sys.stderr):
+            response = run_task(config_file, cli_options)
+        write_response(response, out)
+
+
+def parse_daemon_address(value):
+    """Convierte 'puerto' o 'host:puerto' en (host, puerto); 'true' o 'stdin' indican stdin (None).
+
+    Lanza ValueError si el puerto no es un número entre 1 y 65535.
+    """
+    if value in ('true', 'stdin', ''):
+        return None
+    host, sep, port = value.rpartition(':')
+    if not (port.isdigit() and 0 < int(port) < 65536):
+        raise ValueError(f"Puerto no válido en --daemon={value}: debe ser un número entre 1 y 65535")
+    return (host if sep and host else DEFAULT_DAEMON_HOST), int(port)
+
+
+def serve(address, cli_options=None):
+    """Modo servicio: lee rutas de tareas de stdin o de un socket TCP local"""
+    if address is None:
+        print("Modo servicio: esperando rutas de tareas por stdin", file=sys.stderr)
+        serve_lines(sys.stdin, sys.stdout, cli_options)
+        return
+
+    class TaskHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (raw.decode('utf-8') for raw in self.rfile)
+            out = _SocketWriter(self.wfile)
+            serve_lines(lines, out, cli_options)
+
+    with socketserver.TCPServer(address, TaskHandler) as server:
+        print(f"Modo servicio: escuchando en {address[0]}:{address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class _SocketWriter:
+    """Adaptador de texto sobre el flujo binario de la conexión"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.wfile.flush()
@@ -0,0 +1,87 @@
+"""
+Utilidades comunes de las pruebas: tareas mínimas que se convierten con
+xml_to_excel en un directorio temporal y lectura de las celdas del resultado.
+"""
+
+import os
+import sys
+from xml.sax.saxutils import quoteattr
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def cell(row, column, value, **attributes):
+    """XML de un <cell>; attributes admite type, format y style"""
+    extra = ''.join(f' {name}={quoteattr(str(text))}' for name, text in attributes.items())
+    return f'<cell row="{row}" column="{column}" value={quoteattr(value)}{extra}/>'
+
+
+def task_xml(output, workbooks, options=None, data_in=None, columns=None):
+    """Tarea con un estilo (id 1), las opciones indicadas, {hoja: [xml de celdas]} y {columna: ancho}"""
+    data_in_xml = f'<dataIn>{data_in}</dataIn>' if data_in else ''
+    columns_xml = ''.join(f'<column name="{name}" width="{width}"/>' for name, width in (columns or {}).items())
+    options_xml = ''.join(f'<option name="{name}" value="{value}"/>' for name, value in (options or {}).items())
+    sheets = ''.join(f'<workbook name="{name}">{"".join(cells)}</workbook>' for name, cells in workbooks.items())
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<ineoDoc task="updateXlsx" task_id="prueba">'
+        f'<data>{data_in_xml}<dataOut>{output}</dataOut></data>'
+        '<log><logLevel>WARNING</logLevel><logConsole>false</logConsole></log>'
+        + (f'<options>{options_xml}</options>' if options_xml else '') +
+        '<workbooks><styles><style id="1"><font>Arial</font><size>10</size><bold>true</bold>'
+        '<color>#FF0000</color><background>#FFFF00</background></style></styles>'
+        + (f'<columns>{columns_xml}</columns>' if columns_xml else '') +
+        f'{sheets}</workbooks></ineoDoc>'
+    )
+
+
+def write_data_xml(path, cells):
+    """XML de datos con unas cells celdas (sueltas y en filas compactas) y un rango, en dos hojas"""
+    with open(path, 'w', encoding='utf-8') as xml:
+        xml.write('<workbooks><styles><style id="n"><bold>true</bold></style></styles>')
+        for sheet in ('Uno', 'Dos'):
+            xml.write(f'<workbook name="{sheet}"><range ref="A1:C1" style="n"/>')
+            rows = cells // 6
+            for row in range(1, rows + 1):
+                xml.write(f'<cell row="{row}" column="A" value="texto {row}"/>'
+                          f'<cell row="{row}" column="B" value="{row}" type="number"/>')
+                xml.write(f'<row r="{row}" start="C"><c>{row * 2}</c></row>')
+            xml.write('</workbook>')
+        xml.write('</workbooks>')
+
+
+def read_cells(path):
+    """{hoja: {coordenada: (valor, tipo, formato, fuente, negrita, relleno)}} del xlsx.
+
+    Del relleno se compara el RGB: cada motor escribe el canal alfa de una forma.
+    Se incluyen las celdas en blanco con estilo; de una celda en blanco no se
+    compara el tipo (openpyxl conserva el de un <c> vacío, que no tiene valor).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path)
+    return {
+        ws.title: {
+            cell.coordinate: (cell.value, cell.data_type if cell.value is not None else None, cell.number_format,
+                              cell.font.name, cell.font.b, cell.fill.fgColor.rgb[-6:])
+            for row in ws.iter_rows() for cell in row if cell.value is not None or cell.has_style
+        }
+        for ws in wb.worksheets
+    }
+
+
+@pytest.fixture
+def run_task(tmp_path):
+    """Convierte una tarea y retorna (respuesta, ruta del xlsx). Con el mismo name se actualiza el archivo"""
+    from excel.excel_funciones_exportacion import xml_to_excel
+
+    def run(workbooks, name='salida', options=None, task_name=None, columns=None):
+        output = tmp_path / f'{name}.xlsx'
+        task = tmp_path / f'{task_name or name}.xml'
+        task.write_text(task_xml(f'FILE://{output}', workbooks, options, columns=columns), encoding='utf-8')
+        response = {}
+        assert xml_to_excel(str(task), response=response), response.get('error')
+        return response, str(output)
+
+    return run
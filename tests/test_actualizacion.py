@@ -0,0 +1,26 @@
+"""La actualización por partes (updateMode=parts) da el mismo resultado que la completa"""
+
+from conftest import cell, read_cells
+
+ORIGINAL = {'Datos': [cell(1, 'A', 'antes'), cell(2, 'A', '=1+1'), cell(3, 'B', '5', type='number'),
+                      cell(5, 'A', 'borrar', style=1), cell(5, 'B', '=1+2'), cell(5, 'C', 'true', type='boolean'),
+                      cell(5, 'D', '7', type='number', style=1)]}
+CHANGES = {
+    'Datos': [cell(1, 'A', '=B3*2', style=1), cell(2, 'A', 'texto'), cell(4, 'C', '='),
+              cell(5, 'A', ''), cell(5, 'B', ''), cell(5, 'C', '', style=1), cell(5, 'D', ''), cell(6, 'A', '')],
+    'Nueva': [cell(1, 'A', '=Datos!B3&"<>"'), cell(1, 'B', 'x', style=1)],
+}
+
+
+def test_partes_igual_que_completa(run_task):
+    results = {}
+    for mode in ('full', 'parts'):
+        run_task(ORIGINAL, mode, task_name=f'{mode}_crear')
+        response, excel_file = run_task(CHANGES, mode, {'updateMode': mode}, task_name=f'{mode}_actualizar')
+        results[mode] = read_cells(excel_file)
+    assert results['parts'] == results['full']
+    assert results['parts']['Datos']['A1'][:2] == ('=B3*2', 'f')
+    assert results['parts']['Datos']['A2'][:2] == ('texto', 's')
+    blanks = {coordinate: data for coordinate, data in results['parts']['Datos'].items() if coordinate[1:] == '5'}
+    assert all(data[:2] == (None, None) for data in blanks.values())
+    assert {'A5', 'C5'} <= blanks.keys()
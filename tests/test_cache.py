@@ -0,0 +1,95 @@
+"""Caché de resultados (cacheDir, cacheSize): aciertos, fallos y límite de tamaño"""
+
+import logging
+import os
+
+import pytest
+
+from conftest import cell, read_cells
+from excel.excel_cache import DEFAULT_CACHE_SIZE_MB, open_cache
+
+WORKBOOKS = {'Hoja': [cell(1, 'A', 'texto', style=1), cell(2, 'A', '42', type='number'), cell(3, 'B', '=A2*2')]}
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def cache_entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith('.xlsx'))
+
+
+def test_acierto_copia_el_mismo_resultado(run_task, cache_dir):
+    options = {'cacheDir': cache_dir}
+    first, first_file = run_task(WORKBOOKS, 'primera', options)
+    second, second_file = run_task(WORKBOOKS, 'segunda', options)
+    assert first['cache']['hit'] is False
+    assert second['cache']['hit'] is True
+    assert read_cells(second_file) == read_cells(first_file)
+    assert len(cache_entries(cache_dir)) == 1
+
+
+def test_opciones_que_no_cambian_el_resultado_no_cuentan(run_task, cache_dir):
+    run_task(WORKBOOKS, 'primera', {'cacheDir': cache_dir})
+    response, _ = run_task(WORKBOOKS, 'segunda', {'cacheDir': cache_dir, 'cacheSize': '50', 'workers': '2',
+                                                  'compressionThreads': '2'})
+    assert response['cache']['hit'] is True
+
+
+@pytest.mark.parametrize('options', [{'engine': 'xlsxwriter'}, {'valueType': 'auto'}, {'compressionLevel': '1'}])
+def test_fallo_si_cambia_una_opcion(run_task, cache_dir, options):
+    run_task(WORKBOOKS, 'primera', {'cacheDir': cache_dir})
+    response, _ = run_task(WORKBOOKS, 'segunda', {'cacheDir': cache_dir, **options})
+    assert response['cache']['hit'] is False
+    assert len(cache_entries(cache_dir)) == 2
+
+
+def test_fallo_si_cambian_los_datos(run_task, cache_dir):
+    run_task(WORKBOOKS, 'primera', {'cacheDir': cache_dir})
+    changed = {'Hoja': WORKBOOKS['Hoja'] + [cell(4, 'A', 'nueva')]}
+    response, path = run_task(changed, 'segunda', {'cacheDir': cache_dir})
+    assert response['cache']['hit'] is False
+    assert read_cells(path)['Hoja']['A4'][0] == 'nueva'
+
+
+def test_la_clave_incluye_el_archivo_existente(run_task, cache_dir):
+    options = {'cacheDir': cache_dir}
+    run_task(WORKBOOKS, 'salida', options, task_name='crear')
+    # Misma tarea sobre el archivo ya generado: es una actualización, no el archivo nuevo de la caché
+    response, _ = run_task(WORKBOOKS, 'salida', options, task_name='actualizar')
+    assert response['cache']['hit'] is False
+    response, _ = run_task(WORKBOOKS, 'nuevo', options)
+    assert response['cache']['hit'] is True
+
+
+def test_expulsa_las_entradas_usadas_hace_mas_tiempo(run_task, cache_dir):
+    first, first_file = run_task(WORKBOOKS, 'primera', {'cacheDir': cache_dir})
+    # Tamaño máximo para algo menos de dos resultados
+    max_mb = 1.5 * os.path.getsize(first_file) / (1024 * 1024)
+    options = {'cacheDir': cache_dir, 'cacheSize': f'{max_mb:.6f}'}
+    for index, sheet in enumerate(('Dos', 'Tres'), start=1):
+        entries = cache_entries(cache_dir)
+        # Fechas de uso explícitas: el orden del LRU no depende de la resolución del reloj
+        for entry in entries:
+            os.utime(os.path.join(cache_dir, entry), (index, index))
+        run_task({sheet: WORKBOOKS['Hoja']}, sheet, options)
+        assert len(cache_entries(cache_dir)) == 1
+        assert cache_entries(cache_dir) != entries
+
+    response, _ = run_task(WORKBOOKS, 'otra_vez', options)
+    assert response['cache']['hit'] is False
+
+
+def test_tamano_no_valido_usa_el_tamano_por_defecto(cache_dir, caplog):
+    logger = logging.getLogger('test.cache')
+    with caplog.at_level(logging.WARNING, logger='test.cache'):
+        cache = open_cache({'cacheDir': cache_dir, 'cacheSize': 'mucho'}, logger)
+    assert cache.max_bytes == DEFAULT_CACHE_SIZE_MB * 1024 * 1024
+    assert "Tamaño de caché 'mucho' no válido" in caplog.text
+
+
+def test_sin_cache_dir_no_hay_cache(run_task, cache_dir):
+    assert open_cache({}, logging.getLogger('test.cache')) is None
+    response, _ = run_task(WORKBOOKS)
+    assert 'cache' not in response
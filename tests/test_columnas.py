@@ -0,0 +1,40 @@
+"""Anchos de <columns>: fijos sin medir, -1 ajustado al contenido y el resto sin cambios"""
+
+import pytest
+from openpyxl import load_workbook
+
+from conftest import cell
+
+WORKBOOKS = {'Hoja1': [cell(1, 'A', 'x' * 20), cell(1, 'B', 'y' * 30), cell(2, 'C', 'z' * 15)]}
+COLUMNS = {'A': -1, 'B': 8}
+
+
+def widths(path):
+    ws = load_workbook(path).active
+    return {letter: ws.column_dimensions[letter].width for letter in 'ABC' if letter in ws.column_dimensions}
+
+
+@pytest.mark.parametrize('options', [{}, {'engine': 'xlsxwriter'}, {'workers': '2'}, {'memoryBudget': '0.001'}],
+                         ids=['openpyxl', 'xlsxwriter', 'paralelo', 'presupuesto'])
+def test_anchos_fijos_y_automaticos(run_task, options):
+    _, excel_file = run_task(WORKBOOKS, options=options, columns=COLUMNS)
+    # A: 20 caracteres + 2; B: fijo aunque su texto sea más largo; C: no listada
+    assert widths(excel_file) == {'A': 22, 'B': 8}
+
+
+@pytest.mark.parametrize('mode', ['full', 'parts'])
+def test_anchos_al_actualizar(run_task, mode):
+    run_task({'Hoja1': [cell(1, 'D', 'previo')]}, mode, task_name=f'{mode}_crear', columns={'C': 40})
+    _, excel_file = run_task(WORKBOOKS, mode, {'updateMode': mode}, task_name=f'{mode}_actualizar', columns=COLUMNS)
+    # C conserva el ancho del archivo existente
+    assert widths(excel_file) == {'A': 22, 'B': 8, 'C': 40}
+
+
+def test_sin_ajuste_automatico_se_aplican_los_fijos(run_task):
+    _, excel_file = run_task(WORKBOOKS, options={'autoFit': 'false'}, columns=COLUMNS)
+    assert widths(excel_file) == {'B': 8}
+
+
+def test_sin_columns_se_ajustan_todas(run_task):
+    _, excel_file = run_task(WORKBOOKS)
+    assert widths(excel_file) == {'A': 22, 'B': 32, 'C': 17}
@@ -0,0 +1,100 @@
+"""Compresión del xlsx: niveles y compresión por bloques en varios hilos (compressionThreads)"""
+
+import random
+import zipfile
+import zlib
+
+import pytest
+
+from conftest import cell, read_cells
+from excel import excel_paquete
+from excel.excel_paquete import deflate_file, deflate_file_parallel
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Bloques de 4 KB y compresión en paralelo desde cualquier tamaño: bastan archivos pequeños.
+
+    Retorna la lista de partes comprimidas en paralelo.
+    """
+    monkeypatch.setattr(excel_paquete, 'CHUNK_SIZE', 4096)
+    monkeypatch.setattr(excel_paquete, 'PARALLEL_DEFLATE_MIN_BYTES', 1)
+    parallel_parts = []
+
+    def spy(source_path, *args):
+        parallel_parts.append(source_path)
+        return deflate_file_parallel(source_path, *args)
+
+    monkeypatch.setattr(excel_paquete, 'deflate_file_parallel', spy)
+    return parallel_parts
+
+
+def inflate(path):
+    with open(path, 'rb') as deflated:
+        return zlib.decompress(deflated.read(), -15)
+
+
+@pytest.mark.parametrize('level', [1, 6, 9])
+def test_bloques_en_paralelo_igual_que_un_hilo(tmp_path, small_blocks, level):
+    rng = random.Random(18)
+    source = tmp_path / 'hoja.xml'
+    source.write_text(''.join(f'<row r="{row}"><c r="A{row}"><v>{rng.random()}</v></c></row>\n'
+                              for row in range(1, 3000)), encoding='utf-8')
+    content = source.read_bytes()
+    serial = deflate_file(str(source), str(tmp_path / 'serie.deflate'), level)
+    parallel = deflate_file_parallel(str(source), str(tmp_path / 'paralelo.deflate'), level, 4)
+
+    assert parallel[:2] == serial[:2] == (zlib.crc32(content), len(content))
+    assert inflate(tmp_path / 'paralelo.deflate') == content
+    # Cada bloque usa el final del anterior como diccionario: el tamaño apenas cambia
+    assert parallel[2] < serial[2] * 1.05
+
+
+def workbooks():
+    """Dos hojas de 300 filas; las filas impares con estilo"""
+    return {
+        name: [cell(row, column, f'{name} {row} {column}', style=1) if row % 2 else cell(row, column, f'{row}')
+               for row in range(1, 301) for column in 'ABCDE']
+        for name in ('Uno', 'Dos')
+    }
+
+
+def package_entries(path):
+    """Contenido de las entradas del paquete (salvo core.xml, que lleva la fecha de guardado)"""
+    with zipfile.ZipFile(path) as package:
+        assert package.testzip() is None
+        return {info.filename: (info.compress_type, package.read(info))
+                for info in package.infolist() if info.filename != 'docProps/core.xml'}
+
+
+def test_paquete_en_paralelo_igual_que_un_hilo(run_task, small_blocks):
+    data = workbooks()
+    _, serial_file = run_task(data, 'serie', {'compressionThreads': '1'})
+    assert not small_blocks
+    response, parallel_file = run_task(data, 'paralelo', {'compressionThreads': '4'})
+    assert small_blocks
+    assert response['compression'] == {'level': 6, 'threads': 4}
+    assert package_entries(parallel_file) == package_entries(serial_file)
+    assert read_cells(parallel_file) == read_cells(serial_file)
+
+
+def test_actualizacion_por_partes_en_paralelo(run_task, small_blocks):
+    results = {}
+    for name, threads in (('serie', '1'), ('paralelo', '4')):
+        run_task({'Previa': [cell(1, 'A', 'x')]}, name, task_name=f'{name}_crear')
+        _, excel_file = run_task(workbooks(), name, {'updateMode': 'parts', 'compressionThreads': threads},
+                                 task_name=f'{name}_actualizar')
+        results[name] = package_entries(excel_file)
+    assert small_blocks
+    assert results['paralelo'] == results['serie']
+
+
+@pytest.mark.parametrize('level, compress_type', [(0, zipfile.ZIP_STORED), (1, zipfile.ZIP_DEFLATED),
+                                                  (9, zipfile.ZIP_DEFLATED)])
+def test_niveles(run_task, small_blocks, level, compress_type):
+    data = {'Uno': [cell(row, 'A', f'fila {row}') for row in range(1, 200)]}
+    _, reference_file = run_task(data, 'referencia')
+    _, excel_file = run_task(data, f'nivel_{level}', {'compressionLevel': str(level), 'compressionThreads': '4'})
+    entries = package_entries(excel_file)
+    assert entries['xl/worksheets/sheet1.xml'][0] == compress_type
+    assert read_cells(excel_file) == read_cells(reference_file)
@@ -0,0 +1,91 @@
+"""Con memoryBudget las hojas volcadas a disco dan el mismo xlsx que sin presupuesto"""
+
+import random
+
+import pytest
+
+from conftest import cell, read_cells, task_xml, write_data_xml
+from excel.excel_funciones_exportacion import xml_to_excel
+from excel.excel_metricas import peak_rss_mb, reset_peak_rss
+
+# Unas 5 celdas en memoria: cada hoja se vuelca muchas veces
+BUDGET_MB = '0.001'
+
+# Crecimiento máximo del pico de memoria con presupuesto entre una entrada y otra 15 veces mayor
+MAX_GROWTH_MB = 10
+
+
+def workbooks():
+    """Celdas desordenadas de varios tipos, con fórmulas, vacías y repetidas (gana la última)"""
+    rng = random.Random(19)
+    cells = {'Uno': [], 'Dos': []}
+    for sheet, rows in (('Uno', 40), ('Dos', 15)):
+        for row in range(1, rows + 1):
+            cells[sheet] += [
+                cell(row, 'A', f'texto {row} <&>'),
+                cell(row, 'B', str(row * 1.5), type='number', format='#,##0.00'),
+                cell(row, 'C', f'=B{row}*2', style=1),
+                cell(row, 'D', '2024-03-15', type='date'),
+                cell(row, 'E', 'true', type='boolean'),
+                cell(row, 'G', '', style=1),
+                cell(row, 'H', ''),
+            ]
+        cells[sheet].append(cell(3, 'A', 'sustituido', style=1))
+        cells[sheet].append(cell(4, 'F', '='))
+        cells[sheet].append(cell(5, 'A', ''))
+    for sheet_cells in cells.values():
+        shuffled = sheet_cells[:-3]
+        rng.shuffle(shuffled)
+        sheet_cells[:-3] = shuffled
+    return cells
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'streaming': 'false'},
+    {'engine': 'xlsxwriter'},
+    {'workers': '2'},
+], ids=['streaming', 'arbol', 'xlsxwriter', 'paralelo'])
+def test_volcado_igual_que_sin_presupuesto(run_task, options):
+    data = workbooks()
+    _, reference_file = run_task(data, 'referencia', {'streaming': 'true', **options})
+    response, budget_file = run_task(data, 'presupuesto', {'memoryBudget': BUDGET_MB, **options})
+    assert response['memory']['spills'] > 0
+    cells = read_cells(budget_file)
+    assert cells == read_cells(reference_file)
+    assert cells['Uno']['C7'][:2] == ('=B7*2', 'f')
+    assert cells['Uno']['A3'][0] == 'sustituido'
+    assert cells['Uno']['G2'][0] is None and cells['Uno']['G2'][4]
+    assert 'H2' not in cells['Uno'] and 'A5' not in cells['Uno']
+
+
+def test_actualizacion_por_partes_con_volcado(run_task):
+    data = workbooks()
+    original = {'Uno': [cell(1, 'A', 'previo'), cell(50, 'Z', '=1+1')]}
+    results = {}
+    for name, options in (('referencia', {}), ('presupuesto', {'memoryBudget': BUDGET_MB})):
+        run_task(original, name, task_name=f'{name}_crear')
+        response, excel_file = run_task(data, name, {'updateMode': 'parts', **options}, task_name=f'{name}_actualizar')
+        results[name] = read_cells(excel_file)
+    assert response['memory']['spills'] > 0
+    assert results['presupuesto'] == results['referencia']
+
+
+def test_presupuesto_acota_tambien_la_lectura(tmp_path):
+    """Con el presupuesto y la validación por defecto el pico no crece con la entrada: el parser no guarda el árbol"""
+    if not reset_peak_rss() or peak_rss_mb() is None:
+        pytest.skip('El pico de memoria solo se puede reiniciar en Linux')
+    peaks = []
+    # La primera tarea compila el esquema y carga los módulos de escritura
+    for index, cells in enumerate((20000, 20000, 300000)):
+        data = tmp_path / f'datos_{index}.xml'
+        write_data_xml(data, cells)
+        task = tmp_path / f'tarea_{index}.xml'
+        task.write_text(task_xml(f'FILE://{tmp_path / f"salida_{index}.xlsx"}', {'Hoja': [cell(1, 'A', 'x')]},
+                                 {'memoryBudget': '2'}, data_in=f'FILE://{data}'), encoding='utf-8')
+        response = {}
+        reset_peak_rss()
+        assert xml_to_excel(str(task), response=response), response.get('error')
+        peaks.append(peak_rss_mb())
+    assert response['memory']['spills'] > 0
+    assert peaks[2] - peaks[1] < MAX_GROWTH_MB
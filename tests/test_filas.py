@@ -0,0 +1,111 @@
+"""Forma compacta de entrada (<row>, <c> y <range>): mismo resultado que los <cell> equivalentes"""
+
+import pytest
+from openpyxl.utils.cell import range_boundaries as openpyxl_range_boundaries
+
+from conftest import cell, read_cells
+from excel.excel_filas import range_boundaries
+
+COMPACT = {'Hoja': [
+    '<range ref="A1:C1" style="1"/>',
+    '<range ref="C:C" format="#,##0.00" type="number"/>',
+    '<row r="1"><c>Nombre</c><c>Edad</c><c>Importe</c></row>',
+    '<row type="number"><c>Juan</c><c>30</c><c f="0.0">1250.5</c></row>',
+    '<row sep="|" type="auto">Ana|41|980</row>',
+    '<row r="10" start="B"><c>fila 10</c><c/><c t="string">00123</c></row>',
+    cell(11, 'A', 'suelta'),
+    '<row start="B"><c>tras la fila 10</c></row>',
+    '<range ref="5:6" format="0.000"/>',
+    '<row r="5"><c t="number">1.5</c><c s="1">x</c></row>',
+    cell(6, 'A', '2', type='number'),
+    '<row r="7" sep=";"> a ;;b </row>',
+    '<row r="8">uno\tdos</row>',
+]}
+
+EQUIVALENT = {'Hoja': [
+    cell(1, 'A', 'Nombre', style=1),
+    cell(1, 'B', 'Edad', style=1),
+    cell(1, 'C', 'Importe', style=1, format='#,##0.00', type='number'),
+    cell(2, 'A', 'Juan', type='number'),
+    cell(2, 'B', '30', type='number'),
+    cell(2, 'C', '1250.5', format='0.0', type='number'),
+    cell(3, 'A', 'Ana', type='auto'),
+    cell(3, 'B', '41', type='auto'),
+    cell(3, 'C', '980', format='#,##0.00', type='auto'),
+    cell(10, 'B', 'fila 10'),
+    cell(10, 'D', '00123'),
+    cell(11, 'A', 'suelta'),
+    cell(11, 'B', 'tras la fila 10'),
+    cell(5, 'A', '1.5', format='0.000', type='number'),
+    cell(5, 'B', 'x', style=1, format='0.000'),
+    cell(6, 'A', '2', format='0.000', type='number'),
+    cell(7, 'A', ' a '),
+    cell(7, 'C', 'b ', format='#,##0.00', type='number'),
+    cell(8, 'A', 'uno'),
+    cell(8, 'B', 'dos'),
+]}
+
+
+@pytest.mark.parametrize('options', [{}, {'engine': 'xlsxwriter'}, {'streaming': 'true'}, {'workers': '2'}],
+                         ids=['openpyxl', 'xlsxwriter', 'streaming', 'paralelo'])
+def test_forma_compacta_igual_que_cell(run_task, options):
+    _, compact_file = run_task(COMPACT, 'compacta', options)
+    _, cells_file = run_task(EQUIVALENT, 'celdas', options)
+    cells = read_cells(compact_file)
+    assert cells == read_cells(cells_file)
+
+    sheet = cells['Hoja']
+    assert sheet['C1'][:3] == ('Importe', 's', '#,##0.00')
+    assert sheet['C2'][:3] == (1250.5, 'n', '0.0')
+    assert sheet['C3'][:3] == (980, 'n', '#,##0.00')
+    assert 'C10' not in sheet
+    assert sheet['D10'][:2] == ('00123', 's')
+    assert sheet['A11'][0] == 'suelta' and sheet['B11'][0] == 'tras la fila 10'
+    assert sheet['A7'][0] == ' a ' and 'B7' not in sheet
+
+
+def test_filas_sin_r_continuan_tras_la_ultima_fila_compacta(run_task):
+    workbooks = {'Hoja': [
+        '<row><c>1</c></row>',
+        '<row><c>2</c></row>',
+        '<row r="20" start="AA"><c>20</c></row>',
+        cell(30, 'A', 'no cuenta'),
+        '<row start="AB"><c>21</c><c>21 bis</c></row>',
+    ]}
+    _, path = run_task(workbooks)
+    sheet = read_cells(path)['Hoja']
+    assert {coordinate: data[0] for coordinate, data in sheet.items()} == {
+        'A1': '1', 'A2': '2', 'AA20': '20', 'A30': 'no cuenta', 'AB21': '21', 'AC21': '21 bis',
+    }
+
+
+def test_prioridad_de_los_rangos(run_task):
+    workbooks = {'Hoja': [
+        '<range ref="A:C" format="0.0" type="number"/>',
+        '<range ref="B2:B3" format="0.00"/>',
+        '<range ref="3:3" type="string"/>',
+        '<row r="2"><c>1</c><c>2</c><c f="0">3</c></row>',
+        '<row r="3"><c>4</c><c>5</c><c t="number">6</c></row>',
+        '<row r="4" format="0.000"><c>7</c><c>8</c></row>',
+        cell(4, 'C', '9', format='0'),
+        cell(4, 'D', '10'),
+    ]}
+    _, path = run_task(workbooks)
+    sheet = {coordinate: data[:3] for coordinate, data in read_cells(path)['Hoja'].items()}
+    assert sheet == {
+        'A2': (1, 'n', '0.0'), 'B2': (2, 'n', '0.00'), 'C2': (3, 'n', '0'),
+        'A3': ('4', 's', '0.0'), 'B3': ('5', 's', '0.00'), 'C3': (6, 'n', '0.0'),
+        'A4': (7, 'n', '0.000'), 'B4': (8, 'n', '0.000'), 'C4': (9, 'n', '0'),
+        'D4': ('10', 's', 'General'),
+    }
+
+
+@pytest.mark.parametrize('ref', ['A2', 'A2:G5000', 'B:D', '2:10', '$A$1:$C$3', 'aa1:ab2', 'XFD1048576'])
+def test_referencias_de_rango_como_openpyxl(ref):
+    assert range_boundaries(ref) == openpyxl_range_boundaries(ref)
+
+
+@pytest.mark.parametrize('ref', ['', ':', 'A:2', '1:B', 'A1:'])
+def test_referencias_de_rango_no_validas(ref):
+    with pytest.raises(ValueError):
+        range_boundaries(ref)
@@ -0,0 +1,28 @@
+"""Modo lote y servicio: dirección de --daemon y logging de tareas sucesivas"""
+
+import logging
+
+import pytest
+
+import ineoXlsxLotes
+from conftest import cell
+from excel.excel_tarea import TASK_LOGGER
+
+
+def test_direccion_de_servicio():
+    assert ineoXlsxLotes.parse_daemon_address('true') is None
+    assert ineoXlsxLotes.parse_daemon_address('8765') == (ineoXlsxLotes.DEFAULT_DAEMON_HOST, 8765)
+    assert ineoXlsxLotes.parse_daemon_address('0.0.0.0:8765') == ('0.0.0.0', 8765)
+    for value in ('host:abc', 'host:', '70000', '-1'):
+        with pytest.raises(ValueError):
+            ineoXlsxLotes.parse_daemon_address(value)
+
+
+def test_tareas_sucesivas_no_acumulan_loggers(run_task):
+    workbooks = {'Hoja1': [cell(1, 'A', 'x')]}
+    run_task(workbooks, 'primera')
+    loggers = set(logging.Logger.manager.loggerDict)
+    for number in range(3):
+        run_task(workbooks, f'tarea_{number}')
+    assert set(logging.Logger.manager.loggerDict) == loggers
+    assert logging.getLogger(TASK_LOGGER).handlers == []
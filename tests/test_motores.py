@@ -0,0 +1,27 @@
+"""El resultado no depende del motor: openpyxl y xlsxwriter escriben las mismas celdas"""
+
+from conftest import cell, read_cells
+
+FORMULAS = {'Hoja1': [
+    cell(1, 'A', '=1+1'),
+    cell(1, 'B', '=', style=1),
+    cell(2, 'A', '=SUM(A1:A1)&"x"', style=1),
+    cell(2, 'B', 'texto'),
+    cell(3, 'A', '12.5', type='number', format='#,##0.00'),
+    # Texto vacío: celda en blanco, con su estilo o formato si lo tiene
+    cell(4, 'A', ''),
+    cell(4, 'B', '', style=1),
+    cell(4, 'C', '', format='0.00'),
+]}
+
+
+def test_formulas_iguales_en_openpyxl_y_xlsxwriter(run_task):
+    _, openpyxl_file = run_task(FORMULAS, 'openpyxl')
+    _, xlsxwriter_file = run_task(FORMULAS, 'xlsxwriter', {'engine': 'xlsxwriter'})
+    cells = read_cells(openpyxl_file)
+    assert cells == read_cells(xlsxwriter_file)
+    assert cells['Hoja1']['A1'][:2] == ('=1+1', 'f')
+    # Un = solo es texto
+    assert cells['Hoja1']['B1'][:2] == ('=', 's')
+    assert 'A4' not in cells['Hoja1']
+    assert cells['Hoja1']['B4'][:2] == (None, None)
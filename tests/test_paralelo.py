@@ -0,0 +1,33 @@
+"""El modo paralelo (workers>1) da el mismo resultado que la conversión en secuencia"""
+
+from conftest import cell, read_cells
+
+
+def test_paralelo_igual_que_secuencia(run_task):
+    workbooks = {
+        'Uno': [cell(1, 'A', '=1+1'), cell(1, 'B', 'texto', style=1), cell(2, 'A', '=A1&"<x>"', style=1)],
+        'Dos': [cell(1, 'A', '7', type='number'), cell(3, 'C', '='), cell(2, 'B', '=SUM(1,2)'),
+                cell(1, 'B', '', style=1), cell(3, 'A', ''), cell(4, 'A', '')],
+    }
+    _, serial_file = run_task(workbooks, 'secuencia')
+    _, parallel_file = run_task(workbooks, 'paralelo', {'workers': '2'})
+    cells = read_cells(parallel_file)
+    assert cells == read_cells(serial_file)
+    assert cells['Uno']['A2'][:2] == ('=A1&"<x>"', 'f')
+    assert cells['Dos']['B1'][0] is None and cells['Dos']['B1'][4]
+    assert 'A4' not in cells['Dos']
+
+
+def test_paralelo_sin_hojas_igual_que_secuencia(tmp_path):
+    from conftest import task_xml
+    from excel.excel_funciones_exportacion import xml_to_excel
+
+    errors = []
+    for name, options in (('secuencia', {}), ('paralelo', {'workers': '2'})):
+        task = tmp_path / f'{name}.xml'
+        task.write_text(task_xml(f'FILE://{tmp_path / name}.xlsx', {}, {'validate': 'false', **options}),
+                        encoding='utf-8')
+        response = {}
+        assert not xml_to_excel(str(task), response=response)
+        errors.append(response['error'])
+    assert errors[0] == errors[1]
@@ -0,0 +1,48 @@
+"""Respuesta de la tarea: motivo de los errores y métricas de memoria"""
+
+import pytest
+
+from conftest import cell, task_xml
+from excel.excel_funciones_exportacion import xml_to_excel
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<ineoDoc task="updateXlsx" task_id="prueba">'
+
+
+def convert(tmp_path, text):
+    task = tmp_path / 'tarea.xml'
+    task.write_text(text, encoding='utf-8')
+    response = {}
+    assert not xml_to_excel(str(task), response=response)
+    assert response['status'] == 'error'
+    return response['error']
+
+
+@pytest.mark.parametrize('data, message', [
+    ('<dataIn>FILE:///no/existe.xml</dataIn><dataOut>FILE://{out}</dataOut>', 'dataIn no válido'),
+    ('<dataIn>URL://http://servidor/datos.xml</dataIn><dataOut>FILE://{out}</dataOut>', "Tipo de origen 'url'"),
+    ('<dataOut>BASE64://</dataOut>', 'dataOut no válido'),
+    ('<dataOut>URL://ftp://servidor/salida.xlsx</dataOut>', 'dataOut no válido'),
+    ('<dataIn>FILE://{data}</dataIn>', 'No se encontró dataOut'),
+])
+def test_errores_de_datos_en_la_respuesta(tmp_path, data, message):
+    data_file = tmp_path / 'datos.xml'
+    data_file.write_text('<workbooks/>', encoding='utf-8')
+    data = data.format(out=tmp_path / 'salida.xlsx', data=data_file)
+    assert message in convert(tmp_path, f'{HEADER}<data>{data}</data></ineoDoc>')
+
+
+def test_errores_del_esquema_en_la_respuesta(tmp_path):
+    error = convert(tmp_path, task_xml(f'FILE://{tmp_path / "salida.xlsx"}', {'Hoja1': ['<celda/>']}))
+    assert 'no es válido según el esquema XSD' in error
+    assert 'celda' in error
+
+
+def test_pico_de_memoria_por_tarea(run_task):
+    response, _ = run_task({'Hoja1': [cell(1, 'A', 'x')]})
+    if response['peak_rss_scope'] != 'task':
+        pytest.skip('El sistema no permite reiniciar el pico de memoria')
+    # Una tarea anterior con mucha memoria no cuenta en el pico de la siguiente
+    previous = bytearray(300 * 1024 * 1024)
+    del previous
+    response, _ = run_task({'Hoja1': [cell(1, 'A', 'x')]}, 'siguiente')
+    assert response['peak_rss_mb'] < 250
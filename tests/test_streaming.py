@@ -0,0 +1,52 @@
+"""Memoria del modo streaming: con la validación por defecto no debe crecer con la entrada"""
+
+import logging
+
+import pytest
+
+from conftest import write_data_xml
+from excel.excel_funciones_exportacion import write_workbooks_streaming
+from excel.excel_metricas import peak_rss_mb, reset_peak_rss
+
+# Crecimiento máximo del pico de memoria entre una entrada pequeña y otra 15 veces mayor.
+# Con el esquema anterior (xs:choice repetida) la validación crecía unos 18 MB por cada
+# 100.000 celdas
+MAX_GROWTH_MB = 10
+
+
+class NullWriter:
+    """Escritor que descarta las celdas: solo se mide la lectura y la validación"""
+
+    def set_styles(self, styles):
+        pass
+
+    def set_columns(self, columns):
+        pass
+
+    def open_sheet(self, name):
+        return object(), True
+
+    def write_cell(self, *args):
+        pass
+
+
+def streaming_peak(path):
+    reset_peak_rss()
+    write_workbooks_streaming(str(path), NullWriter(), logging.getLogger('test'))
+    return peak_rss_mb()
+
+
+def test_validacion_en_streaming_con_memoria_constante(tmp_path):
+    if not reset_peak_rss() or peak_rss_mb() is None:
+        pytest.skip('El pico de memoria solo se puede reiniciar en Linux')
+    small = tmp_path / 'pequeno.xml'
+    large = tmp_path / 'grande.xml'
+    write_data_xml(small, 20000)
+    write_data_xml(large, 300000)
+
+    # Primera pasada: compila el esquema y reserva lo que no depende de la entrada
+    streaming_peak(small)
+    small_peak = streaming_peak(small)
+    large_peak = streaming_peak(large)
+
+    assert large_peak - small_peak < MAX_GROWTH_MB
@@ -0,0 +1,132 @@
+"""Transporte de la tarea: dataIn BASE64 por bloques y envío de dataOut a un servidor HTTP local"""
+
+import base64
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import cell, read_cells, task_xml
+from excel import excel_transporte
+from excel.excel_transporte import UPLOAD_COUNTERS, Base64Source, UploadError, upload_file
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """Guarda cada petición; /error responde 500 y /cerrar cierra la conexión sin avisar"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append({'method': self.command, 'path': self.path, 'body': body,
+                                     'client_port': self.client_address[1],
+                                     'content_type': self.headers['Content-Type']})
+        status, text = (500, b'sin espacio') if self.path == '/error' else (201, b'')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+        # Cierra sin Connection: close, como un servidor que agota el keep-alive
+        self.close_connection = self.path == '/cerrar'
+
+    do_PUT = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), UploadHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    excel_transporte.close_connections()
+    UPLOAD_COUNTERS.update(uploads=0, connections=0)
+    try:
+        yield httpd, f'http://127.0.0.1:{httpd.server_address[1]}'
+    finally:
+        excel_transporte.close_connections()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    path = tmp_path / 'informe.xlsx'
+    path.write_bytes(b'PK contenido de prueba' * 1000)
+    return path
+
+
+@pytest.mark.parametrize('method', ['POST', 'PUT'])
+def test_envio(server, xlsx_file, method):
+    httpd, base_url = server
+    assert upload_file(str(xlsx_file), f'{base_url}/subida/informe.xlsx?id=7', method) == 201
+    request, = httpd.requests
+    assert (request['method'], request['path']) == (method, '/subida/informe.xlsx?id=7')
+    assert request['body'] == xlsx_file.read_bytes()
+    assert request['content_type'] == excel_transporte.XLSX_CONTENT_TYPE
+
+
+def test_reutiliza_la_conexion(server, xlsx_file):
+    httpd, base_url = server
+    for _ in range(3):
+        upload_file(str(xlsx_file), f'{base_url}/subida')
+    assert UPLOAD_COUNTERS == {'uploads': 3, 'connections': 1}
+    assert len({request['client_port'] for request in httpd.requests}) == 1
+
+
+def test_reintenta_si_el_servidor_cerro_la_conexion(server, xlsx_file):
+    httpd, base_url = server
+    upload_file(str(xlsx_file), f'{base_url}/cerrar')
+    assert upload_file(str(xlsx_file), f'{base_url}/subida') == 201
+    assert UPLOAD_COUNTERS == {'uploads': 2, 'connections': 2}
+    assert [request['path'] for request in httpd.requests] == ['/cerrar', '/subida']
+
+
+def test_respuesta_de_error(server, xlsx_file):
+    _, base_url = server
+    with pytest.raises(UploadError, match='500.*sin espacio'):
+        upload_file(str(xlsx_file), f'{base_url}/error')
+    assert UPLOAD_COUNTERS['uploads'] == 0
+
+
+def test_servidor_no_disponible(xlsx_file):
+    with pytest.raises(UploadError):
+        upload_file(str(xlsx_file), 'http://127.0.0.1:1/subida', timeout=5)
+
+
+@pytest.mark.parametrize('chunk', [4, 8, 12, 256 * 1024])
+def test_base64_por_bloques(monkeypatch, chunk):
+    monkeypatch.setattr(excel_transporte, 'BASE64_CHUNK', chunk)
+    for raw in (b'', b'a', b'ab', b'abc', bytes(range(256)) * 3):
+        encoded = base64.b64encode(raw).decode()
+        wrapped = '\n'.join(encoded[i:i + 7] for i in range(0, len(encoded), 7)) + '\n \n'
+        for text in (encoded, wrapped):
+            assert Base64Source('BASE64://' + text, len('BASE64://')).open().read() == raw
+
+
+@pytest.mark.parametrize('text', ['QQ', 'QQ=', 'Q===', '====', 'QUJD*', 'QUJDñ', 'QU=D', 'QQ==QUJD', 'QQ==\n\nQUJD'])
+def test_base64_no_valido(monkeypatch, text):
+    monkeypatch.setattr(excel_transporte, 'BASE64_CHUNK', 4)
+    with pytest.raises(ValueError, match='BASE64'):
+        io.BufferedReader(excel_transporte.Base64Reader(text)).read()
+
+
+def test_tarea_con_base64_y_url(server, tmp_path):
+    httpd, base_url = server
+    workbooks = {'Hoja1': [cell(1, 'A', 'hola'), cell(2, 'B', '=1+1', style=1)]}
+    data = base64.b64encode(task_xml('FILE://sin_uso.xlsx', workbooks).encode()).decode()
+    task = tmp_path / 'tarea.xml'
+    task.write_text(task_xml(f'URL://{base_url}/subida/informe.xlsx', workbooks, data_in=f'BASE64://{data}'),
+                    encoding='utf-8')
+
+    from excel.excel_funciones_exportacion import xml_to_excel
+    response = {}
+    assert xml_to_excel(str(task), response=response), response.get('error')
+    assert response['upload']['status'] == 201
+    request, = httpd.requests
+    uploaded = tmp_path / 'recibido.xlsx'
+    uploaded.write_bytes(request['body'])
+    assert read_cells(uploaded)['Hoja1']['A1'][0] == 'hola'
+    assert read_cells(uploaded)['Hoja1']['B2'][:2] == ('=1+1', 'f')
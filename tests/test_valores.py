@@ -0,0 +1,103 @@
+"""Conversión de valores: detección automática (auto) y tipos explícitos"""
+
+from datetime import date, datetime
+
+import pytest
+
+from conftest import cell, read_cells
+from excel.excel_valores import convert_value, detect_value
+
+
+@pytest.mark.parametrize('value', ['00123', '0123.5', '-007', '+0001'])
+def test_auto_codigos_con_ceros_a_la_izquierda_quedan_como_texto(value):
+    assert detect_value(value) == value
+
+
+@pytest.mark.parametrize('value, expected', [('0', 0), ('0.5', 0.5), ('-0.25', -0.25), ('10', 10)])
+def test_auto_cero_sin_ceros_a_la_izquierda_es_numero(value, expected):
+    assert detect_value(value) == expected
+
+
+@pytest.mark.parametrize('value', ['1234567890123456', '12345678901234567890', '1234567890.123456', '-1234567890123456'])
+def test_auto_mas_de_15_digitos_quedan_como_texto(value):
+    assert detect_value(value) == value
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('123456789012345', 123456789012345),
+    ('-12.5', -12.5),
+    ('1e6', 1e6),
+    ('.5', 0.5),
+])
+def test_auto_numeros(value, expected):
+    converted = detect_value(value)
+    assert converted == expected and type(converted) is type(expected)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-03-31', date(2024, 3, 31)),
+    ('2024-03-31T08:30:00', datetime(2024, 3, 31, 8, 30)),
+    ('2024-03-31 08:30', datetime(2024, 3, 31, 8, 30)),
+    ('2024-03-31T08:30:00.250', datetime(2024, 3, 31, 8, 30, 0, 250000)),
+])
+def test_auto_fechas_iso(value, expected):
+    converted = detect_value(value)
+    assert converted == expected and type(converted) is type(expected)
+
+
+@pytest.mark.parametrize('value', ['2024-13-01', '2024-02-30', '2024-03-31T25:00', '31/03/2024', '2024-3-31'])
+def test_auto_fechas_no_validas_quedan_como_texto(value):
+    assert detect_value(value) == value
+
+
+@pytest.mark.parametrize('value, expected', [('true', True), ('TRUE', True), ('False', False), ('false', False)])
+def test_auto_booleanos(value, expected):
+    assert detect_value(value) is expected
+
+
+@pytest.mark.parametrize('value', ['', 'texto', '1.2.3', '+', '-', '1e400', ' 12', 'verdadero', '1,5'])
+def test_auto_resto_queda_como_texto(value):
+    assert detect_value(value) == value
+
+
+def test_auto_uno_y_cero_son_numeros_no_booleanos():
+    assert detect_value('1') == 1 and detect_value('1') is not True
+    assert detect_value('0') == 0 and detect_value('0') is not False
+
+
+@pytest.mark.parametrize('value, value_type, expected', [
+    ('0123', 'number', 123),
+    ('1234567890123456', 'number', 1234567890123456),
+    (' 42 ', 'number', 42),
+    ('1', 'boolean', True),
+    ('No', 'boolean', 'No'),
+    ('42', 'string', '42'),
+    ('2024-03-31', 'string', '2024-03-31'),
+    ('true', 'string', 'true'),
+    ('2024-03-31', 'date', date(2024, 3, 31)),
+    ('x', 'number', 'x'),
+    ('2024-03-31', 'number', '2024-03-31'),
+])
+def test_tipo_explicito(value, value_type, expected):
+    assert convert_value(value, value_type) == expected
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xlsxwriter'])
+def test_tipo_de_la_celda_prevalece_sobre_la_deteccion(run_task, engine):
+    workbooks = {'Hoja': [
+        cell(1, 'A', '42'),
+        cell(1, 'B', '42', type='string'),
+        cell(2, 'A', '00123'),
+        cell(2, 'B', '00123', type='number'),
+        cell(3, 'A', '2024-03-31'),
+        cell(3, 'B', '2024-03-31', type='string'),
+        cell(4, 'A', 'true'),
+        cell(4, 'B', 'true', type='string'),
+    ]}
+    _, path = run_task(workbooks, engine, {'valueType': 'auto', 'engine': engine})
+    cells = read_cells(path)['Hoja']
+    assert cells['A1'][:2] == (42, 'n') and cells['B1'][:2] == ('42', 's')
+    assert cells['A2'][:2] == ('00123', 's') and cells['B2'][:2] == (123, 'n')
+    assert cells['A3'][0] == datetime(2024, 3, 31) and cells['A3'][2] == 'yyyy-mm-dd'
+    assert cells['B3'][:2] == ('2024-03-31', 's')
+    assert cells['A4'][:2] == (True, 'b') and cells['B4'][:2] == ('true', 's')